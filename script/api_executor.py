@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+Google Calendar API 執行層
+API 呼叫在有界的執行緒池中執行，每個執行緒使用自己的授權 HTTP 連線（httplib2 不是執行緒安全的）；
+以令牌桶限制每個使用者與每個日曆寫入的配額，遇到速率限制時以帶隨機抖動的指數退避重試，
+並依節流回應自動調整同時進行的請求數（節流時減半，連續成功後逐步增加）。
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from calendar_batch import is_retryable_error, is_rate_limited
+
+# 預設配額：Google Calendar 每個使用者每分鐘 600 個請求
+DEFAULT_USER_QPS = 10.0
+DEFAULT_CALENDAR_QPS = 10.0
+
+# 令牌桶容量（允許一次送出一個完整批次）
+DEFAULT_BURST = 50
+
+# 同時進行的請求數上限
+DEFAULT_CONCURRENCY = 4
+
+# 退避時間（秒）：base * 2^attempt，上限 cap，實際等待時間在 [0, 上限] 之間隨機
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 32.0
+
+# 連續多少個請求沒有被節流後增加一個並行數
+INCREASE_AFTER = 20
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """帶完整隨機抖動的指數退避時間（attempt 從 0 開始）"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """令牌桶速率限制：平均每秒 rate 個請求，最多累積 capacity 個
+
+    一次取得的數量可以超過目前的令牌數（例如一個批次），不足的部分以等待時間償還。
+    """
+
+    def __init__(self, rate, capacity=DEFAULT_BURST):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.waited = 0.0
+
+    def acquire(self, count=1):
+        """取得 count 個令牌，必要時等待，回傳等待的秒數"""
+        if self.rate <= 0:
+            return 0.0
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= count
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class AdaptiveConcurrency:
+    """可調整上限的並行數控制（AIMD：節流時減半，連續成功後加一）"""
+
+    def __init__(self, initial=DEFAULT_CONCURRENCY, minimum=1, maximum=DEFAULT_CONCURRENCY,
+                 increase_after=INCREASE_AFTER):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(max(initial, self.minimum), self.maximum)
+        self.increase_after = increase_after
+        self.active = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+        self.throttled = 0
+
+    def __enter__(self):
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def on_throttle(self):
+        """收到速率限制回應：並行數減半"""
+        with self.condition:
+            self.throttled += 1
+            self.successes = 0
+            self.limit = max(self.minimum, self.limit // 2)
+
+    def on_success(self, count=1):
+        """請求沒有被節流：累積到 increase_after 個後並行數加一"""
+        with self.condition:
+            self.successes += count
+            if self.successes >= self.increase_after and self.limit < self.maximum:
+                self.successes = 0
+                self.limit += 1
+                self.condition.notify_all()
+
+
+class ApiExecutor:
+    """在執行緒池中執行 Google API 請求（令牌桶限速、重試與自適應並行數）
+
+    http_factory 建立每個執行緒專用的授權 HTTP 物件；為 None 時使用請求本身的連線。
+    """
+
+    def __init__(self, http_factory=None, concurrency=DEFAULT_CONCURRENCY,
+                 user_qps=DEFAULT_USER_QPS, calendar_qps=DEFAULT_CALENDAR_QPS,
+                 burst=DEFAULT_BURST, max_retries=5):
+        self.http_factory = http_factory
+        self.concurrency = AdaptiveConcurrency(initial=concurrency, maximum=concurrency)
+        self.user_bucket = TokenBucket(user_qps, burst)
+        self.calendar_bucket = TokenBucket(calendar_qps, burst)
+        self.max_retries = max_retries
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix='calendar-api')
+        self.local = threading.local()
+        self.stats_lock = threading.Lock()
+        self.stats = {'calls': 0, 'retries': 0}
+
+    def http(self):
+        """目前執行緒專用的授權 HTTP 物件"""
+        if self.http_factory is None:
+            return None
+        http = getattr(self.local, 'http', None)
+        if http is None:
+            http = self.local.http = self.http_factory()
+        return http
+
+    def throttle(self, count=1, write=False):
+        """依配額等待：所有請求計入使用者配額，寫入另外計入日曆配額"""
+        self.user_bucket.acquire(count)
+        if write:
+            self.calendar_bucket.acquire(count)
+
+    def record(self, throttled, count=1):
+        """回報一組請求的結果，調整並行數"""
+        with self.stats_lock:
+            self.stats['calls'] += count
+        if throttled:
+            self.concurrency.on_throttle()
+        else:
+            self.concurrency.on_success(count)
+
+    def submit(self, function, *args):
+        """在執行緒池中執行 function(http, *args)，回傳 Future（受並行數上限控制）"""
+        def run():
+            with self.concurrency:
+                return function(self.http(), *args)
+        return self.pool.submit(run)
+
+    def execute(self, request, write=False):
+        """執行單一請求：限速、可重試的錯誤以隨機抖動的指數退避重試，回傳回應"""
+        def run(http):
+            attempt = 0
+            while True:
+                self.throttle(write=write)
+                try:
+                    response = request.execute(http=http) if http is not None else request.execute()
+                except Exception as e:
+                    self.record(is_rate_limited(e))
+                    if not is_retryable_error(e) or attempt >= self.max_retries:
+                        raise
+                    with self.stats_lock:
+                        self.stats['retries'] += 1
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+                else:
+                    self.record(False)
+                    return response
+        return self.submit(run).result()
+
+    def report(self):
+        stats = self.stats
+        waited = self.user_bucket.waited + self.calendar_bucket.waited
+        return (f"API執行層: {stats['calls']} 個請求，重試 {stats['retries']} 次，"
+                f"節流 {self.concurrency.throttled} 次，目前並行數 {self.concurrency.limit}，"
+                f"配額等待 {waited:.1f} 秒")
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Body提取效能比較與一致性檢查
+比較舊版（完整解碼 + 六次正規表示式）與 html_body（不限字數時一次解碼，限制字數時逐段解碼），
+並驗證：不限字數時輸出完全相同、限制字數時等於完整結果截斷
+"""
+
+import argparse
+import random
+import re
+import time
+from html import unescape
+
+import html_body
+
+
+def legacy_extract_body_clean(html_content):
+    if not html_content:
+        return None
+    text = re.sub(r'<[^>]+>', '', html_content)
+    text = unescape(text)
+    text = re.sub(r'\r\n', '\n', text)
+    text = re.sub(r'\r', '\n', text)
+    text = re.sub(r'\n\s*\n', '\n\n', text)
+    text = re.sub(r'[ \t]+', ' ', text)
+    text = text.strip()
+    if not text or len(text) < 10:
+        return None
+    for prefix in [r'^/\*.*?\*/', r'^BM_BEGIN.*?BM_END']:
+        text = re.sub(prefix, '', text, flags=re.DOTALL)
+    text = text.strip()
+    return text if text and len(text) > 10 else None
+
+
+def legacy_from_bytes(html_bytes):
+    """舊版流程：一次解碼完整HTML區段再提取"""
+    return legacy_extract_body_clean(html_bytes.decode('utf-16le', errors='ignore'))
+
+
+def make_invitation(rng, signature_kb, thread_paragraphs=20):
+    """模擬會議邀請：樣式表、內文（含轉寄的郵件串）、很長的簽名檔與內嵌圖片"""
+    style = "<style>/* Font Definitions */ p.MsoNormal {margin:0cm; font-size:11.0pt;}</style>"
+    body = "".join(f"<p class=MsoNormal><span style='font-size:11.0pt'>第 {i} 段 agenda &amp; notes 會議內容 &lt;重要&gt;</span></p>\r\n"
+                   for i in range(rng.randint(1, thread_paragraphs)))
+    signature = "<div><img src=\"data:image/png;base64," + "A" * (signature_kb * 1024) + "\"></div>"
+    signature += "<p>Best regards,<br>Someone &nbsp; Company &#20844;&#21496;</p>" * rng.randint(1, 5)
+    prefix = rng.choice(["", "/* comment */ ", "BM_BEGIN bookmark BM_END "])
+    return f"<html><head>{style}</head><body>{prefix}{body}{signature}</body></html>"
+
+
+def random_html(rng):
+    """隨機片段：跨段的標籤、實體、換行與空白"""
+    parts = ['<', '>', '<p>', '</p>', '&amp;', '&lt;', '&#12354;', '&nbsp', '&', ';', '\r\n', '\r', '\n',
+             ' ', '\t', '　', 'abc', '會議', '/*', '*/', 'BM_BEGIN', 'BM_END', 'x' * 40]
+    return ''.join(rng.choice(parts) for _ in range(rng.randint(0, 200)))
+
+
+def verify(count, seed=0):
+    rng = random.Random(seed)
+    for index in range(count):
+        html = random_html(rng) if index % 4 else make_invitation(rng, rng.randint(0, 4))
+        data = html.encode('utf-16le', errors='surrogatepass')
+        if index % 7 == 0:
+            data += b'\x00'  # 奇數長度
+        expected = legacy_from_bytes(data)
+
+        chunk = rng.choice([2, 3, 16, 64, 1024, html_body.DECODE_CHUNK_BYTES])
+        actual = html_body.finish_body_text(''.join(html_body.iter_html_text(data, chunk)))
+        if actual != expected:
+            raise AssertionError(f"完整輸出不一致 (chunk={chunk}): {html[:200]!r}")
+
+        max_chars = rng.choice([20, 100, 1000])
+        if html_body.extract_body_text(data) != expected:
+            raise AssertionError(f"不限字數輸出不一致: {html[:200]!r}")
+
+        bounded = html_body.extract_body_text(data, max_chars)
+        truncated = expected
+        if expected and len(expected) > max_chars:
+            truncated = expected[:max_chars] + html_body.TRUNCATED_MARKER
+        if bounded != truncated:
+            raise AssertionError(f"截斷輸出不一致 (max={max_chars}): {html[:200]!r}")
+    print(f"一致性檢查通過: {count} 個HTML片段")
+
+
+def bench(func, values, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Body提取效能比較與一致性檢查')
+    parser.add_argument('--events', type=int, default=200,
+                       help='模擬的會議邀請數量 (預設: 200)')
+    parser.add_argument('--signature-kb', type=int, default=256,
+                       help='簽名檔內嵌圖片大小 KB (預設: 256)')
+    parser.add_argument('--thread-paragraphs', type=int, default=2000,
+                       help='郵件串段落數上限 (預設: 2000)')
+    parser.add_argument('--max-body', type=int, default=8000,
+                       help='限制字數 (預設: 8000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='重複次數，取最佳值 (預設: 3)')
+    parser.add_argument('--verify', type=int, default=5000,
+                       help='隨機一致性檢查的數量 (預設: 5000)')
+    args = parser.parse_args()
+
+    verify(args.verify)
+
+    rng = random.Random(1)
+    values = [make_invitation(rng, args.signature_kb, args.thread_paragraphs).encode('utf-16le')
+              for _ in range(args.events)]
+    total_mb = sum(len(v) for v in values) / 1024 / 1024
+    print(f"\n語料: {args.events} 個會議邀請，共 {total_mb:.1f} MB")
+
+    legacy_time = bench(legacy_from_bytes, values, args.repeat)
+    full_time = bench(html_body.extract_body_text, values, args.repeat)
+    bounded_time = bench(lambda v: html_body.extract_body_text(v, args.max_body), values, args.repeat)
+    print(f"{'方法':<28} {'時間(秒)':>10} {'加速':>8}")
+    print(f"{'舊版（完整解碼+六次regex）':<22} {legacy_time:>10.4f} {1:>7.1f}x")
+    print(f"{'一次解碼（不限字數）':<24} {full_time:>10.4f} {legacy_time / full_time:>7.1f}x")
+    print(f"{f'逐段解碼（--max-body {args.max_body}）':<24} {bounded_time:>10.4f} {legacy_time / bounded_time:>7.1f}x")
+    print(f"{'--no-body':<28} {0:>10.4f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
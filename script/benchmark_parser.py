@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+解析器效能測試（使用合成的 Outlook 資料，可在 Linux 執行）
+以 outlook_fixtures 產生指定事件數的資料，量測：
+  - parse_event_file：逐一解析事件檔案的 events/s 與 MB/s
+  - 端到端匯出：資料庫查詢 → 解析 → 寫入CSV 的 events/s 與 MB/s
+並檢查解析出的 Subject/Location/Organizer 與產生時的內容一致。
+可將結果存為JSON，之後以 --baseline 比較，變慢超過容許比例時回傳非零結束碼。
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from dump_outlook_calendar import CompleteFixedTimeZoneOutlookParser
+from outlook_fixtures import SyntheticOutlookData, LANGUAGE_TEXT
+
+
+def make_reader(data_path, workers=1):
+    return CompleteFixedTimeZoneOutlookParser(user_timezone='UTC+8', workers=workers,
+                                              outlook_data_path=data_path, quiet=True)
+
+
+def check_manifest(reader, manifest):
+    """比對解析結果與產生時的內容，回傳不一致的事件數"""
+    mismatches = 0
+    for expected in manifest:
+        if expected['layout'] == 'no_marker':
+            # 沒有長度標記時只能回退到字串掃描，不要求與原內容完全相同
+            continue
+        event_data = reader.parse_event_file(os.path.join(reader.outlook_data_path, expected['PathToDataFile']))
+        actual = (event_data['subject'], event_data['location'] or '', event_data['organizer'])
+        if actual != (expected['Subject'], expected['Location'], expected['Organizer']):
+            mismatches += 1
+            if mismatches <= 3:
+                print(f"  不一致: {expected['PathToDataFile']}: {actual!r}")
+    return mismatches
+
+
+def bench_parse(reader, paths, repeat):
+    """逐一解析事件檔案，回傳最佳時間"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for path in paths:
+            reader.parse_event_file(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_dump(reader, output_file, days, repeat):
+    """端到端匯出（不列印處理過程），回傳 (最佳時間, 匯出事件數)"""
+    best = None
+    count = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            count = reader.export_events(reader.iter_events(days), output_file)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, count
+
+
+def run_size(args, events, work_dir):
+    data_path = os.path.join(work_dir, f"outlook_{events}")
+    fixture = SyntheticOutlookData(data_path, events=events, seed=args.seed, languages=args.languages,
+                                   body_kb=args.body_kb, image_kb=args.image_kb, days=args.days,
+                                   recurring=args.recurring)
+    started = time.perf_counter()
+    manifest = fixture.generate()
+    generate_seconds = time.perf_counter() - started
+    total_mb = fixture.total_bytes / 1024 / 1024
+    rows = len(manifest)
+    print(f"\n{events} 個事件 + {rows - events} 個週期性實例（{total_mb:.1f} MB，產生 {generate_seconds:.1f} 秒）")
+
+    reader = make_reader(data_path)
+    mismatches = check_manifest(reader, manifest[:args.check])
+    if mismatches:
+        print(f"  ❌ 解析結果不一致: {mismatches} 個事件")
+
+    paths = sorted({os.path.join(data_path, expected['PathToDataFile']) for expected in manifest})
+    parse_seconds = bench_parse(reader, paths, args.repeat)
+
+    dump_reader = make_reader(data_path, workers=args.workers)
+    dump_seconds, exported = bench_dump(dump_reader, os.path.join(work_dir, f"dump_{events}.csv"),
+                                        args.days, args.repeat)
+    if exported != rows:
+        print(f"  ❌ 匯出事件數 {exported} 與產生的 {rows} 不同")
+        mismatches += abs(rows - exported)
+
+    result = {
+        'events': events,
+        'rows': rows,
+        'megabytes': round(total_mb, 3),
+        'parse': {
+            'seconds': round(parse_seconds, 6),
+            'events_per_second': round(len(paths) / parse_seconds, 1),
+            'mb_per_second': round(total_mb / parse_seconds, 2),
+        },
+        'dump': {
+            'seconds': round(dump_seconds, 6),
+            'events_per_second': round(rows / dump_seconds, 1),
+            'mb_per_second': round(total_mb / dump_seconds, 2),
+            'workers': args.workers,
+        },
+        'mismatches': mismatches,
+    }
+    for name in ('parse', 'dump'):
+        stats = result[name]
+        print(f"  {name:<6} {stats['seconds']:>9.3f} 秒  {stats['events_per_second']:>10.1f} events/s  "
+              f"{stats['mb_per_second']:>8.2f} MB/s")
+
+    if not args.keep:
+        shutil.rmtree(data_path, ignore_errors=True)
+    return result
+
+
+def compare_baseline(results, baseline_path, tolerance):
+    """與先前的結果比較，回傳變慢超過容許比例的項目"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {entry['events']: entry for entry in json.load(f)['results']}
+
+    regressions = []
+    print(f"\n與基準比較（容許變慢 {tolerance:.0%}）: {baseline_path}")
+    for result in results:
+        previous = baseline.get(result['events'])
+        if not previous:
+            continue
+        for name in ('parse', 'dump'):
+            ratio = result[name]['events_per_second'] / previous[name]['events_per_second']
+            flag = '❌' if ratio < 1 - tolerance else '✅'
+            print(f"  {flag} {result['events']:>7} {name:<6} {ratio:>6.2f}x")
+            if ratio < 1 - tolerance:
+                regressions.append((result['events'], name, ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='解析器與端到端匯出的效能測試（合成資料）')
+    parser.add_argument('--sizes', default='100,10000,100000',
+                       help='事件數量，以逗號分隔 (預設: 100,10000,100000)')
+    parser.add_argument('--languages', default=','.join(LANGUAGE_TEXT),
+                       help=f"使用的語言 (預設: {','.join(LANGUAGE_TEXT)})")
+    parser.add_argument('--body-kb', type=int, default=2,
+                       help='每個事件的HTML內文大小 KB (預設: 2)')
+    parser.add_argument('--image-kb', type=int, default=0,
+                       help='內嵌圖片大小 KB (預設: 0)')
+    parser.add_argument('--days', type=int, default=14,
+                       help='事件分布與匯出的天數 (預設: 14)')
+    parser.add_argument('--recurring', type=int, default=0,
+                       help='每個大小額外加入的每日重複系列數（實例共用事件檔案，預設: 0）')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='端到端匯出使用的行程數 (預設: 1)')
+    parser.add_argument('--repeat', type=int, default=1,
+                       help='重複次數，取最佳值 (預設: 1)')
+    parser.add_argument('--check', type=int, default=1000,
+                       help='每個大小檢查解析結果的事件數 (預設: 1000)')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='亂數種子 (預設: 0)')
+    parser.add_argument('--work-dir', default=None,
+                       help='產生資料的目錄 (預設: 暫存目錄)')
+    parser.add_argument('--keep', action='store_true',
+                       help='保留產生的資料')
+    parser.add_argument('--json', default=None,
+                       help='將結果寫入JSON檔案')
+    parser.add_argument('--baseline', default=None,
+                       help='與先前 --json 的結果比較')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                       help='與基準比較時容許變慢的比例 (預設: 0.2)')
+    args = parser.parse_args()
+    args.languages = [lang.strip() for lang in args.languages.split(',') if lang.strip()]
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="outlook_bench_")
+    os.makedirs(work_dir, exist_ok=True)
+    print(f"資料目錄: {work_dir}")
+
+    try:
+        results = [run_size(args, events, work_dir) for events in sizes]
+    finally:
+        if not args.keep and not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        'python': sys.version.split()[0],
+        'platform': sys.platform,
+        'settings': {
+            'languages': args.languages,
+            'body_kb': args.body_kb,
+            'image_kb': args.image_kb,
+            'workers': args.workers,
+            'recurring': args.recurring,
+            'repeat': args.repeat,
+        },
+        'results': results,
+    }
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n結果已寫入 {args.json}")
+
+    failed = any(result['mismatches'] for result in results)
+    if args.baseline:
+        failed = bool(compare_baseline(results, args.baseline, args.tolerance)) or failed
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
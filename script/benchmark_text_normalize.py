@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+文字清理效能比較與一致性檢查
+比較舊版逐字元實作與 text_normalize 模組，並以中英文主題語料與隨機輸入驗證輸出完全相同
+"""
+
+import argparse
+import random
+import re
+import time
+
+import text_normalize
+
+SUBJECTS = [
+    "【Online】銷售預測第三階段成果分享",
+    "AWS Weekly Sync",
+    "Q3 review 會議\r\n（第二次）",
+    "Team standup\t- daily",
+    "Design review — API v2",
+    "產品規劃討論：2025 年度目標「OKR」",
+    "1:1 with manager",
+    "Amazon Chime: 1234567890",
+    "Microsoft Teams Meeting",
+    "台北101 35F 會議室《大》",
+    "  Interview   loop  ",
+    "客戶拜訪\x00\x01ȀȀȀ̀̀̀̀",
+    "Lunch & Learn: Python 3.12 新功能 Lin, Len",
+    "季度業務回顧 QBR ~~~###",
+    "Offsite planning 〈草案〉�",
+]
+
+
+# ---- 舊版實作（逐字元判斷、未編譯的正規表示式） ----
+
+def legacy_clean_text(text):
+    if not text:
+        return None
+    text = text.replace('�', '')
+    cleaned_chars = []
+    for char in text:
+        char_code = ord(char)
+        if (char_code >= 32 and char_code <= 126) or \
+           (char_code >= 0x4e00 and char_code <= 0x9fff) or \
+           (char_code >= 0x3400 and char_code <= 0x4dbf) or \
+           char in '，。！？；：「」『』（）【】《》〈〉' or \
+           char in ' \t':
+            cleaned_chars.append(char)
+    text = ''.join(cleaned_chars)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_clean_csv_text(text):
+    if not text:
+        return ""
+    text = re.sub(r'[\r\n]+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
+    return text.strip()
+
+
+def legacy_clean_trailing_garbage(text):
+    if not text:
+        return text
+    text = re.sub(r'[Ā-ſ̀-ͯ]{3,}$', '', text)
+    text = re.sub(r'[^\w\s一-鿿\[\]()（）【】""''.,!?;:：；，。！？-]{3,}$', '', text)
+    text = re.sub(r'Lin,\s*Len\s*$', '', text)
+    return text.strip()
+
+
+def legacy_decode_utf16_bytes(byte_array):
+    if len(byte_array) < 2:
+        return None
+    try:
+        decoded = byte_array.decode('utf-16le', errors='ignore')
+        cleaned_chars = []
+        for char in decoded:
+            if (char.isprintable() or
+                '一' <= char <= '鿿' or
+                '㐀' <= char <= '䶿'):
+                cleaned_chars.append(char)
+            elif char in ['\r', '\n', '\t']:
+                cleaned_chars.append(' ')
+            else:
+                break
+        result = ''.join(cleaned_chars).strip()
+        result = legacy_clean_trailing_garbage(result)
+        return result if len(result) >= 1 else None
+    except:
+        pass
+    return None
+
+
+PAIRS = [
+    ('clean_text', legacy_clean_text, text_normalize.clean_text, False),
+    ('clean_csv_text', legacy_clean_csv_text, text_normalize.clean_csv_text, False),
+    ('clean_trailing_garbage', legacy_clean_trailing_garbage, text_normalize.clean_trailing_garbage, False),
+    ('decode_utf16_bytes', legacy_decode_utf16_bytes, text_normalize.decode_utf16_bytes, True),
+]
+
+
+def random_inputs(count, seed=0):
+    """隨機組合中英文、全形標點、控制字符與組合字符"""
+    rng = random.Random(seed)
+    pool = (list(' \t\r\n\x0b\x0c\x1c\x1f\x00\x01\x7f\x85\x9f\xa0　�') +
+            list('abcLinLen,[]().-"\'!?') + list('會議中文測試㐀䶿鿿') +
+            list('，。！？；：「」『』（）【】《》〈〉') +
+            ['Ā', 'ſ', '̀', 'ͯ', '͸', '\U0001F600', '​', '﻿'])
+    for _ in range(count):
+        text = ''.join(rng.choice(pool) for _ in range(rng.randint(0, 30)))
+        if rng.random() < 0.1:
+            text += 'Lin, Len'
+        yield text
+
+
+def verify(count):
+    """舊版與新版輸出必須完全相同"""
+    inputs = SUBJECTS + list(random_inputs(count))
+    for name, legacy, new, takes_bytes in PAIRS:
+        for text in inputs:
+            value = text.encode('utf-16le', errors='surrogatepass') if takes_bytes else text
+            if legacy(value) != new(value):
+                raise AssertionError(f"{name} 輸出不一致: {value!r}: {legacy(value)!r} != {new(value)!r}")
+    print(f"一致性檢查通過: {len(inputs)} 筆輸入 x {len(PAIRS)} 個函式")
+
+
+def bench(func, values, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='文字清理效能比較與一致性檢查')
+    parser.add_argument('--copies', type=int, default=2000,
+                       help='主題語料重複次數 (預設: 2000)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='重複次數，取最佳值 (預設: 3)')
+    parser.add_argument('--verify', type=int, default=20000,
+                       help='隨機一致性檢查的輸入數量 (預設: 20000)')
+    args = parser.parse_args()
+
+    verify(args.verify)
+
+    corpus = SUBJECTS * args.copies
+    corpus_bytes = [text.encode('utf-16le') for text in corpus]
+    print(f"\n語料: {len(corpus)} 個主題")
+    print(f"{'函式':<24} {'舊版(秒)':>10} {'新版(秒)':>10} {'加速':>8}")
+    for name, legacy, new, takes_bytes in PAIRS:
+        values = corpus_bytes if takes_bytes else corpus
+        legacy_time = bench(legacy, values, args.repeat)
+        new_time = bench(new, values, args.repeat)
+        print(f"{name:<24} {legacy_time:>10.4f} {new_time:>10.4f} {legacy_time / new_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
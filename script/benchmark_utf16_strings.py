@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+UTF-16 字串掃描效能比較
+比較舊版逐字節 while 迴圈與 utf16_strings 正規表示式掃描器（100 KB ~ 5 MB）
+"""
+
+import argparse
+import random
+import re
+import time
+
+from utf16_strings import extract_raw_strings
+
+HTML_START_PATTERN = b'<\x00h\x00t\x00m\x00l\x00'
+HTML_END_PATTERN = b'<\x00/\x00h\x00t\x00m\x00l\x00>\x00'
+
+
+def legacy_clean_text(text):
+    """舊版 clean_text（逐字元判斷）"""
+    if not text:
+        return None
+    text = text.replace('�', '')
+    cleaned_chars = []
+    for char in text:
+        char_code = ord(char)
+        if (char_code >= 32 and char_code <= 126) or \
+           (char_code >= 0x4e00 and char_code <= 0x9fff) or \
+           (char_code >= 0x3400 and char_code <= 0x4dbf) or \
+           char in '，。！？；：「」『』（）【】《》〈〉' or \
+           char in ' \t':
+            cleaned_chars.append(char)
+    text = ''.join(cleaned_chars)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_raw_strings(data):
+    """舊版 parse_event_file 中的「方法1」與「方法2」迴圈"""
+    raw_strings = []
+
+    html_start = data.find(HTML_START_PATTERN)
+    if html_start != -1:
+        html_end = data.find(HTML_END_PATTERN, html_start)
+        if html_end != -1:
+            search_start = html_end + len(HTML_END_PATTERN)
+            while (search_start < len(data) and
+                   (data[search_start] == 0 or data[search_start] in [0x0d, 0x0a])):
+                search_start += 1
+
+            pos = search_start
+            while pos < len(data) - 4 and len(raw_strings) < 15:
+                if (pos < len(data) - 3 and
+                    data[pos] != 0 and data[pos+1] == 0 and
+                    data[pos+2] != 0 and data[pos+3] == 0):
+                    start = pos
+                    while (pos < len(data) - 1 and
+                           data[pos] != 0 and data[pos+1] == 0):
+                        pos += 2
+                    if pos - start >= 6:
+                        utf16_text = data[start:pos].decode('utf-16le', errors='ignore')
+                        cleaned_text = legacy_clean_text(utf16_text)
+                        if cleaned_text and len(cleaned_text) >= 3:
+                            raw_strings.append(cleaned_text)
+                    while pos < len(data) and data[pos] == 0:
+                        pos += 1
+                else:
+                    pos += 1
+
+    pos = 0
+    while pos < len(data) - 10 and len(raw_strings) < 20:
+        if (pos < len(data) - 9 and
+            data[pos] != 0 and data[pos+1] == 0 and
+            data[pos+2] != 0 and data[pos+3] == 0):
+            start = pos
+            current_pos = pos
+            valid_string = True
+            while current_pos < len(data) - 1:
+                if data[current_pos] == 0 and data[current_pos+1] == 0:
+                    break
+                elif data[current_pos+1] != 0:
+                    valid_string = False
+                    break
+                current_pos += 2
+
+            if valid_string and current_pos > start:
+                utf16_bytes = data[start:current_pos]
+                if len(utf16_bytes) % 2 == 0:
+                    utf16_text = utf16_bytes.decode('utf-16le', errors='replace')
+                    utf16_text = utf16_text.replace('�', '')
+                    utf16_text = ''.join(char for char in utf16_text if ord(char) >= 32 or char in '\n\r\t')
+                    cleaned_text = legacy_clean_text(utf16_text)
+                    if (cleaned_text and len(cleaned_text) >= 3 and
+                        not cleaned_text.startswith('http') and
+                        cleaned_text not in raw_strings):
+                        raw_strings.append(cleaned_text)
+
+            pos = current_pos + 2 if current_pos > start else pos + 2
+        else:
+            pos += 1
+
+    return raw_strings
+
+
+def new_raw_strings(data):
+    """新版掃描器（與 parse_event_file 的呼叫方式相同）"""
+    html_start = data.find(HTML_START_PATTERN)
+    html_end = data.find(HTML_END_PATTERN, html_start) if html_start != -1 else -1
+    return extract_raw_strings(data, html_end, len(HTML_END_PATTERN))
+
+
+def build_sample(size, seed=0):
+    """產生模擬的事件檔案：二進制雜訊 + 大量中文 HTML + 嵌入附件，候選字串位於檔案尾端"""
+    rng = random.Random(seed)
+    paragraph = '<p>會議議程 Agenda &amp; notes 第三階段成果分享</p>\r\n'.encode('utf-16le')
+    noise = bytes(rng.randrange(1, 256) for _ in range(4096))
+
+    chunks = [b'\x00' * 0x400]
+    body_size = 0
+    while body_size < size // 2:
+        chunks.append(paragraph)
+        body_size += len(paragraph)
+    html = HTML_START_PATTERN + b''.join(chunks[1:]) + HTML_END_PATTERN
+    attachment = (noise * (size // len(noise) + 1))[:size - len(html) - 0x400]
+    trailer = b'\r\x00' + 'Weekly Sync'.encode('utf-16le') + b'\x00\x00'
+    return chunks[0] + attachment + html + trailer
+
+
+def bench(func, data, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UTF-16 字串掃描效能比較')
+    parser.add_argument('--sizes', default='100K,1M,5M',
+                       help='測試檔案大小，以逗號分隔 (預設: 100K,1M,5M)')
+    parser.add_argument('--repeat', type=int, default=3,
+                       help='每個大小重複次數，取最佳值 (預設: 3)')
+    args = parser.parse_args()
+
+    units = {'K': 1024, 'M': 1024 * 1024}
+    print(f"{'大小':>8} {'舊版(秒)':>10} {'新版(秒)':>10} {'加速':>8}  結果一致")
+    for size_str in args.sizes.split(','):
+        size_str = size_str.strip().upper()
+        size = int(size_str[:-1]) * units[size_str[-1]] if size_str[-1] in units else int(size_str)
+        data = build_sample(size)
+
+        legacy_time, legacy_result = bench(legacy_raw_strings, data, args.repeat)
+        new_time, new_result = bench(new_raw_strings, data, args.repeat)
+        speedup = legacy_time / new_time if new_time else float('inf')
+        print(f"{size_str:>8} {legacy_time:>10.4f} {new_time:>10.4f} {speedup:>7.1f}x  {legacy_result == new_result}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Google Calendar 批次寫入
+將 insert/update/delete 請求累積起來，每 batch_size 個（上限 50）以一個 BatchHttpRequest 送出，
+取代每個事件一次的 HTTPS 往返。每個請求有自己的回呼（處理錯誤與更新快取）；
+因速率限制或伺服器錯誤失敗的子請求會以較小的批次退避重試，整批失敗時拆成兩半重試；
+請求可以指定 fallback，在特定錯誤時改送另一個請求（例如 insert 遇到 409 時改為 update）。
+指定 ApiExecutor 時，各批次在執行緒池中並行送出（受配額與自適應並行數限制），回呼仍在呼叫 flush 的執行緒中執行。
+"""
+
+import http.client
+import random
+import threading
+import time
+
+import httplib2
+
+# Google Calendar API 每個批次建議的上限
+MAX_BATCH_SIZE = 50
+
+# 可重試的 HTTP 狀態碼（速率限制與伺服器錯誤）
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# 403 只有在速率限制時才重試
+RATE_LIMIT_REASONS = (b'ratelimitexceeded', b'userratelimitexceeded')
+
+# 沒有HTTP回應時可重試的傳輸層錯誤（連線中斷、逾時、SSL錯誤等 OSError 的子類別，以及 httplib2 的錯誤）
+TRANSPORT_ERRORS = (OSError, http.client.HTTPException, httplib2.HttpLib2Error)
+
+
+def http_status(exception):
+    """HttpError 的狀態碼（沒有HTTP回應時回傳 None）"""
+    status = getattr(getattr(exception, 'resp', None), 'status', None)
+    return int(status) if status is not None else None
+
+
+def is_rate_limited(exception):
+    """是否為速率限制回應（429，或原因為 rateLimitExceeded 的 403）"""
+    status = http_status(exception)
+    if status == 429:
+        return True
+    if status == 403:
+        content = getattr(exception, 'content', b'') or b''
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'replace')
+        return any(reason in content.lower() for reason in RATE_LIMIT_REASONS)
+    return False
+
+
+def is_retryable_error(exception):
+    """判斷子請求的錯誤是否值得重試"""
+    status = http_status(exception)
+    if status is None:
+        # 沒有HTTP回應：只重試傳輸層錯誤，程式錯誤（TypeError、KeyError 等）直接回報
+        return isinstance(exception, TRANSPORT_ERRORS)
+    return status in RETRYABLE_STATUS or is_rate_limited(exception)
+
+
+class PendingWrite:
+    """排隊中的寫入請求"""
+
+    __slots__ = ('request', 'callback', 'key', 'fallback', 'attempts')
+
+    def __init__(self, request, callback, key, fallback):
+        self.request = request
+        self.callback = callback
+        self.key = key
+        self.fallback = fallback
+        self.attempts = 0
+
+
+class CalendarWriteBatcher:
+    """Google Calendar 寫入請求的批次器
+
+    add() 排入尚未執行的 HttpRequest（例如 service.events().update(...)），
+    累積到 batch_size（有執行層時為 batch_size × 並行數）時自動送出；callback(response, exception) 在請求完成或最終失敗時呼叫。
+    fallback(exception) 回傳替代的請求時，改送該請求（不計入重試次數，也不退避）。
+    batch_size 為 1 時不使用批次，直接逐一執行。
+    """
+
+    def __init__(self, service, batch_size=MAX_BATCH_SIZE, max_retries=5, backoff=1.0, executor=None):
+        self.service = service
+        self.executor = executor
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pending = []
+        self.pending_keys = set()
+        self.stats = {'requests': 0, 'batches': 0, 'retries': 0, 'fallbacks': 0, 'failed': 0}
+        self.stats_lock = threading.Lock()
+        self._backoff_needed = False
+
+    def __len__(self):
+        return len(self.pending)
+
+    def has_pending(self, key):
+        """是否有尚未送出的相同鍵（例如同一個UID）的寫入"""
+        return key in self.pending_keys
+
+    def add(self, request, callback=None, key=None, fallback=None):
+        """排入一個寫入請求，累積到 batch_size 時送出"""
+        self.pending.append(PendingWrite(request, callback, key, fallback))
+        if key is not None:
+            self.pending_keys.add(key)
+        self.stats['requests'] += 1
+        if len(self.pending) >= self.batch_size * self.parallel_batches():
+            self.flush()
+
+    def parallel_batches(self):
+        """一次 flush 累積的批次數：有執行層時等於目前的並行數，讓多個批次同時送出"""
+        return self.executor.concurrency.limit if self.executor is not None else 1
+
+    def flush(self):
+        """送出所有排隊中的請求（包含重試），完成後才回傳"""
+        writes, self.pending = self.pending, []
+        self.pending_keys = set()
+        batch_size = self.batch_size
+        attempt = 0
+        while writes:
+            retry = []
+            self._backoff_needed = False
+            chunks = [writes[index:index + batch_size] for index in range(0, len(writes), batch_size)]
+            # 回呼依請求順序在目前的執行緒中執行（不需要為快取加鎖）
+            for write, response, exception in self._send_all(chunks):
+                if exception is not None:
+                    self._failed(write, exception, retry)
+                else:
+                    self._finish(write, response, None)
+            if not retry:
+                break
+            if self._backoff_needed:
+                # 重試時縮小批次並以隨機抖動的指數退避等待，降低再次觸發速率限制的機率
+                batch_size = max(1, batch_size // 2)
+                time.sleep(random.uniform(0, self.backoff * (2 ** attempt)))
+                attempt += 1
+            writes = retry
+
+    def _send_all(self, chunks):
+        """送出各批次（有執行層時並行），依原順序回傳 [(請求, 回應, 錯誤), ...]"""
+        if self.executor is None:
+            return [result for chunk in chunks for result in self._send(None, chunk)]
+        futures = [self.executor.submit(self._send, chunk) for chunk in chunks]
+        return [result for future in futures for result in future.result()]
+
+    def _finish(self, write, response, exception):
+        if exception is not None:
+            self.stats['failed'] += 1
+        if write.callback:
+            write.callback(response, exception)
+
+    def _failed(self, write, exception, retry):
+        """子請求失敗：有替代請求時改送，可重試且未超過次數時排入重試，否則回報錯誤"""
+        if write.fallback is not None:
+            request = write.fallback(exception)
+            if request is not None:
+                write.request = request
+                write.fallback = None
+                self.stats['fallbacks'] += 1
+                retry.append(write)
+                return
+        write.attempts += 1
+        if is_retryable_error(exception) and write.attempts <= self.max_retries:
+            self.stats['retries'] += 1
+            self._backoff_needed = True
+            retry.append(write)
+        else:
+            self._finish(write, None, exception)
+
+    def _send(self, http, writes, throttled=False):
+        """送出一組請求（在執行層的執行緒中執行），回傳 [(請求, 回應, 錯誤), ...]
+
+        throttled 為 True 時表示配額已在上層扣除（整批失敗後拆半重送時不重複扣除）。
+        """
+        if self.executor is not None and not throttled:
+            self.executor.throttle(len(writes), write=True)
+        results = []
+        if len(writes) == 1 or self.batch_size == 1:
+            for write in writes:
+                try:
+                    results.append((write, write.request.execute(http=http), None))
+                except Exception as e:
+                    results.append((write, None, e))
+        else:
+            collected = {}
+
+            def on_response(request_id, response, exception):
+                collected[int(request_id)] = (response, exception)
+
+            batch = self.service.new_batch_http_request(callback=on_response)
+            for index, write in enumerate(writes):
+                batch.add(write.request, request_id=str(index))
+            try:
+                batch.execute(http=http)
+            except Exception as e:
+                # 整個批次失敗（例如連線中斷）：拆成兩半各自重試
+                # （拆到單一請求時逐一執行，依各自的錯誤決定是否重試）
+                print(f"⚠️ 批次請求失敗，拆成較小的批次重試: {e}")
+                # 傳輸失敗也視為壅塞訊號，讓自適應並行數降低
+                if self.executor is not None:
+                    self.executor.record(True, count=len(writes))
+                middle = len(writes) // 2
+                return (self._send(http, writes[:middle], throttled=True) +
+                        self._send(http, writes[middle:], throttled=True))
+            with self.stats_lock:
+                self.stats['batches'] += 1
+            results = [(write, *collected.get(index, (None, httplib2.HttpLib2Error('批次回應中沒有此請求'))))
+                       for index, write in enumerate(writes)]
+
+        if self.executor is not None:
+            self.executor.record(any(error is not None and is_rate_limited(error) for _, _, error in results),
+                                 count=len(writes))
+        return results
+
+    def report(self):
+        """批次寫入的統計摘要"""
+        stats = self.stats
+        return (f"批次寫入: {stats['requests']} 個請求，{stats['batches']} 個批次，"
+                f"重試 {stats['retries']} 次，改送替代請求 {stats['fallbacks']} 個，失敗 {stats['failed']} 個")
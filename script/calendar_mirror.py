@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+CalendarEvents 本機鏡像
+無法在 Outlook 的 Outlook.sqlite 建立索引，因此將 CalendarEvents 複製到本機 SQLite，
+依 Record_ModDate 增量更新，並在 Calendar_StartDateUTC、Calendar_UID、Record_ModDate 建立索引。
+解析結果與原始欄位存放在同一列（提供與 ParseCache 相同的 get/put 介面），
+從 Outlook 刪除的事件保留為墓碑，供同步器的刪除檢測查詢。
+"""
+
+import sqlite3
+import time
+from datetime import datetime, timezone, timedelta
+
+# 鏡像保存的解析欄位（與 ParseCache 相同）
+PARSED_FIELDS = ('subject', 'location', 'organizer', 'body', 'duration')
+
+# 以 IN (...) 查詢時每批的參數數量（低於 SQLite 的參數上限）
+QUERY_BATCH_SIZE = 500
+
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+
+def minutes_to_datetime(minutes):
+    """從 1601-01-01 UTC 開始的分鐘數轉為 UTC datetime"""
+    if minutes is None:
+        return None
+    return FILETIME_EPOCH + timedelta(minutes=minutes)
+
+
+class CalendarMirror:
+    """CalendarEvents 的本機索引鏡像（同時作為解析結果快取）"""
+
+    def __init__(self, mirror_path="data/calendar_mirror.sqlite", tombstone_days=30):
+        self.mirror_path = mirror_path
+        self.tombstone_days = tombstone_days
+        self.conn = None
+        self.hits = 0
+        self.misses = 0
+        self.last_refresh = None
+
+    def open(self):
+        """開啟（或建立）鏡像資料庫，失敗時回傳 False"""
+        try:
+            # 同步管線在解析執行緒中使用鏡像（同一時間只有一個執行緒存取）
+            self.conn = sqlite3.connect(self.mirror_path, check_same_thread=False)
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS calendar_events (
+                    Record_RecordID INTEGER PRIMARY KEY,
+                    Calendar_StartDateUTC INTEGER,
+                    Calendar_EndDateUTC INTEGER,
+                    PathToDataFile TEXT,
+                    Calendar_UID TEXT,
+                    Record_ModDate INTEGER,
+                    deleted_at REAL,
+                    file_size INTEGER,
+                    file_mtime REAL,
+                    parse_variant TEXT,
+                    subject TEXT,
+                    location TEXT,
+                    organizer TEXT,
+                    body TEXT,
+                    duration REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_mirror_start ON calendar_events (Calendar_StartDateUTC);
+                CREATE INDEX IF NOT EXISTS idx_mirror_uid ON calendar_events (Calendar_UID);
+                CREATE INDEX IF NOT EXISTS idx_mirror_mod_date ON calendar_events (Record_ModDate);
+                CREATE INDEX IF NOT EXISTS idx_mirror_path ON calendar_events (PathToDataFile, Record_ModDate);
+                CREATE TABLE IF NOT EXISTS mirror_state (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+            """)
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"無法開啟本機鏡像 {self.mirror_path}: {e}")
+            self.conn = None
+            return False
+
+    def _get_state(self, key):
+        row = self.conn.execute("SELECT value FROM mirror_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO mirror_state (key, value) VALUES (?, ?)",
+                          (key, None if value is None else str(value)))
+
+    def _upsert(self, rows):
+        return self.conn.executemany("""
+            INSERT INTO calendar_events
+                (Record_RecordID, Calendar_StartDateUTC, Calendar_EndDateUTC, PathToDataFile,
+                 Calendar_UID, Record_ModDate, deleted_at)
+            VALUES (?, ?, ?, ?, ?, ?, NULL)
+            ON CONFLICT(Record_RecordID) DO UPDATE SET
+                Calendar_StartDateUTC = excluded.Calendar_StartDateUTC,
+                Calendar_EndDateUTC = excluded.Calendar_EndDateUTC,
+                PathToDataFile = excluded.PathToDataFile,
+                Calendar_UID = excluded.Calendar_UID,
+                Record_ModDate = excluded.Record_ModDate,
+                deleted_at = NULL,
+                -- 事件變更後解析結果失效
+                parse_variant = CASE
+                    WHEN calendar_events.Record_ModDate IS excluded.Record_ModDate
+                         AND calendar_events.PathToDataFile IS excluded.PathToDataFile
+                    THEN calendar_events.parse_variant
+                END
+        """, rows).rowcount
+
+    def refresh(self, snapshot, source_path=None):
+        """從 Outlook 的 CalendarEvents 增量更新鏡像，回傳統計 dict
+
+        只讀取 Record_ModDate 達到水位線（或為空）的列，以及鏡像中還沒有的列；
+        rowid 的差集用來偵測刪除的事件（標記為墓碑）。
+        """
+        started = time.perf_counter()
+        conn = self.conn
+
+        # 來源資料庫不同時重新建立鏡像
+        if source_path is not None and self._get_state('source_path') != source_path:
+            conn.execute("DELETE FROM calendar_events")
+            conn.execute("DELETE FROM mirror_state")
+            self._set_state('source_path', source_path)
+
+        watermark = self._get_state('watermark')
+        watermark = int(watermark) if watermark is not None else None
+
+        # 所有 Outlook rowid（只掃描主鍵）
+        conn.execute("CREATE TEMP TABLE IF NOT EXISTS outlook_ids (id INTEGER PRIMARY KEY)")
+        conn.execute("DELETE FROM temp.outlook_ids")
+        conn.executemany("INSERT INTO temp.outlook_ids (id) VALUES (?)",
+                         snapshot.execute("SELECT rowid FROM CalendarEvents"))
+
+        now = time.time()
+        deleted = conn.execute("""
+            UPDATE calendar_events SET deleted_at = ?
+            WHERE deleted_at IS NULL AND Record_RecordID NOT IN (SELECT id FROM temp.outlook_ids)
+        """, (now,)).rowcount
+
+        select = """
+            SELECT rowid, Calendar_StartDateUTC, Calendar_EndDateUTC, PathToDataFile,
+                   Calendar_UID, Record_ModDate
+            FROM CalendarEvents
+        """
+        if watermark is None:
+            changed = snapshot.execute(select).fetchall()
+        else:
+            # 同一秒內的修改可能在上次更新之後才寫入，因此包含等於水位線的列
+            changed = snapshot.execute(select + " WHERE Record_ModDate >= ? OR Record_ModDate IS NULL",
+                                       (watermark,)).fetchall()
+            changed_ids = {row[0] for row in changed}
+            missing = [row[0] for row in conn.execute("""
+                SELECT id FROM temp.outlook_ids
+                WHERE id NOT IN (SELECT Record_RecordID FROM calendar_events WHERE deleted_at IS NULL)
+            """) if row[0] not in changed_ids]
+            for index in range(0, len(missing), QUERY_BATCH_SIZE):
+                batch = missing[index:index + QUERY_BATCH_SIZE]
+                changed += snapshot.execute(select + f" WHERE rowid IN ({','.join('?' * len(batch))})",
+                                            batch).fetchall()
+
+        self._upsert(changed)
+        mod_dates = [row[5] for row in changed if row[5] is not None]
+        # 水位線只會前進
+        if mod_dates:
+            watermark = max(mod_dates + ([watermark] if watermark is not None else []))
+        self._set_state('watermark', watermark)
+        self._set_state('refreshed_at', now)
+
+        purged = conn.execute("DELETE FROM calendar_events WHERE deleted_at < ?",
+                              (now - self.tombstone_days * 24 * 3600,)).rowcount
+        conn.commit()
+
+        total = conn.execute("SELECT COUNT(*) FROM calendar_events WHERE deleted_at IS NULL").fetchone()[0]
+        self.last_refresh = {
+            'upserted': len(changed),
+            'deleted': deleted,
+            'purged': purged,
+            'total': total,
+            'watermark': watermark,
+            'seconds': time.perf_counter() - started,
+        }
+        return self.last_refresh
+
+    def report(self):
+        """最近一次更新的摘要"""
+        stats = self.last_refresh
+        if not stats:
+            return "本機鏡像尚未更新"
+        return (f"本機鏡像: 更新 {stats['upserted']} 列，刪除 {stats['deleted']} 列，"
+                f"共 {stats['total']} 個事件 ({stats['seconds']:.3f} 秒)")
+
+    def query_window(self, start_minutes, end_minutes):
+        """以索引查詢時間範圍內的事件，欄位順序與 Outlook 查詢相同"""
+        return self.conn.execute("""
+            SELECT Calendar_StartDateUTC, Calendar_EndDateUTC, PathToDataFile,
+                   Calendar_UID, Record_ModDate
+            FROM calendar_events
+            WHERE Calendar_StartDateUTC >= ? AND Calendar_StartDateUTC <= ? AND deleted_at IS NULL
+            ORDER BY Calendar_StartDateUTC, Record_RecordID
+        """, (start_minutes, end_minutes))
+
+    def lookup_uids(self, uids):
+        """查詢UID在鏡像中的狀態，回傳 {UID: (開始時間UTC, 是否已從Outlook刪除)}
+
+        同一個UID有多列時，只要有一列仍存在就視為未刪除；鏡像中沒有的UID不會出現在結果中。
+        """
+        states = {}
+        uids = list(uids)
+        for index in range(0, len(uids), QUERY_BATCH_SIZE):
+            batch = uids[index:index + QUERY_BATCH_SIZE]
+            rows = self.conn.execute(f"""
+                SELECT Calendar_UID, Calendar_StartDateUTC, deleted_at IS NOT NULL
+                FROM calendar_events
+                WHERE Calendar_UID IN ({','.join('?' * len(batch))})
+                ORDER BY deleted_at IS NULL, Calendar_StartDateUTC
+            """, batch)
+            # 未刪除的列排在後面，會覆寫已刪除的列
+            for uid, start_minutes, deleted in rows:
+                states[uid] = (minutes_to_datetime(start_minutes), bool(deleted))
+        return states
+
+    def get(self, path, record_mod_date, file_size, file_mtime, variant=""):
+        """查詢鏡像中的解析結果（介面與 ParseCache.get 相同）"""
+        if not self.conn:
+            return None
+
+        row = self.conn.execute("""
+            SELECT subject, location, organizer, body, duration
+            FROM calendar_events
+            WHERE PathToDataFile = ? AND Record_ModDate IS ? AND file_size = ? AND file_mtime = ?
+                  AND parse_variant = ?
+            LIMIT 1
+        """, (path, record_mod_date, file_size, file_mtime, variant)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return dict(zip(PARSED_FIELDS, row))
+
+    def put(self, path, record_mod_date, file_size, file_mtime, event_data, variant=""):
+        """將解析結果寫入共用此事件檔案的所有列（介面與 ParseCache.put 相同）"""
+        if not self.conn:
+            return
+
+        self.conn.execute("""
+            UPDATE calendar_events
+            SET file_size = ?, file_mtime = ?, parse_variant = ?,
+                subject = ?, location = ?, organizer = ?, body = ?, duration = ?
+            WHERE PathToDataFile = ? AND Record_ModDate IS ?
+        """, (file_size, file_mtime, variant, *(event_data.get(field) for field in PARSED_FIELDS),
+              path, record_mod_date))
+
+    def flush(self):
+        """提交解析結果（保持資料庫開啟，供監看模式重複使用）"""
+        if not self.conn:
+            return
+        try:
+            self.conn.commit()
+        except Exception as e:
+            print(f"更新本機鏡像失敗: {e}")
+
+    def close(self):
+        if not self.conn:
+            return
+        try:
+            self.conn.commit()
+        except Exception as e:
+            print(f"更新本機鏡像失敗: {e}")
+        finally:
+            self.conn.close()
+            self.conn = None
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+事件內容雜湊
+只涵蓋會同步到 Google Calendar 的欄位（主題、地點、組織者、UTC開始/結束時間、正規化後的內文）。
+Outlook 會因為已讀狀態、分類、提醒等變更更新 Record_ModDate，
+同步器比對雜湊值即可略過這些不影響同步內容的變更。
+"""
+
+import hashlib
+
+# 雜湊版本：計算方式改變時遞增，舊的雜湊值自然失效
+CONTENT_HASH_VERSION = 1
+
+# 欄位之間的分隔符（不會出現在清理後的文字中）
+_SEPARATOR = '\x1f'
+
+
+def normalize_text(text):
+    """合併空白並去除首尾空白（CSV與型別化格式的內文換行方式不同，正規化後一致）"""
+    if not text:
+        return ''
+    return ' '.join(str(text).split())
+
+
+def _timestamp(dt):
+    """UTC時間轉為整數秒（沒有時間時為空字串）"""
+    if dt is None:
+        return ''
+    return str(int(dt.timestamp()))
+
+
+def compute_content_hash(subject, location, organizer, start_utc, end_utc, body):
+    """計算同步欄位的內容雜湊（SHA-1 十六進位字串）"""
+    parts = (
+        f"v{CONTENT_HASH_VERSION}",
+        normalize_text(subject),
+        normalize_text(location),
+        normalize_text(organizer),
+        _timestamp(start_utc),
+        _timestamp(end_utc),
+        normalize_text(body),
+    )
+    return hashlib.sha1(_SEPARATOR.join(parts).encode('utf-8')).hexdigest()
+
+
+def event_content_hash(event):
+    """依解析後的 event_data 計算內容雜湊"""
+    return compute_content_hash(event.get('subject'), event.get('location'), event.get('organizer'),
+                                event.get('start_time_utc'), event.get('end_time_utc'), event.get('body'))
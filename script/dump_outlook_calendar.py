@@ -4,23 +4,223 @@
 包含Calendar_UID和Record_ModDate欄位，修正CSV格式問題
 """
 
-import sqlite3
 import csv
 import sys
 import os
+import io
+import json
+import contextlib
+import itertools
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-import struct
 import re
-from html import unescape
+from array import array
 import argparse
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import text_normalize
+import html_body
+from utf16_strings import extract_raw_strings
+import olk_protocol
+from content_hash import event_content_hash
+from parse_cache import ParseCache
+from outlook_watcher import OutlookDatabaseWatcher
+from outlook_snapshot import OutlookSnapshot
+from calendar_mirror import CalendarMirror
+import event_formats
+from run_profile import RunProfiler
+
+# </html> 與 <html 的UTF-16 LE編碼
+HTML_START_PATTERN = b'<\x00h\x00t\x00m\x00l\x00'
+HTML_END_PATTERN = b'<\x00/\x00h\x00t\x00m\x00l\x00>\x00'
+
+# 檔案內時間戳候選值範圍（從1601-01-01 UTC開始的分鐘數）
+TIMESTAMP_MIN_MINUTES = 220000000
+TIMESTAMP_MAX_MINUTES = 230000000
+
+class OlkEventFile:
+    """單一.olk15Event檔案的解析狀態：每個事件只讀取並索引一次，所有提取器共用"""
+    
+    def __init__(self, file_path, data):
+        self.file_path = file_path
+        self.data = data
+        
+        # HTML區段位置（只搜尋一次）
+        self.html_start = data.find(HTML_START_PATTERN)
+        first_html_end = data.find(HTML_END_PATTERN)
+        self.first_html_end = first_html_end
+        if self.html_start == -1:
+            self.html_end = -1
+        elif first_html_end == -1 or first_html_end >= self.html_start:
+            self.html_end = first_html_end
+        else:
+            self.html_end = data.find(HTML_END_PATTERN, self.html_start)
+        
+        self._eq_pos = None
+        self._property_table = None
+        self._raw_strings = None
+        self._html_content = None
+        self._html_decoded = False
+        
+        # 二進制協議欄位（由parser填入）
+        self.protocol_decoded = False
+        self.marker_pos = None
+        self.subject_length = None
+        self.location_length = None
+        self.subject = None
+        self.location = None
+    
+    @classmethod
+    def from_path(cls, file_path):
+        """讀取檔案並建立解析物件"""
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        return cls(file_path, data)
+    
+    @property
+    def eq_pos(self):
+        """== 分隔符位置（僅在沒有</html>時才需要）"""
+        if self._eq_pos is None:
+            self._eq_pos = self.data.find(b'\x3d\x3d')
+        return self._eq_pos
+    
+    @property
+    def subject_start(self):
+        """Subject開始位置：</html>標籤後 + 回車符(0d 00)，或 == 分隔符之後"""
+        if self.first_html_end != -1:
+            return self.first_html_end + len(HTML_END_PATTERN) + 2
+        if self.eq_pos != -1:
+            return self.eq_pos + 2
+        return None
+    
+    @property
+    def property_table(self):
+        """檔頭屬性標頭的索引表（只掃描一次）"""
+        if self._property_table is None:
+            self._property_table = olk_protocol.PropertyTable(self.data)
+        return self._property_table
+    
+    @property
+    def html_span_end(self):
+        """HTML區段結束位置（包含</html>），沒有完整HTML區段時為 -1"""
+        if self.html_start == -1 or self.html_end == -1:
+            return -1
+        return self.html_end + len(HTML_END_PATTERN)
+    
+    @property
+    def raw_strings(self):
+        """</html>之後的UTF-16字串（主題/地點的回退來源）"""
+        if self._raw_strings is None:
+            self._raw_strings = extract_raw_strings(self.data, self.html_end, len(HTML_END_PATTERN))
+        return self._raw_strings
+    
+    @property
+    def html_bytes(self):
+        """<html>...</html> 區段的原始UTF-16字節（不複製、不解碼）"""
+        if self.html_start == -1 or self.html_end == -1:
+            return None
+        return memoryview(self.data)[self.html_start:self.html_end + len(HTML_END_PATTERN)]
+    
+    @property
+    def html_content(self):
+        """<html>...</html> 區段的UTF-16解碼結果"""
+        if not self._html_decoded:
+            self._html_decoded = True
+            if self.html_start != -1 and self.html_end != -1:
+                html_bytes = self.data[self.html_start:self.html_end + len(HTML_END_PATTERN)]
+                try:
+                    html_content = html_bytes.decode('utf-16le', errors='ignore')
+                    if '</html>' in html_content:
+                        end_pos = html_content.find('</html>') + 7
+                        html_content = html_content[:end_pos]
+                    self._html_content = html_content
+                except:
+                    pass
+        return self._html_content
+
+# CSV輸出欄位（包含Calendar_UID和Record_ModDate）
+CSV_FIELDNAMES = [
+    'Calendar_UID', 'Record_ModDate', 'Subject', 'Location', 'Organizer', 
+    'Duration', 'Starts', 'Ends', 'Starts_UTC', 'Ends_UTC', 'Body', 'PathToDataFile',
+    'Content_Hash'
+]
+
+# 串流匯出時每寫入多少列就flush一次
+CSV_FLUSH_INTERVAL = 50
+
+# 同一次執行中保留的事件檔案解析結果數量（週期性事件的多個實例共用同一個事件檔案）
+SHARED_FILE_MEMO_SIZE = 4096
+
+# annotate 標記：事件檔案已在本次執行中出現過，重用先前的解析結果
+_SHARED_FILE = object()
+
+# 輸出欄位需要從事件檔案提取的 event_data 欄位（未列出的欄位只來自資料庫）
+COLUMN_EVENT_FIELDS = {
+    'Subject': ('subject',),
+    'Location': ('location',),
+    'Organizer': ('organizer',),
+    'Duration': ('duration',),
+    'Body': ('body',),
+    # 內容雜湊涵蓋所有同步到 Google Calendar 的欄位
+    'Content_Hash': ('subject', 'location', 'organizer', 'body'),
+}
+
+# 事件檔案欄位提取器（依註冊順序執行）：(產生的 event_data 欄位, 方法名稱)
+FIELD_EXTRACTORS = []
+
+def field_extractor(*fields):
+    """註冊事件檔案欄位提取器"""
+    def register(method):
+        FIELD_EXTRACTORS.append((fields, method.__name__))
+        return method
+    return register
+
 class CompleteFixedTimeZoneOutlookParser:
-    def __init__(self, user_timezone='UTC+8'):
-        self.outlook_data_path = os.path.expanduser("~/Library/Group Containers/UBF8T346G9.Office/Outlook/Outlook 15 Profiles/Main Profile/Data")
+    def __init__(self, user_timezone='UTC+8', scan_file_timestamps=True, workers=1, parse_cache=None,
+                 outlook_data_path=None, snapshot_copy=False, busy_retries=5,
+                 include_body=True, max_body_chars=None, fields=None, profiler=None, quiet=False,
+                 mirror=None):
+        self.outlook_data_path = outlook_data_path or os.path.expanduser("~/Library/Group Containers/UBF8T346G9.Office/Outlook/Outlook 15 Profiles/Main Profile/Data")
         self.db_path = os.path.join(self.outlook_data_path, "Outlook.sqlite")
         self.user_timezone = self.parse_timezone(user_timezone)
+        self.scan_file_timestamps = scan_file_timestamps
+        self.workers = workers
+        self.parse_cache = parse_cache
+        self.snapshot_copy = snapshot_copy
+        self.busy_retries = busy_retries
+        self.include_body = include_body
+        self.max_body_chars = max_body_chars
+        
+        # CalendarEvents 的本機索引鏡像：時間範圍查詢改由鏡像回答
+        self.mirror = mirror
+        
+        # 分階段計時（未啟用時為空操作）與安靜模式（不列印每個事件的處理過程）
+        self.profiler = profiler or RunProfiler(enabled=False)
+        self.quiet = quiet
         
+        # 欄位投影：只計算輸出需要的欄位（每次執行只解析一次計畫）
+        self.fields = tuple(fields or CSV_FIELDNAMES)
+        self.extractors = self.resolve_extraction_plan(self.fields)
+        
+    def __getstate__(self):
+        # 傳給子行程時不包含解析快取與鏡像（SQLite連線無法序列化，只在主行程使用）
+        state = self.__dict__.copy()
+        state['parse_cache'] = None
+        state['mirror'] = None
+        return state
+    
+    def log(self, message='', end='\n'):
+        """每個事件的處理訊息（安靜模式下不列印）"""
+        if not self.quiet:
+            print(message, end=end)
+    
     def parse_timezone(self, tz_string):
         """解析時區字串"""
         if tz_string.upper() == 'UTC':
@@ -81,49 +281,18 @@ class CompleteFixedTimeZoneOutlookParser:
     
     def clean_text(self, text):
         """清理文字，移除控制字符，特別處理中文字符"""
-        if not text:
-            return None
-        
-        # 移除UTF-16解碼產生的替換字符
-        text = text.replace('\ufffd', '')
-        
-        # 移除控制字符，但保留中文字符
-        # 保留基本拉丁字符、中文字符、標點符號等
-        cleaned_chars = []
-        for char in text:
-            char_code = ord(char)
-            # 保留可見字符和中文字符
-            if (char_code >= 32 and char_code <= 126) or \
-               (char_code >= 0x4e00 and char_code <= 0x9fff) or \
-               (char_code >= 0x3400 and char_code <= 0x4dbf) or \
-               char in '，。！？；：「」『』（）【】《》〈〉' or \
-               char in ' \t':
-                cleaned_chars.append(char)
-        
-        text = ''.join(cleaned_chars)
-        
-        # 移除多餘空白
-        text = re.sub(r'\s+', ' ', text)
-        return text.strip()
+        return text_normalize.clean_text(text)
     
     def clean_csv_text(self, text):
         """清理CSV文字，移除換行符和特殊字符"""
-        if not text:
-            return ""
-        # 移除換行符和回車符
-        text = re.sub(r'[\r\n]+', ' ', text)
-        # 移除多餘空白
-        text = re.sub(r'\s+', ' ', text)
-        # 移除控制字符
-        text = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', text)
-        return text.strip()
-    
-    def extract_subject_smart(self, raw_strings, html_content=None, body_content=None, file_path=None):
+        return text_normalize.clean_csv_text(text)
+    
+    def extract_subject_smart(self, raw_strings, html_content=None, body_content=None, event_file=None):
         """智能提取主題（基於二進制協議的通用方法）"""
         
         # 方法1: 直接從二進制文件協議中提取（最準確的方法）
-        if file_path:
-            binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(file_path)
+        if event_file:
+            binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(event_file)
             if binary_subject:
                 return binary_subject
         
@@ -150,116 +319,88 @@ class CompleteFixedTimeZoneOutlookParser:
         
         return None
     
-    def extract_subject_and_location_from_binary_protocol(self, file_path):
-        """基於.olk15Event二進制協議提取Subject和Location（純協議方法）"""
+    def extract_subject_and_location_from_binary_protocol(self, event_file):
+        """基於.olk15Event二進制協議提取Subject和Location（純協議方法）
+        
+        結果會快取在event_file上，重複呼叫不會再次掃描檔案。
+        """
+        if event_file.protocol_decoded:
+            return event_file.subject, event_file.location
+        event_file.protocol_decoded = True
+        
         try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
+            data = event_file.data
             
             # 使用標記字節方法查找長度字段
-            subject_length, location_length = self.find_field_lengths(data)
+            subject_length, location_length = self.find_field_lengths(event_file)
             
             if subject_length is None or location_length is None:
-                print("未找到長度字段，無法解析")
+                self.log("未找到長度字段，無法解析")
                 return None, None
             
-            # 方法1: 查找</html>標籤的UTF-16編碼
-            html_end_pattern = b'\x3c\x00\x2f\x00\x68\x00\x74\x00\x6d\x00\x6c\x00\x3e\x00'
-            html_end_pos = data.find(html_end_pattern)
+            subject_start = event_file.subject_start
+            if subject_start is None:
+                self.log("未找到HTML標籤或分隔符，無法確定起始位置")
+                return None, None
             
-            if html_end_pos != -1:
+            if event_file.first_html_end != -1:
                 # 標準方法：</html>標籤後 + 回車符(0d 00)
-                subject_start = html_end_pos + len(html_end_pattern) + 2
-                print(f"使用</html>標籤方法，Subject開始位置: 0x{subject_start:x}")
+                self.log(f"使用</html>標籤方法，Subject開始位置: 0x{subject_start:x}")
             else:
-                # 方法2: 查找 == 分隔符模式（用於某些特殊事件）
-                eq_pattern = b'\x3d\x3d'  # ==
-                eq_pos = data.find(eq_pattern)
-                
-                if eq_pos != -1:
-                    # 在==之後查找UTF-16字符的開始
-                    subject_start = eq_pos + 2
-                    print(f"使用==分隔符方法，Subject開始位置: 0x{subject_start:x}")
-                else:
-                    print("未找到HTML標籤或分隔符，無法確定起始位置")
-                    return None, None
+                # 查找 == 分隔符模式（用於某些特殊事件）
+                self.log(f"使用==分隔符方法，Subject開始位置: 0x{subject_start:x}")
             
             if subject_start >= len(data):
                 return None, None
             
-            # 使用長度字段精確提取Subject
-            subject = None
-            if subject_length > 0 and subject_start + subject_length <= len(data):
-                subject_bytes = data[subject_start:subject_start + subject_length]
-                subject = self.decode_utf16_bytes(subject_bytes)
+            # 依屬性表的長度切出Subject與Location（值依標頭順序連續存放）
+            values = event_file.property_table.string_values(event_file.marker_pos, subject_start)
+            subject_bytes = values.get(olk_protocol.SUBJECT_TAG)
+            subject = self.decode_utf16_bytes(subject_bytes) if subject_bytes else None
             
-            # 使用長度字段精確提取Location
             location = None
-            if location_length > 0:
-                location_start = subject_start + subject_length
-                if location_start + location_length <= len(data):
-                    location_bytes = data[location_start:location_start + location_length]
-                    location = self.decode_utf16_bytes(location_bytes)
-            else:
+            if location_length == 0:
                 location = ""  # 長度為0表示空Location
+            elif values.get(olk_protocol.LOCATION_TAG):
+                location = self.decode_utf16_bytes(values[olk_protocol.LOCATION_TAG])
             
+            event_file.subject = subject
+            event_file.location = location
             return subject, location
             
         except Exception as e:
-            print(f"二進制協議解析失敗: {e}")
+            self.log(f"二進制協議解析失敗: {e}")
             return None, None
     
-    def find_field_lengths(self, data):
+    def find_field_lengths(self, event_file):
         """基於標記字節搜索Subject和Location的長度字段"""
         try:
-            # 搜索Subject長度字段的標記字節: 02 00 00 1f
-            subject_marker = b'\x02\x00\x00\x1f'
-            
-            # 在文件頭部搜索標記字節
-            for pos in range(0x100, min(0x300, len(data) - 16)):
-                if data[pos:pos+4] == subject_marker:
-                    # 檢查後面是否有對應的標記字節 04 00 00 1f
-                    if pos + 12 < len(data) and data[pos+8:pos+12] == b'\x04\x00\x00\x1f':
-                        # 讀取Subject和Location長度
-                        subject_len_pos = pos + 4
-                        location_len_pos = pos + 12
-                        
-                        if subject_len_pos + 4 <= len(data) and location_len_pos + 4 <= len(data):
-                            subject_len = int.from_bytes(data[subject_len_pos:subject_len_pos+4], 'little')
-                            location_len = int.from_bytes(data[location_len_pos:location_len_pos+4], 'little')
-                            
-                            # 驗證長度是否合理（允許Location為空）
-                            if (2 <= subject_len <= 500 and 0 <= location_len <= 500 and
-                                self.validate_field_lengths(data, subject_len, location_len)):
-                                print(f"找到標記字節長度字段 - Subject: {subject_len}字節, Location: {location_len}字節 (標記位置: 0x{pos:x})")
-                                return subject_len, location_len
-            
-            print("未找到標記字節模式")
+            # 從檔頭屬性表查詢 02 00 00 1f（Subject）與相鄰的 04 00 00 1f（Location）標頭，
+            # 長度需合理（允許Location為空）並對應有效的UTF-16文本
+            pos, subject_len, location_len = event_file.property_table.find_subject_location(
+                lambda subject_len, location_len: self.validate_field_lengths(event_file, subject_len, location_len))
+            if pos is not None:
+                self.log(f"找到標記字節長度字段 - Subject: {subject_len}字節, Location: {location_len}字節 (標記位置: 0x{pos:x})")
+                event_file.marker_pos = pos
+                event_file.subject_length = subject_len
+                event_file.location_length = location_len
+                return subject_len, location_len
+            
+            self.log("未找到標記字節模式")
             return None, None
             
         except Exception as e:
-            print(f"查找標記字節失敗: {e}")
+            self.log(f"查找標記字節失敗: {e}")
             return None, None
     
-    def validate_field_lengths(self, data, subject_len, location_len):
+    def validate_field_lengths(self, event_file, subject_len, location_len):
         """驗證長度字段是否對應有效的UTF-16文本"""
         try:
-            # 方法1: 查找</html>標籤位置
-            html_end_pattern = b'\x3c\x00\x2f\x00\x68\x00\x74\x00\x6d\x00\x6c\x00\x3e\x00'
-            html_end_pos = data.find(html_end_pattern)
-            
-            if html_end_pos != -1:
-                # 標準方法
-                subject_start = html_end_pos + len(html_end_pattern) + 2
-            else:
-                # 方法2: 查找 == 分隔符模式
-                eq_pattern = b'\x3d\x3d'  # ==
-                eq_pos = data.find(eq_pattern)
-                if eq_pos != -1:
-                    subject_start = eq_pos + 2
-                else:
-                    # 如果都找不到，跳過驗證（相信長度字段）
-                    return True
+            data = event_file.data
+            subject_start = event_file.subject_start
+            if subject_start is None:
+                # 如果都找不到，跳過驗證（相信長度字段）
+                return True
             
             # 檢查Subject位置是否有效
             if subject_start + subject_len > len(data):
@@ -278,90 +419,21 @@ class CompleteFixedTimeZoneOutlookParser:
                 location_start = subject_start + subject_len
                 if location_start + location_len > len(data):
                     return False
-                
-                location_bytes = data[location_start:location_start + location_len]
-                location_text = self.decode_utf16_bytes(location_bytes)
                 # Location可以為空，所以不檢查內容
             
             return True
             
         except Exception as e:
-            print(f"驗證長度字段失敗: {e}")
-            return False
-            
-            # 檢查Location位置是否有效
-            location_start = subject_start + subject_len
-            if location_start + location_len > len(data):
-                return False
-            
-            # 嘗試解碼Location
-            location_bytes = data[location_start:location_start + location_len]
-            location_text = self.decode_utf16_bytes(location_bytes)
-            
-            # Location可以為空，但如果不為空應該是有效文本
-            if location_len > 0 and location_text and len(location_text) < 2:
-                return False
-            
-            return True
-            
-        except:
+            self.log(f"驗證長度字段失敗: {e}")
             return False
     
     def decode_utf16_bytes(self, byte_array):
         """解碼UTF-16字節數組（改進的邊界處理）"""
-        if len(byte_array) < 2:
-            return None
-        
-        try:
-            # 首先嘗試直接解碼
-            decoded = byte_array.decode('utf-16le', errors='ignore')
-            
-            # 清理解碼結果 - 移除控制字符和無效字符
-            cleaned_chars = []
-            for char in decoded:
-                # 保留可打印字符和中文字符
-                if (char.isprintable() or 
-                    '\u4e00' <= char <= '\u9fff' or  # 中文
-                    '\u3400' <= char <= '\u4dbf'):   # 中文擴展
-                    cleaned_chars.append(char)
-                elif char in ['\r', '\n', '\t']:
-                    # 保留基本的空白字符
-                    cleaned_chars.append(' ')
-                else:
-                    # 遇到控制字符或無效字符，可能是字段邊界
-                    break
-            
-            result = ''.join(cleaned_chars).strip()
-            
-            # 進一步清理：移除末尾的重複字符模式
-            result = self.clean_trailing_garbage(result)
-            
-            return result if len(result) >= 1 else None
-            
-        except:
-            pass
-        
-        return None
+        return text_normalize.decode_utf16_bytes(byte_array)
     
     def clean_trailing_garbage(self, text):
         """清理末尾的垃圾字符"""
-        if not text:
-            return text
-        
-        # 移除末尾的重複特殊字符模式
-        # 如 ȀȀȀ̀̀̀̀̀̀̀̀̀̀
-        import re
-        
-        # 模式1: 移除末尾的重複Unicode控制字符
-        text = re.sub(r'[\u0100-\u017f\u0300-\u036f]{3,}$', '', text)
-        
-        # 模式2: 移除末尾的重複特殊字符
-        text = re.sub(r'[^\w\s\u4e00-\u9fff\[\]()（）【】""''.,!?;:：；，。！？-]{3,}$', '', text)
-        
-        # 模式3: 移除末尾的Lin, Len模式
-        text = re.sub(r'Lin,\s*Len\s*$', '', text)
-        
-        return text.strip()
+        return text_normalize.clean_trailing_garbage(text)
     
     def is_meaningful_subject(self, text):
         """判斷文本是否是有意義的主題"""
@@ -383,13 +455,13 @@ class CompleteFixedTimeZoneOutlookParser:
         return (has_chinese or has_english_words or has_reasonable_content) and special_char_ratio < 0.5
     
     
-    def extract_location_clean(self, raw_strings, html_content, file_path=None):
+    def extract_location_clean(self, raw_strings, html_content, event_file=None):
         """提取乾淨的地點（基於二進制協議的通用方法）"""
         
         # 方法1: 直接從二進制文件協議中提取（最準確的方法）
-        if file_path:
+        if event_file:
             try:
-                binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(file_path)
+                binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(event_file)
                 if binary_location:
                     return self.clean_text(binary_location)
             except:
@@ -434,42 +506,75 @@ class CompleteFixedTimeZoneOutlookParser:
     
     def extract_body_clean(self, html_content):
         """提取乾淨的Body內容"""
-        if not html_content:
-            return None
+        return html_body.clean_body_text(html_content)
+    
+    def find_timestamp_candidates(self, data):
+        """批次掃描4字節對齊的32位元值，回傳排序後、去重複的 (分鐘數, UTC datetime) 候選"""
+        # 只掃描 i < len(data) - 4 的字組（與逐字組掃描的範圍一致）
+        word_count = max(0, (len(data) - 4 + 3) // 4)
+        if word_count == 0:
+            return []
         
-        # 移除HTML標籤
-        text = re.sub(r'<[^>]+>', '', html_content)
-        text = unescape(text)
+        if np is not None:
+            words = np.frombuffer(data, dtype='<u4', count=word_count)
+            mask = (words >= TIMESTAMP_MIN_MINUTES) & (words <= TIMESTAMP_MAX_MINUTES)
+            values = {int(v) for v in words[mask]}
+        else:
+            words = array('I')
+            words.frombytes(data[:word_count * 4])
+            if sys.byteorder == 'big':
+                words.byteswap()
+            values = {v for v in words if TIMESTAMP_MIN_MINUTES <= v <= TIMESTAMP_MAX_MINUTES}
         
-        # 清理格式
-        text = re.sub(r'\r\n', '\n', text)
-        text = re.sub(r'\r', '\n', text)
-        text = re.sub(r'\n\s*\n', '\n\n', text)
-        text = re.sub(r'[ \t]+', ' ', text)
-        text = text.strip()
+        candidates = []
+        for val in sorted(values):
+            dt_utc = self.minutes_since_1601_to_datetime(val)
+            if dt_utc:
+                candidates.append((val, dt_utc))
+        return candidates
+    
+    def extract_file_timestamps(self, data, event_data):
+        """從二進制內容推測開始/結束時間，填入event_data"""
+        unique_candidates = self.find_timestamp_candidates(data)
         
-        # 移除過短或無意義的內容
-        if not text or len(text) < 10:
-            return None
+        if not unique_candidates:
+            return
         
-        # 移除常見的無用前綴
-        prefixes_to_remove = [
-            r'^/\*.*?\*/',
-            r'^BM_BEGIN.*?BM_END',
-        ]
+        if len(unique_candidates) < 2:
+            event_data['start_time_utc'] = unique_candidates[0][1]
+            return
         
-        for prefix in prefixes_to_remove:
-            text = re.sub(prefix, '', text, flags=re.DOTALL)
+        # 尋找合理的時間對（15分鐘到8小時）：候選已排序，使用雙指標
+        values = [val for val, _ in unique_candidates]
+        j = 1
+        for i in range(len(values)):
+            # 找出第一個與 values[i] 相差至少15分鐘的候選
+            j = max(j, i + 1)
+            while j < len(values) and values[j] - values[i] < 15:
+                j += 1
+            if j == len(values):
+                break
+            if values[j] - values[i] <= 480:
+                dt1 = unique_candidates[i][1]
+                dt2 = unique_candidates[j][1]
+                event_data['start_time_utc'] = dt1
+                event_data['end_time_utc'] = dt2
+                event_data['duration'] = (dt2 - dt1).total_seconds() / 3600
+                return
         
-        text = text.strip()
-        return text if text and len(text) > 10 else None
+        event_data['start_time_utc'] = unique_candidates[0][1]
+        event_data['end_time_utc'] = unique_candidates[1][1]
+        event_data['duration'] = (event_data['end_time_utc'] - event_data['start_time_utc']).total_seconds() / 3600
     
-    def get_calendar_events_from_db(self, days=14):
-        """從SQLite資料庫讀取接下來指定天數的行事曆事件，包含UID和ModDate"""
+    def iter_calendar_events_from_db(self, days=14):
+        """逐列產生接下來指定天數的行事曆事件
+        
+        Outlook.sqlite 的列在鎖定重試下一次讀完並立即關閉連線，解析與寫入期間不持有讀取交易；
+        讀取資料庫失敗時不產生任何事件，產生部分事件之後的錯誤一律向上拋出，避免輸出看似完整的部分結果。
+        """
+        snapshot = OutlookSnapshot(self.db_path, use_backup=self.snapshot_copy, busy_retries=self.busy_retries)
+        yielded = False
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             now_utc = datetime.now(timezone.utc)
             today_utc = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
             future_date_utc = today_utc + timedelta(days=days)
@@ -491,27 +596,60 @@ class CompleteFixedTimeZoneOutlookParser:
             ORDER BY Calendar_StartDateUTC
             """
             
-            cursor.execute(query, (today_minutes, future_minutes))
-            events = cursor.fetchall()
+            profiler = self.profiler
+            if self.mirror is not None:
+                # 先依 Record_ModDate 增量更新本機鏡像，之後由鏡像的索引回答時間範圍查詢，
+                # 不再持有 Outlook.sqlite 的連線
+                with profiler.stage('mirror_refresh'):
+                    self.mirror.refresh(snapshot, source_path=os.path.abspath(self.db_path))
+                print(self.mirror.report())
+                print(snapshot.report())
+                profiler.add_time('sql_lock_wait', snapshot.lock_wait_seconds, snapshot.retry_count)
+                snapshot.close()
+                with profiler.stage('sql_query'):
+                    rows = self.mirror.query_window(today_minutes, future_minutes)
+            else:
+                with profiler.stage('sql_query'):
+                    rows = iter(snapshot.fetchall(query, (today_minutes, future_minutes)))
+                print(snapshot.report())
+                profiler.add_time('sql_lock_wait', snapshot.lock_wait_seconds, snapshot.retry_count)
+                snapshot.close()
             
-            print(f"找到 {len(events)} 個事件")
-            conn.close()
-            return events
+            while True:
+                with profiler.stage('sql_fetch'):
+                    row = next(rows, None)
+                if row is None:
+                    break
+                profiler.count('db_rows')
+                yielded = True
+                yield row
             
         except Exception as e:
+            if yielded:
+                raise
             print(f"讀取資料庫錯誤: {e}")
-            return []
+        finally:
+            snapshot.close()
     
-    def parse_event_file(self, file_path):
-        """解析單個事件檔案"""
-        try:
-            with open(file_path, 'rb') as f:
-                data = f.read()
-        except Exception as e:
-            print(f"無法讀取檔案 {file_path}: {e}")
-            return None
-        
-        event_data = {
+    def get_calendar_events_from_db(self, days=14):
+        """從SQLite資料庫讀取接下來指定天數的行事曆事件，包含UID和ModDate"""
+        events = list(self.iter_calendar_events_from_db(days))
+        print(f"找到 {len(events)} 個事件")
+        return events
+    
+    def resolve_extraction_plan(self, fields):
+        """依輸出欄位決定需要執行的提取器（方法名稱，依註冊順序）"""
+        needed = {name for field in fields for name in COLUMN_EVENT_FIELDS.get(field, ())}
+        if not self.include_body:
+            needed.discard('body')
+        if not self.scan_file_timestamps:
+            # Duration 由資料庫時間計算
+            needed.discard('duration')
+        return tuple(name for produced, name in FIELD_EXTRACTORS if needed.intersection(produced))
+    
+    def empty_event_data(self):
+        """尚未提取任何欄位的 event_data"""
+        return {
             'subject': None,
             'location': None,
             'organizer': None,
@@ -520,193 +658,143 @@ class CompleteFixedTimeZoneOutlookParser:
             'end_time_utc': None,
             'duration': None
         }
-        
-        # 提取組織者電子郵件
-        email_pattern = rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        matches = re.findall(email_pattern, data)
-        for match in matches:
-            try:
-                email = match.decode('utf-8')
-                if '@' in email and not email.startswith('no-reply'):
-                    event_data['organizer'] = email
-                    break
-            except:
-                continue
-        
-        # 提取HTML內容
-        html_content = None
-        html_start = data.find(b'<\x00h\x00t\x00m\x00l\x00')
-        if html_start != -1:
-            html_end_pattern = b'<\x00/\x00h\x00t\x00m\x00l\x00>\x00'
-            html_end = data.find(html_end_pattern, html_start)
-            
-            if html_end != -1:
-                html_end += len(html_end_pattern)
-                html_bytes = data[html_start:html_end]
-                try:
-                    html_content = html_bytes.decode('utf-16le', errors='ignore')
-                    if '</html>' in html_content:
-                        end_pos = html_content.find('</html>') + 7
-                        html_content = html_content[:end_pos]
-                except:
-                    pass
-        
-        # 提取Body
-        event_data['body'] = self.extract_body_clean(html_content)
-        
-        # 提取UTF-16字串（改進版，更好地處理中文）
-        raw_strings = []
-        
-        # 方法1: 搜尋HTML結束後的UTF-16字串
-        if html_start != -1:
-            html_end_pattern = b'<\x00/\x00h\x00t\x00m\x00l\x00>\x00'
-            html_end = data.find(html_end_pattern, html_start)
-            if html_end != -1:
-                search_start = html_end + len(html_end_pattern)
-                
-                # 跳過空字節
-                while (search_start < len(data) and 
-                       (data[search_start] == 0 or data[search_start] in [0x0d, 0x0a])):
-                    search_start += 1
-                
-                # 收集UTF-16字串
-                pos = search_start
-                while pos < len(data) - 4 and len(raw_strings) < 15:
-                    if (pos < len(data) - 3 and
-                        data[pos] != 0 and data[pos+1] == 0 and 
-                        data[pos+2] != 0 and data[pos+3] == 0):
-                        
-                        start = pos
-                        while (pos < len(data) - 1 and 
-                               data[pos] != 0 and data[pos+1] == 0):
-                            pos += 2
-                        
-                        if pos - start >= 6:
-                            try:
-                                utf16_text = data[start:pos].decode('utf-16le', errors='ignore')
-                                cleaned_text = self.clean_text(utf16_text)
-                                
-                                if cleaned_text and len(cleaned_text) >= 3:
-                                    raw_strings.append(cleaned_text)
-                            except:
-                                pass
-                        
-                        while pos < len(data) and data[pos] == 0:
-                            pos += 1
-                    else:
-                        pos += 1
-        
-        # 方法2: 改進的UTF-16字串搜尋（修正中文字符解碼）
-        pos = 0
-        while pos < len(data) - 10 and len(raw_strings) < 20:
-            # 尋找UTF-16 LE模式，但更仔細地處理字節對齊
-            if (pos < len(data) - 9 and
-                data[pos] != 0 and data[pos+1] == 0 and
-                data[pos+2] != 0 and data[pos+3] == 0):
-                
-                start = pos
-                # 更精確地找到字串結尾
-                current_pos = pos
-                valid_string = True
-                
-                # 檢查是否為有效的UTF-16序列
-                while current_pos < len(data) - 1:
-                    if data[current_pos] == 0 and data[current_pos+1] == 0:
-                        # 找到字串結尾
-                        break
-                    elif data[current_pos+1] != 0:
-                        # 不是有效的UTF-16 LE格式
-                        valid_string = False
-                        break
-                    current_pos += 2
-                
-                if valid_string and current_pos > start:
-                    try:
-                        # 使用更嚴格的UTF-16解碼
-                        utf16_bytes = data[start:current_pos]
-                        
-                        # 確保字節數是偶數
-                        if len(utf16_bytes) % 2 == 0:
-                            utf16_text = utf16_bytes.decode('utf-16le', errors='replace')
-                            
-                            # 移除替換字符和控制字符
-                            utf16_text = utf16_text.replace('\ufffd', '')
-                            utf16_text = ''.join(char for char in utf16_text if ord(char) >= 32 or char in '\n\r\t')
-                            
-                            cleaned_text = self.clean_text(utf16_text)
-                            
-                            # 檢查是否包含有意義的內容
-                            if (cleaned_text and len(cleaned_text) >= 3 and
-                                not cleaned_text.startswith('http') and
-                                cleaned_text not in raw_strings):
-                                raw_strings.append(cleaned_text)
-                    except Exception as e:
-                        pass
-                
-                pos = current_pos + 2 if current_pos > start else pos + 2
-            else:
-                pos += 1
-        
-        # 提取主題和地點 - 優先使用二進制協議方法
-        binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(file_path)
-        
+    
+    @field_extractor('organizer')
+    def extract_organizer(self, event_file, event_data):
+        """提取組織者電子郵件（略過UTF-16 HTML區段，只搜尋二進制區域）"""
+        with self.profiler.stage('organizer'):
+            event_data['organizer'] = olk_protocol.find_organizer(event_file.data, event_file.html_start,
+                                                                  event_file.html_span_end)
+    
+    @field_extractor('body')
+    def extract_body(self, event_file, event_data):
+        """提取Body：直接從HTML字節逐段解碼，可限制字數"""
+        with self.profiler.stage('body'):
+            event_data['body'] = html_body.extract_body_text(event_file.html_bytes, self.max_body_chars)
+    
+    @field_extractor('subject')
+    def extract_subject(self, event_file, event_data):
+        """提取主題 - 優先使用二進制協議方法，失敗時回退到UTF-16字串"""
+        with self.profiler.stage('binary_protocol'):
+            binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(event_file)
         if binary_subject is not None:
             event_data['subject'] = binary_subject
-            print(f"使用二進制協議提取Subject: {binary_subject}")
+            self.log(f"使用二進制協議提取Subject: {binary_subject}")
         else:
-            event_data['subject'] = self.extract_subject_smart(raw_strings, html_content, event_data.get('body'), file_path)
-        
+            with self.profiler.stage('utf16_scan'):
+                raw_strings = event_file.raw_strings
+            event_data['subject'] = self.extract_subject_smart(raw_strings, event_file.html_content, event_data.get('body'), event_file)
+    
+    @field_extractor('location')
+    def extract_location(self, event_file, event_data):
+        """提取地點 - 優先使用二進制協議方法，失敗時回退到UTF-16字串"""
+        with self.profiler.stage('binary_protocol'):
+            binary_subject, binary_location = self.extract_subject_and_location_from_binary_protocol(event_file)
         if binary_location is not None:
             event_data['location'] = binary_location
-            print(f"使用二進制協議提取Location: {binary_location}")
+            self.log(f"使用二進制協議提取Location: {binary_location}")
         else:
-            event_data['location'] = self.extract_location_clean(raw_strings, html_content, file_path)
-        
-        # 提取時間資訊
-        datetime_candidates = []
-        for i in range(0, len(data) - 4, 4):
-            val32 = struct.unpack('<I', data[i:i+4])[0]
-            if 220000000 <= val32 <= 230000000:
-                dt_utc = self.minutes_since_1601_to_datetime(val32)
-                if dt_utc:
-                    datetime_candidates.append((val32, dt_utc))
-        
-        # 移除重複並按時間排序
-        seen = set()
-        unique_candidates = []
-        for val, dt in datetime_candidates:
-            if val not in seen:
-                seen.add(val)
-                unique_candidates.append((val, dt))
-        
-        unique_candidates.sort(key=lambda x: x[1])
-        
-        if unique_candidates:
-            if len(unique_candidates) >= 2:
-                # 尋找合理的時間對
-                for i in range(len(unique_candidates)):
-                    for j in range(i + 1, len(unique_candidates)):
-                        dt1 = unique_candidates[i][1]
-                        dt2 = unique_candidates[j][1]
-                        
-                        duration_seconds = (dt2 - dt1).total_seconds()
-                        if 900 <= duration_seconds <= 28800:  # 15分鐘到8小時
-                            event_data['start_time_utc'] = dt1
-                            event_data['end_time_utc'] = dt2
-                            event_data['duration'] = duration_seconds / 3600
-                            break
-                    if event_data['start_time_utc']:
-                        break
-                
-                if not event_data['start_time_utc']:
-                    event_data['start_time_utc'] = unique_candidates[0][1]
-                    event_data['end_time_utc'] = unique_candidates[1][1]
-                    event_data['duration'] = (event_data['end_time_utc'] - event_data['start_time_utc']).total_seconds() / 3600
-            else:
-                event_data['start_time_utc'] = unique_candidates[0][1]
+            with self.profiler.stage('utf16_scan'):
+                raw_strings = event_file.raw_strings
+            event_data['location'] = self.extract_location_clean(raw_strings, event_file.html_content, event_file)
+    
+    @field_extractor('start_time_utc', 'end_time_utc', 'duration')
+    def extract_timestamps(self, event_file, event_data):
+        """提取檔案內的時間資訊（process_events 會以資料庫時間覆寫開始/結束時間）"""
+        with self.profiler.stage('timestamp_scan'):
+            self.extract_file_timestamps(event_file.data, event_data)
+    
+    def parse_event_file(self, file_path):
+        """解析單個事件檔案（只執行欄位投影需要的提取器）"""
+        profiler = self.profiler
+        started = time.perf_counter()
+        try:
+            with profiler.stage('file_read'):
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+        except Exception as e:
+            print(f"無法讀取檔案 {file_path}: {e}")
+            return None
+        profiler.count('bytes_read', len(data))
+        profiler.count('files_parsed')
+        
+        with profiler.stage('html_search'):
+            event_file = OlkEventFile(file_path, data)
         
+        event_data = self.empty_event_data()
+        for name in self.extractors:
+            getattr(self, name)(event_file, event_data)
+        
+        profiler.record_file(file_path, time.perf_counter() - started, len(data))
         return event_data
     
+    def parse_event_file_isolated(self, full_path):
+        """解析單一事件檔案並隔離錯誤，回傳 (event_data, 輸出, 錯誤)"""
+        try:
+            return self.parse_event_file(full_path), None, None
+        except Exception as e:
+            return None, None, str(e)
+    
+    def parse_cache_variant(self):
+        """影響解析結果的設定，作為快取鍵的一部分"""
+        variant = f"ts={int(self.scan_file_timestamps)}"
+        if not self.include_body:
+            variant += ";body=off"
+        elif self.max_body_chars is not None:
+            variant += f";body={self.max_body_chars}"
+        # 欄位投影未提取的欄位在快取中為空，不能給完整匯出使用
+        if set(self.extractors) != set(self.resolve_extraction_plan(CSV_FIELDNAMES)):
+            variant += ";fields=" + ",".join(self.extractors)
+        return variant
+    
+    def iter_parsed_event_files(self, items, chunksize=16):
+        """依序產生 (item, 解析結果)；解析結果為 (event_data, 輸出, 錯誤)
+        
+        item 為 (資料庫列, 完整路徑, 檔案狀態, 快取結果)，檔案不存在或已有快取時不解析，解析結果為 None。
+        workers > 1 時以行程池分批平行解析，最多同時處理 workers * 2 批，記憶體用量與事件總數無關；
+        子行程的輸出會被收集起來，由主行程依 SQL 順序列印。
+        循序模式不預先解析（解析結果為 None），由呼叫端在處理該事件時才解析。
+        """
+        def needs_parse(item):
+            return item[2] is not None and item[3] is None
+        
+        if self.workers <= 1:
+            for item in items:
+                yield item, None
+            return
+        
+        def drain(chunk, future):
+            results = []
+            if future:
+                results, profile = future.result()
+                self.profiler.merge(profile)
+            results = iter(results)
+            for item in chunk:
+                yield item, next(results) if needs_parse(item) else None
+        
+        max_in_flight = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 initializer=_init_parse_worker,
+                                 initargs=(self,)) as executor:
+            pending = deque()
+            chunk = []
+            for item in items:
+                chunk.append(item)
+                if len(chunk) < chunksize:
+                    continue
+                paths = [item[1] for item in chunk if needs_parse(item)]
+                pending.append((chunk, executor.submit(_parse_event_files_in_worker, paths) if paths else None))
+                chunk = []
+                # 依序輸出最早的批次，限制同時處理的批次數
+                while len(pending) > max_in_flight or (pending and (pending[0][1] is None or pending[0][1].done())):
+                    yield from drain(*pending.popleft())
+            
+            if chunk:
+                paths = [item[1] for item in chunk if needs_parse(item)]
+                pending.append((chunk, executor.submit(_parse_event_files_in_worker, paths) if paths else None))
+            while pending:
+                yield from drain(*pending.popleft())
+    
     def process_events(self, days=14):
         """處理所有事件"""
         db_events = self.get_calendar_events_from_db(days)
@@ -715,18 +803,104 @@ class CompleteFixedTimeZoneOutlookParser:
             print("沒有找到事件")
             return []
         
-        processed_events = []
+        return self.process_db_events(db_events)
+    
+    def process_db_events(self, db_events):
+        """解析資料庫查詢結果中的事件列"""
+        return list(self.iter_processed_events(db_events))
+    
+    def iter_events(self, days=14):
+        """串流處理：資料庫事件列 → 解析 → 逐一產生事件"""
+        return self.iter_processed_events(self.iter_calendar_events_from_db(days))
+    
+    def iter_processed_events(self, db_events):
+        """逐一解析資料庫事件列並產生 event_data（依SQL順序）"""
+        if self.workers > 1:
+            print(f"使用 {self.workers} 個行程平行解析")
+        
+        # 確認檔案是否存在並查詢解析快取，只把未命中的檔案交給解析器
+        cache = self.parse_cache
+        variant = self.parse_cache_variant()
         
-        for start_minutes, end_minutes, path_to_data_file, calendar_uid, record_mod_date in db_events:
-            print(f"\n處理事件: {path_to_data_file}")
-            
-            full_path = os.path.join(self.outlook_data_path, path_to_data_file)
+        # 投影的欄位都來自資料庫時（例如只需要UID與時間的忙碌區塊匯出），完全不存取事件檔案
+        hits_before = cache.hits if cache else 0
+        misses_before = cache.misses if cache else 0
+        needs_files = bool(self.extractors)
+        if not needs_files:
+            print(f"輸出欄位只需要資料庫欄位，不讀取事件檔案: {', '.join(self.fields)}")
+        
+        # 週期性事件的實例共用同一個 PathToDataFile：每個事件檔案每次執行只解析一次，
+        # 之後的實例重用解析結果（只套用各自的資料庫時間）
+        seen_files = set()
+        memo = OrderedDict()
+        
+        def annotate(rows):
+            for row in rows:
+                full_path = os.path.join(self.outlook_data_path, row[2])
+                if not needs_files:
+                    # 不讀取檔案，但與一般路徑相同地略過事件檔案不存在的列
+                    if not os.path.exists(full_path):
+                        print(f"檔案不存在: {full_path}")
+                        self.profiler.count('missing_files')
+                        continue
+                    yield row, full_path, None, None
+                    continue
+                file_key = ParseCache.stat_key(full_path)
+                cached = None
+                if file_key:
+                    if (full_path, file_key) in seen_files:
+                        cached = _SHARED_FILE
+                    else:
+                        seen_files.add((full_path, file_key))
+                        if cache:
+                            cached = cache.get(row[2], row[4], *file_key, variant=variant)
+                yield row, full_path, file_key, cached
+        
+        row_count = 0
+        shared_count = 0
+        for item, parsed in self.iter_parsed_event_files(annotate(db_events)):
+            (start_minutes, end_minutes, path_to_data_file, calendar_uid, record_mod_date), full_path, file_key, cached = item
+            row_count += 1
+            self.log(f"\n處理事件: {path_to_data_file}")
+            reused = False
             
-            if not os.path.exists(full_path):
+            if not needs_files:
+                event_data = self.empty_event_data()
+                output = error = None
+            elif not file_key:
                 print(f"檔案不存在: {full_path}")
+                self.profiler.count('missing_files')
                 continue
+            elif cached is _SHARED_FILE and (full_path, file_key) in memo:
+                self.log("重用同一事件檔案的解析結果")
+                memo.move_to_end((full_path, file_key))
+                event_data = dict(memo[(full_path, file_key)])
+                output = error = None
+                reused = True
+                shared_count += 1
+            elif cached is not None and cached is not _SHARED_FILE:
+                self.log("使用解析快取")
+                event_data = dict(cached, start_time_utc=None, end_time_utc=None)
+                output = error = None
+            else:
+                if parsed is None:
+                    parsed = self.parse_event_file_isolated(full_path)
+                event_data, output, error = parsed
+                if cache and event_data:
+                    cache.put(path_to_data_file, record_mod_date, *file_key, event_data, variant=variant)
             
-            event_data = self.parse_event_file(full_path)
+            if needs_files and event_data and not reused:
+                memo[(full_path, file_key)] = dict(event_data)
+                if len(memo) > SHARED_FILE_MEMO_SIZE:
+                    memo.popitem(last=False)
+            
+            if output:
+                print(output, end='')
+            
+            if error:
+                print(f"解析事件失敗 {full_path}: {error}")
+                self.profiler.count('parse_errors')
+                continue
             
             if event_data:
                 # 添加資料庫欄位
@@ -742,57 +916,299 @@ class CompleteFixedTimeZoneOutlookParser:
                 if event_data['start_time_utc'] and event_data['end_time_utc'] and not event_data['duration']:
                     event_data['duration'] = (event_data['end_time_utc'] - event_data['start_time_utc']).total_seconds() / 3600
                 
-                processed_events.append(event_data)
-                
                 # 顯示解析結果
-                print(f"  Subject: {event_data['subject'] or '(Unknown)'}")
-                print(f"  Location: {event_data['location'] or '(Unknown)'}")
-                print(f"  Organizer: {event_data['organizer'] or '(Unknown)'}")
+                self.log(f"  Subject: {event_data['subject'] or '(Unknown)'}")
+                self.log(f"  Location: {event_data['location'] or '(Unknown)'}")
+                self.log(f"  Organizer: {event_data['organizer'] or '(Unknown)'}")
+                
+                self.profiler.count('events')
+                
+                yield event_data
+        
+        if shared_count:
+            print(f"\n共用事件檔案: {shared_count} 個事件重用了同一次執行中的解析結果")
+            self.profiler.count('shared_file_hits', shared_count)
+        if row_count and cache:
+            print(f"\n解析快取: 命中 {cache.hits} 個，未命中 {cache.misses} 個")
+            self.profiler.count('cache_hits', cache.hits - hits_before)
+            self.profiler.count('cache_misses', cache.misses - misses_before)
+    
+    def format_event_row(self, event):
+        """將事件格式化為CSV列（清理所有文字欄位以避免CSV格式問題）"""
+        # 格式化時間
+        starts_user = self.format_datetime_for_user(event['start_time_utc'], include_timezone=False)
+        ends_user = self.format_datetime_for_user(event['end_time_utc'], include_timezone=False)
+        starts_utc = event['start_time_utc'].strftime('%Y-%m-%d %H:%M:%S UTC') if event['start_time_utc'] else ""
+        ends_utc = event['end_time_utc'].strftime('%Y-%m-%d %H:%M:%S UTC') if event['end_time_utc'] else ""
+        
+        return {
+            'Calendar_UID': self.clean_csv_text(event['calendar_uid'] or ''),
+            'Record_ModDate': event['record_mod_date'] or '',
+            'Subject': self.clean_csv_text(event['subject'] or ''),
+            'Location': self.clean_csv_text(event['location'] or ''),
+            'Organizer': self.clean_csv_text(event['organizer'] or ''),
+            'Duration': f"{event['duration']:.1f}" if event['duration'] else '',
+            'Starts': starts_user,
+            'Ends': ends_user,
+            'Starts_UTC': starts_utc,
+            'Ends_UTC': ends_utc,
+            'Body': self.clean_csv_text(event['body'] or ''),
+            'PathToDataFile': self.clean_csv_text(event['path_to_data_file'] or ''),
+            'Content_Hash': self.content_hash(event)
+        }
+    
+    def content_hash(self, event):
+        """同步欄位的內容雜湊（未投影 Content_Hash 時不計算）"""
+        if 'Content_Hash' not in self.fields:
+            return None
+        return event_content_hash(event)
+    
+    def project_row(self, row):
+        """只保留投影的輸出欄位"""
+        if len(self.fields) == len(CSV_FIELDNAMES):
+            return row
+        return {field: row[field] for field in self.fields}
+    
+    def format_event_record(self, event):
+        """將事件格式化為保留型別的紀錄（JSONL/Parquet/Arrow 使用，Body 保留原始換行）"""
+        return {
+            'Calendar_UID': event['calendar_uid'],
+            'Record_ModDate': int(event['record_mod_date']) if event['record_mod_date'] is not None else None,
+            'Subject': event['subject'],
+            'Location': event['location'],
+            'Organizer': event['organizer'],
+            'Duration': event['duration'],
+            'Starts': self.format_datetime_for_user(event['start_time_utc'], include_timezone=False),
+            'Ends': self.format_datetime_for_user(event['end_time_utc'], include_timezone=False),
+            'Starts_UTC': event['start_time_utc'],
+            'Ends_UTC': event['end_time_utc'],
+            'Body': event['body'],
+            'PathToDataFile': event['path_to_data_file'],
+            'Content_Hash': self.content_hash(event)
+        }
+    
+    def export_events(self, events, output_file=None, output_format='csv'):
+        """依格式匯出事件（csv/jsonl/parquet/arrow），回傳匯出的事件數"""
+        if output_file is None:
+            output_file = event_formats.default_output_path(output_format)
+        if output_format == 'csv':
+            return self.export_to_csv(events, output_file)
+        
+        events = iter(events)
+        first_event = next(events, None)
+        if first_event is None:
+            print("沒有事件可匯出")
+            return 0
+        
+        profiler = self.profiler
+        # 寫入時間 = 寫入器總時間 - 產生紀錄（解析與格式化）所花的時間
+        generator_seconds = 0.0
         
-        return processed_events
+        def records():
+            nonlocal generator_seconds
+            started = time.perf_counter()
+            for event in itertools.chain((first_event,), events):
+                with profiler.stage('text_clean'):
+                    record = self.project_row(self.format_event_record(event))
+                generator_seconds += time.perf_counter() - started
+                yield record
+                started = time.perf_counter()
+            generator_seconds += time.perf_counter() - started
+        
+        write_started = time.perf_counter()
+        if output_format == 'jsonl':
+            count = event_formats.write_jsonl(records(), output_file, flush_interval=CSV_FLUSH_INTERVAL)
+        else:
+            count = event_formats.write_arrow(records(), output_file, self.fields, fmt=output_format)
+        profiler.add_time('write', time.perf_counter() - write_started - generator_seconds, count)
+        
+        print(f"\n已匯出 {count} 個事件到 {output_file} ({output_format})")
+        print(f"時區設定: {self.get_timezone_name()}")
+        return count
     
     def export_to_csv(self, events, output_file="data/dump_outlook_calendar.csv"):
-        """將事件匯出為CSV檔案（包含Calendar_UID和Record_ModDate，修正格式問題）"""
-        if not events:
+        """將事件匯出為CSV檔案（包含Calendar_UID和Record_ModDate，修正格式問題）
+        
+        events 可以是產生器：每個事件解析完成後立即寫入，不需要先收集全部事件。
+        """
+        events = iter(events)
+        first_event = next(events, None)
+        if first_event is None:
             print("沒有事件可匯出")
-            return
+            return 0
         
+        count = 0
         with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
             # 包含Calendar_UID和Record_ModDate欄位
-            fieldnames = [
-                'Calendar_UID', 'Record_ModDate', 'Subject', 'Location', 'Organizer', 
-                'Duration', 'Starts', 'Ends', 'Starts_UTC', 'Ends_UTC', 'Body', 'PathToDataFile'
-            ]
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
+            writer = csv.DictWriter(csvfile, fieldnames=self.fields, extrasaction='ignore')
             
             writer.writeheader()
             
-            for event in events:
-                # 格式化時間
-                starts_user = self.format_datetime_for_user(event['start_time_utc'], include_timezone=False)
-                ends_user = self.format_datetime_for_user(event['end_time_utc'], include_timezone=False)
-                starts_utc = event['start_time_utc'].strftime('%Y-%m-%d %H:%M:%S UTC') if event['start_time_utc'] else ""
-                ends_utc = event['end_time_utc'].strftime('%Y-%m-%d %H:%M:%S UTC') if event['end_time_utc'] else ""
-                
-                # 清理所有文字欄位以避免CSV格式問題
-                writer.writerow({
-                    'Calendar_UID': self.clean_csv_text(event['calendar_uid'] or ''),
-                    'Record_ModDate': event['record_mod_date'] or '',
-                    'Subject': self.clean_csv_text(event['subject'] or ''),
-                    'Location': self.clean_csv_text(event['location'] or ''),
-                    'Organizer': self.clean_csv_text(event['organizer'] or ''),
-                    'Duration': f"{event['duration']:.1f}" if event['duration'] else '',
-                    'Starts': starts_user,
-                    'Ends': ends_user,
-                    'Starts_UTC': starts_utc,
-                    'Ends_UTC': ends_utc,
-                    'Body': self.clean_csv_text(event['body'] or ''),
-                    'PathToDataFile': self.clean_csv_text(event['path_to_data_file'] or '')
-                })
-        
-        print(f"\n已匯出 {len(events)} 個事件到 {output_file}")
+            profiler = self.profiler
+            for event in itertools.chain((first_event,), events):
+                with profiler.stage('text_clean'):
+                    row = self.format_event_row(event)
+                with profiler.stage('write'):
+                    writer.writerow(row)
+                    count += 1
+                    # 定期寫入磁碟，讓前面的事件盡早可用
+                    if count % CSV_FLUSH_INTERVAL == 0:
+                        csvfile.flush()
+        
+        print(f"\n已匯出 {count} 個事件到 {output_file}")
         print(f"時區設定: {self.get_timezone_name()}")
-        print("CSV欄位包含: Calendar_UID, Record_ModDate, Subject, Location, Organizer, Duration, Starts, Ends, Starts_UTC, Ends_UTC, Body, PathToDataFile")
+        print(f"CSV欄位包含: {', '.join(self.fields)}")
+        return count
+    
+    def load_change_feed_state(self, state_path):
+        """載入增量匯出狀態（Record_ModDate水位線、已匯出的水位線事件與上次時間範圍內的UID）"""
+        if not os.path.exists(state_path):
+            return {}
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"載入增量匯出狀態失敗: {e}")
+            return {}
+    
+    def save_change_feed_state(self, state_path, watermark, window_uids, watermark_keys=()):
+        """儲存增量匯出狀態"""
+        state = {
+            'watermark': watermark,
+            'watermark_keys': sorted(list(key) for key in watermark_keys),
+            'window_uids': sorted(window_uids),
+            'updated_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')
+        }
+        try:
+            with open(state_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"儲存增量匯出狀態失敗: {e}")
+    
+    def export_changes(self, days=14, changed_since=None,
+                       state_path="data/dump_state.json",
+                       delta_output="data/dump_outlook_calendar_delta.json",
+                       full_csv_output=None):
+        """增量匯出：只解析 Record_ModDate 達到水位線或新進入時間範圍的事件
+        
+        changed_since 為 None 時使用狀態檔中的水位線（第一次執行時匯出全部事件）。
+        輸出的差異檔包含需要新增/更新的事件，以及離開時間範圍的UID；
+        上一個差異檔尚未被同步器讀取時，兩者合併（同一個UID保留較新的內容）。
+        """
+        state = self.load_change_feed_state(state_path)
+        previous_uids = set(state.get('window_uids', []))
+        if changed_since is None:
+            changed_since = state.get('watermark')
+        # 上次已匯出、Record_ModDate 等於水位線的事件 (UID, PathToDataFile)
+        emitted_keys = set()
+        if changed_since is not None and changed_since == state.get('watermark'):
+            emitted_keys = {tuple(key) for key in state.get('watermark_keys', [])}
+        
+        db_events = self.get_calendar_events_from_db(days)
+        window_uids = {row[3] for row in db_events if row[3]}
+        mod_dates = [row[4] for row in db_events if row[4] is not None]
+        # 水位線只會前進，避免時間範圍內沒有事件時倒退
+        watermark = max(mod_dates + ([changed_since] if changed_since is not None else []), default=None)
+        
+        if changed_since is None:
+            changed_rows = list(db_events)
+            print("沒有水位線，匯出時間範圍內的全部事件")
+        else:
+            # 同一秒內的修改可能在上次查詢之後才寫入，因此包含等於水位線、但上次尚未匯出的事件
+            changed_rows = [
+                row for row in db_events
+                if (row[4] is not None and row[4] > changed_since) or
+                   (row[4] == changed_since and (row[3], row[2]) not in emitted_keys) or
+                   (previous_uids and row[3] not in previous_uids)
+            ]
+            print(f"Record_ModDate 水位線: {changed_since}，變更事件: {len(changed_rows)} / {len(db_events)}")
+        
+        removed_uids = sorted(previous_uids - window_uids)
+        if removed_uids:
+            print(f"離開時間範圍的事件: {len(removed_uids)}")
+        
+        if full_csv_output:
+            changed_keys = {(row[2], row[4]) for row in changed_rows}
+            events = self.process_db_events(db_events)
+            upserts = [event for event in events
+                       if (event['path_to_data_file'], event['record_mod_date']) in changed_keys]
+            self.export_to_csv(events, full_csv_output)
+        else:
+            upserts = self.process_db_events(changed_rows)
+        
+        delta = {
+            'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'changed_since': changed_since,
+            'watermark': watermark,
+            'upserts': [self.project_row(self.format_event_row(event)) for event in upserts],
+            'removed_uids': removed_uids
+        }
+        print(f"\n差異: 更新 {len(upserts)} 個事件，移除 {len(removed_uids)} 個UID")
+        delta = self.merge_pending_delta(delta_output, delta)
+        with open(delta_output, 'w', encoding='utf-8') as f:
+            json.dump(delta, f, ensure_ascii=False, indent=2)
+        print(f"已匯出差異檔 {delta_output}: 更新 {len(delta['upserts'])} 個事件，移除 {len(delta['removed_uids'])} 個UID")
+        
+        # 水位線上的事件都已匯出（本次或之前），下次只需要匯出新寫入的事件
+        watermark_keys = {(row[3], row[2]) for row in db_events if row[4] is not None and row[4] == watermark}
+        if watermark == changed_since:
+            watermark_keys |= emitted_keys
+        self.save_change_feed_state(state_path, watermark, window_uids, watermark_keys)
+        return delta
+    
+    def merge_pending_delta(self, delta_output, delta):
+        """合併尚未被同步器讀取的上一個差異檔（同步器處理完成後會刪除差異檔）"""
+        if not os.path.exists(delta_output):
+            return delta
+        try:
+            with open(delta_output, 'r', encoding='utf-8') as f:
+                pending = json.load(f)
+        except Exception as e:
+            print(f"讀取上一個差異檔失敗，直接覆寫: {e}")
+            return delta
+        
+        upserts = {}
+        for row in pending.get('upserts', []) + delta['upserts']:
+            upserts[row.get('Calendar_UID') or row.get('PathToDataFile')] = row
+        upsert_uids = {row.get('Calendar_UID') for row in delta['upserts']}
+        removed_uids = set(pending.get('removed_uids', [])) - upsert_uids
+        removed_uids.update(delta['removed_uids'])
+        for uid in removed_uids:
+            upserts.pop(uid, None)
+        
+        print(f"上一個差異檔尚未被同步，合併 {len(pending.get('upserts', []))} 個更新")
+        return dict(delta,
+                    changed_since=pending.get('changed_since', delta['changed_since']),
+                    upserts=list(upserts.values()),
+                    removed_uids=sorted(removed_uids))
+
+# 平行解析用的子行程狀態
+_worker_parser = None
+
+def _init_parse_worker(parser):
+    """子行程初始化：保存解析器設定"""
+    global _worker_parser
+    _worker_parser = parser
+    _worker_parser.profiler.reset()
+
+def _parse_event_file_in_worker(full_path):
+    """在子行程中解析單一事件檔案，收集輸出並隔離錯誤"""
+    output = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(output):
+            event_data = _worker_parser.parse_event_file(full_path)
+        return event_data, output.getvalue(), None
+    except Exception as e:
+        return None, output.getvalue(), str(e)
+
+def _parse_event_files_in_worker(full_paths):
+    """在子行程中依序解析一批事件檔案，回傳 (解析結果, 本批的計時統計)"""
+    results = [_parse_event_file_in_worker(full_path) for full_path in full_paths]
+    profile = None
+    if _worker_parser.profiler.enabled:
+        profile = _worker_parser.profiler.snapshot()
+        _worker_parser.profiler.reset()
+    return results, profile
 
 def main():
     parser = argparse.ArgumentParser(description='修正版完整時區感知Mac Outlook Calendar Reader')
@@ -800,6 +1216,55 @@ def main():
                        help='使用者時區 (例如: UTC+8, UTC-5, UTC+0)')
     parser.add_argument('--days', '-d', type=int, default=14,
                        help='匯出天數 (預設: 14天)')
+    parser.add_argument('--data-path', default=None,
+                       help='Outlook資料目錄（包含Outlook.sqlite，預設為Outlook 15 Main Profile的Data目錄）')
+    parser.add_argument('--snapshot-copy', action='store_true',
+                       help='先以SQLite backup API複製一致的資料庫快照再查詢，避免長時間持有Outlook.sqlite的鎖')
+    parser.add_argument('--busy-retries', type=int, default=5,
+                       help='資料庫鎖定時的最大重試次數（指數退避，預設: 5）')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='平行解析事件檔案的行程數 (預設: 1，不使用平行處理)')
+    parser.add_argument('--parse-cache', default='data/parse_cache.sqlite',
+                       help='解析結果快取檔案 (預設: data/parse_cache.sqlite)')
+    parser.add_argument('--no-parse-cache', action='store_true',
+                       help='停用解析結果快取，每次重新解析所有事件檔案')
+    parser.add_argument('--mirror', nargs='?', const='data/calendar_mirror.sqlite', default=None,
+                       help='使用 CalendarEvents 的本機索引鏡像（依 Record_ModDate 增量更新，解析結果也存放在鏡像中，'
+                            '預設: data/calendar_mirror.sqlite）')
+    parser.add_argument('--incremental', action='store_true',
+                       help='增量匯出：依 Record_ModDate 水位線只匯出變更的事件，輸出差異檔')
+    parser.add_argument('--changed-since', type=int, default=None,
+                       help='增量匯出：指定 Record_ModDate 水位線（覆寫狀態檔中的值）')
+    parser.add_argument('--state-file', default='data/dump_state.json',
+                       help='增量匯出狀態檔 (預設: data/dump_state.json)')
+    parser.add_argument('--delta-output', default='data/dump_outlook_calendar_delta.json',
+                       help='增量匯出差異檔 (預設: data/dump_outlook_calendar_delta.json)')
+    parser.add_argument('--full-csv', action='store_true',
+                       help='增量匯出時同時輸出完整CSV')
+    parser.add_argument('--watch', action='store_true',
+                       help='監看模式：Outlook.sqlite 變更時自動執行增量匯出')
+    parser.add_argument('--poll-interval', type=float, default=2.0,
+                       help='監看模式的檢查間隔秒數 (預設: 2)')
+    parser.add_argument('--debounce', type=float, default=5.0,
+                       help='監看模式合併連續寫入的等待秒數 (預設: 5)')
+    parser.add_argument('--skip-file-timestamps', action='store_true',
+                       help='略過事件檔案內的時間戳掃描（時間一律取自資料庫，Duration 由資料庫時間計算）')
+    parser.add_argument('--no-body', action='store_true',
+                       help='不提取Body（不解碼HTML內容）')
+    parser.add_argument('--max-body', type=int, default=None,
+                       help='Body最多保留的字數，只解碼到足夠的HTML內容（預設: 不限制）')
+    parser.add_argument('--profile', nargs='?', const='data/dump_profile.json', default=None,
+                       help='記錄各階段時間、讀取字節數、快取命中與最慢的事件檔案，輸出JSON報告 (預設: data/dump_profile.json)')
+    parser.add_argument('--profile-slowest', type=int, default=10,
+                       help='報告中列出最慢的事件檔案數量 (預設: 10)')
+    parser.add_argument('--quiet', '-q', action='store_true',
+                       help='安靜模式：不列印每個事件的處理過程')
+    parser.add_argument('--fields', default=None,
+                       help='只匯出（並只計算）指定欄位，以逗號分隔，例如: Calendar_UID,Starts_UTC,Ends_UTC')
+    parser.add_argument('--format', choices=list(event_formats.EXPORT_FORMATS), default='csv',
+                       help='匯出格式：csv（預設）、jsonl、parquet、arrow（後兩者需要 pyarrow，保留型別與完整Body）')
+    parser.add_argument('--output', '-o', default=None,
+                       help='匯出檔案路徑 (預設: data/dump_outlook_calendar.<格式副檔名>)')
     
     args = parser.parse_args()
     
@@ -807,18 +1272,116 @@ def main():
     print("包含Calendar_UID和Record_ModDate欄位")
     print("=" * 60)
     
-    reader = CompleteFixedTimeZoneOutlookParser(user_timezone=args.timezone)
+    fields = None
+    if args.fields:
+        fields = [field.strip() for field in args.fields.split(',') if field.strip()]
+        unknown = [field for field in fields if field not in CSV_FIELDNAMES]
+        if unknown or not fields:
+            print(f"錯誤: 未知的欄位 {', '.join(unknown)}（可用欄位: {', '.join(CSV_FIELDNAMES)}）")
+            sys.exit(1)
+    
+    format_error = event_formats.require_pyarrow(args.format)
+    if format_error:
+        print(f"錯誤: {format_error}")
+        sys.exit(1)
+    
+    mirror = None
+    if args.mirror:
+        mirror = CalendarMirror(args.mirror)
+        if not mirror.open():
+            mirror = None
+    
+    parse_cache = None
+    if not args.no_parse_cache:
+        if mirror:
+            # 解析結果直接存放在鏡像的事件列中
+            parse_cache = mirror
+        else:
+            parse_cache = ParseCache(args.parse_cache)
+            if not parse_cache.open():
+                parse_cache = None
+    
+    def close_stores():
+        if parse_cache:
+            parse_cache.close()
+        if mirror and mirror is not parse_cache:
+            mirror.close()
+    
+    reader = CompleteFixedTimeZoneOutlookParser(user_timezone=args.timezone,
+                                                scan_file_timestamps=not args.skip_file_timestamps,
+                                                workers=args.workers,
+                                                parse_cache=parse_cache,
+                                                outlook_data_path=args.data_path,
+                                                snapshot_copy=args.snapshot_copy,
+                                                busy_retries=args.busy_retries,
+                                                include_body=not args.no_body,
+                                                max_body_chars=args.max_body,
+                                                fields=fields,
+                                                profiler=RunProfiler(enabled=bool(args.profile),
+                                                                     slowest=args.profile_slowest),
+                                                quiet=args.quiet,
+                                                mirror=mirror)
     
     if not os.path.exists(reader.db_path):
         print(f"錯誤: 找不到Outlook資料庫: {reader.db_path}")
         sys.exit(1)
     
-    events = reader.process_events(args.days)
+    def write_profile():
+        if not args.profile:
+            return
+        try:
+            report = reader.profiler.save(args.profile)
+            print(f"\n{reader.profiler.summary(report)}")
+            print(f"效能報告已寫入 {args.profile}")
+        except Exception as e:
+            print(f"寫入效能報告失敗: {e}")
+        reader.profiler.reset()
+    
+    def export_changes():
+        reader.export_changes(args.days,
+                              changed_since=args.changed_since,
+                              state_path=args.state_file,
+                              delta_output=args.delta_output,
+                              full_csv_output="data/dump_outlook_calendar.csv" if args.full_csv else None)
+    
+    if args.watch:
+        def export_on_change():
+            try:
+                export_changes()
+            except Exception as e:
+                print(f"增量匯出失敗: {e}")
+            if parse_cache:
+                parse_cache.flush()
+            write_profile()
+        
+        print(f"監看模式: 每 {args.poll_interval} 秒檢查一次，連續寫入合併 {args.debounce} 秒")
+        watcher = OutlookDatabaseWatcher(reader.db_path,
+                                         poll_interval=args.poll_interval,
+                                         debounce_seconds=args.debounce)
+        try:
+            watcher.run(export_on_change)
+        except KeyboardInterrupt:
+            print("\n監看已停止")
+        finally:
+            watcher.close()
+            close_stores()
+        return
+    
+    if args.incremental or args.changed_since is not None:
+        try:
+            export_changes()
+            write_profile()
+        finally:
+            close_stores()
+        return
     
-    if events:
-        reader.export_to_csv(events)
-    else:
-        print("沒有找到任何事件")
+    try:
+        # 串流匯出：事件解析完成後立即寫入輸出檔
+        if not reader.export_events(reader.iter_events(args.days), args.output, args.format):
+            print("沒有找到任何事件")
+        write_profile()
+    finally:
+        close_stores()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+事件匯出格式
+除了CSV之外，支援保留型別的 JSONL 與 Parquet/Arrow：
+UTC時間為整數秒（JSONL）或UTC timestamp欄位（Parquet/Arrow），Record_ModDate 為整數，Body 保留原始換行
+"""
+
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# 格式名稱與預設副檔名
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'jsonl': '.jsonl',
+    'parquet': '.parquet',
+    'arrow': '.arrow',
+}
+
+# 需要pyarrow的格式
+ARROW_FORMATS = ('parquet', 'arrow')
+
+# 以UTC時間戳保存的欄位
+TIMESTAMP_FIELDS = ('Starts_UTC', 'Ends_UTC')
+
+# 每批寫入的列數（Parquet row group / Arrow record batch）
+ARROW_BATCH_SIZE = 1000
+
+
+def default_output_path(fmt, base="data/dump_outlook_calendar"):
+    """依格式取得預設輸出檔名"""
+    return base + EXPORT_FORMATS[fmt]
+
+
+def detect_format(path):
+    """依副檔名判斷格式（無法判斷時視為CSV）"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.feather':
+        return 'arrow'
+    for fmt, fmt_ext in EXPORT_FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    return 'csv'
+
+
+def require_pyarrow(fmt):
+    """Parquet/Arrow 格式需要 pyarrow，未安裝時回傳錯誤訊息"""
+    if fmt in ARROW_FORMATS and pa is None:
+        return f"{fmt} 格式需要 pyarrow，請先安裝: uv pip install pyarrow"
+    return None
+
+
+def arrow_schema(fieldnames):
+    """事件欄位的Arrow schema"""
+    types = {
+        'Record_ModDate': pa.int64(),
+        'Duration': pa.float64(),
+    }
+    for field in TIMESTAMP_FIELDS:
+        types[field] = pa.timestamp('s', tz='UTC')
+    return pa.schema([(field, types.get(field, pa.string())) for field in fieldnames])
+
+
+def _json_value(field, value):
+    if field in TIMESTAMP_FIELDS and value is not None:
+        return int(value.timestamp())
+    return value
+
+
+def write_jsonl(records, output_file, flush_interval=50):
+    """逐列寫入JSONL（每行一個事件），回傳列數"""
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            line = {field: _json_value(field, value) for field, value in record.items()}
+            f.write(json.dumps(line, ensure_ascii=False))
+            f.write('\n')
+            count += 1
+            if count % flush_interval == 0:
+                f.flush()
+    return count
+
+
+def write_arrow(records, output_file, fieldnames, fmt='parquet', batch_size=ARROW_BATCH_SIZE):
+    """分批寫入Parquet或Arrow IPC檔案，回傳列數"""
+    schema = arrow_schema(fieldnames)
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(output_file, schema)
+    else:
+        writer = pa.ipc.new_file(output_file, schema)
+
+    count = 0
+    batch = []
+    try:
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+                count += len(batch)
+                batch = []
+        if batch:
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+            count += len(batch)
+    finally:
+        writer.close()
+    return count
+
+
+def read_arrow_table(path):
+    """讀取Parquet或Arrow IPC檔案為Arrow Table（Arrow檔案以記憶體映射讀取，不複製資料）"""
+    if pa is None:
+        raise ImportError(require_pyarrow(detect_format(path)))
+    if detect_format(path) == 'parquet':
+        return pq.read_table(path, memory_map=True)
+    with pa.memory_map(path, 'r') as source:
+        return pa.ipc.open_file(source).read_all()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+事件Body提取
+不限字數時一次解碼UTF-16 HTML區段並以單一編譯的標籤正規表示式移除標籤；
+設定字數上限時改為逐段解碼，只解碼到足夠產生上限長度的文字為止
+"""
+
+import codecs
+import re
+from html import unescape
+
+# HTML標籤（與舊版 re.sub(r'<[^>]+>', '') 相同）
+_TAG = re.compile(r'<[^>]+>')
+
+# 換行正規化、空行合併、空白合併
+_NEWLINE = re.compile(r'\r\n?')
+_BLANK_LINES = re.compile(r'\n\s*\n')
+_SPACES = re.compile(r'[ \t]+')
+
+# 常見的無用前綴（CSS註解、書籤標記）
+_PREFIX_COMMENT = re.compile(r'^/\*.*?\*/', re.DOTALL)
+_PREFIX_BOOKMARK = re.compile(r'^BM_BEGIN.*?BM_END', re.DOTALL)
+
+# 每次解碼的字節數
+DECODE_CHUNK_BYTES = 32 * 1024
+
+# 未完成的HTML實體（例如被切在 "&am" 的 "&amp;"）最多保留的字數
+_MAX_ENTITY_LENGTH = 32
+
+# 截斷時附加的標記（與同步器截斷描述時相同）
+TRUNCATED_MARKER = "...(內容已截斷)"
+
+
+def _collapse_whitespace(text):
+    text = _NEWLINE.sub('\n', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+def normalize_body_text(text):
+    """整理去除標籤後的文字：換行正規化、合併空行與空白、移除無用前綴
+
+    回傳 (文字, 前綴是否已確定)。文字不完整時，未結束的前綴（找不到結尾標記）
+    可能在讀入更多內容後才會被移除。
+    """
+    text = _collapse_whitespace(text)
+    if not text or len(text) < 10:
+        return text, True
+
+    settled = True
+    stripped = _PREFIX_COMMENT.sub('', text)
+    if stripped is text and text.startswith('/*'):
+        settled = False
+    text = _PREFIX_BOOKMARK.sub('', stripped)
+    if text is stripped and text.startswith('BM_BEGIN'):
+        settled = False
+    return text.strip(), settled
+
+
+def clean_body_text(html_content):
+    """從完整的HTML字串提取乾淨的Body（太短時回傳 None）"""
+    if not html_content:
+        return None
+    return finish_body_text(unescape(_TAG.sub('', html_content)))
+
+
+def finish_body_text(text):
+    """整理已去除標籤的完整文字（太短時回傳 None）"""
+    text = _collapse_whitespace(text)
+    if not text or len(text) < 10:
+        return None
+    text = _PREFIX_BOOKMARK.sub('', _PREFIX_COMMENT.sub('', text)).strip()
+    return text if text and len(text) > 10 else None
+
+
+def iter_html_text(html_bytes, chunk_bytes=DECODE_CHUNK_BYTES):
+    """逐段解碼UTF-16 LE HTML，產生去除標籤並還原實體後的文字片段
+
+    跨段的標籤與HTML實體會保留到下一段再處理，結果與一次處理完整字串相同。
+    """
+    decoder = codecs.getincrementaldecoder('utf-16le')(errors='ignore')
+    pending = []
+    in_tag = False
+    view = memoryview(html_bytes)
+    for offset in range(0, len(view), chunk_bytes):
+        decoded = decoder.decode(view[offset:offset + chunk_bytes])
+
+        # 仍在未閉合的標籤內（例如很長的內嵌圖片），只累積不處理
+        if in_tag and '>' not in decoded:
+            pending.append(decoded)
+            continue
+
+        pending.append(decoded)
+        text = ''.join(pending)
+        pending = []
+        in_tag = False
+
+        # 未閉合的標籤（最後一個 > 之後的第一個 <）留到下一段
+        tag_start = text.find('<', text.rfind('>') + 1)
+        if tag_start != -1:
+            pending.append(text[tag_start:])
+            text = text[:tag_start]
+            in_tag = True
+
+        text = _TAG.sub('', text)
+
+        # 未完成的實體留到下一段
+        amp = text.rfind('&', max(0, len(text) - _MAX_ENTITY_LENGTH - 1))
+        if amp != -1 and ';' not in text[amp:]:
+            pending.insert(0, text[amp:])
+            text = text[:amp]
+
+        if text:
+            yield unescape(text)
+
+    tail = ''.join(pending) + decoder.decode(b'', final=True)
+    if tail:
+        yield unescape(_TAG.sub('', tail))
+
+
+def extract_body_text(html_bytes, max_chars=None):
+    """從UTF-16 HTML字節提取Body
+
+    max_chars 為 None 時一次解碼完整內容（比逐段解碼快）；否則只解碼到足以產生 max_chars 個字的內容，
+    超過上限時截斷並附加 TRUNCATED_MARKER。
+    """
+    if not html_bytes:
+        return None
+
+    if max_chars is None:
+        return clean_body_text(str(html_bytes, 'utf-16le', 'ignore'))
+
+    pieces = []
+    collected = 0
+    # 保留一些餘量，讓空白合併後的文字仍足以超過上限
+    threshold = max_chars * 2 + 64
+    for piece in iter_html_text(html_bytes):
+        pieces.append(piece)
+        collected += len(piece)
+        if collected < threshold:
+            continue
+        text, settled = normalize_body_text(''.join(pieces))
+        if settled and len(text) > max_chars:
+            return text[:max_chars] + TRUNCATED_MARKER
+        threshold = collected * 2
+
+    text = finish_body_text(''.join(pieces))
+    if text and len(text) > max_chars:
+        return text[:max_chars] + TRUNCATED_MARKER
+    return text
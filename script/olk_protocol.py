@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+.olk15Event 二進制協議索引
+檔頭的屬性標頭為 `tag 00 00 1f` + 4字節小端序長度（0x1f 為 UTF-16 字串型別），
+字串屬性的值依標頭順序緊接著存放在 </html> + 回車符（或 == 分隔符）之後。
+每個檔案只掃描一次檔頭，建立 偏移 → (tag, 長度) 的索引表，之後的欄位都以查表取得；
+組織者只在HTML區段以外的二進制區域搜尋，成本與內文大小無關。
+"""
+
+import re
+
+# 屬性標頭：任意 tag + 00 00 1f（搜尋 tag 之後的 00 00 1f，不會彼此重疊）
+PROPERTY_HEADER_PATTERN = re.compile(rb'\x00\x00\x1f')
+
+# 屬性標頭的大小（標記4字節 + 長度4字節）
+PROPERTY_HEADER_SIZE = 8
+
+# 屬性表在檔頭中的搜尋範圍
+PROPERTY_TABLE_START = 0x100
+PROPERTY_TABLE_END = 0x300
+
+# 已知的字串屬性
+SUBJECT_TAG = 0x02
+LOCATION_TAG = 0x04
+
+# 屬性長度的合理範圍（字節，允許Location為空）
+SUBJECT_LENGTH_RANGE = (2, 500)
+LOCATION_LENGTH_RANGE = (0, 500)
+
+# 組織者電子郵件（byte 正規表示式，UTF-16 文字不會比對成功）
+EMAIL_PATTERN = re.compile(rb'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+
+
+class PropertyTable:
+    """檔頭屬性標頭的索引表（每個檔案只建立一次）"""
+
+    def __init__(self, data, start=PROPERTY_TABLE_START, end=PROPERTY_TABLE_END):
+        self.data = data
+        # 與逐位置搜尋相同的範圍：標頭起點 < min(end, 檔案長度 - 16)
+        self.search_end = min(end, len(data) - 16)
+        self.entries = {}
+        self.by_tag = {}
+        if self.search_end <= start:
+            return
+        # 多索引一個標頭的範圍，讓範圍內最後一個 Subject 標頭仍能找到相鄰的 Location 標頭
+        scan_end = self.search_end + PROPERTY_HEADER_SIZE
+        for match in PROPERTY_HEADER_PATTERN.finditer(data, start + 1, scan_end + 3):
+            offset = match.start() - 1
+            if offset >= scan_end:
+                break
+            tag = data[offset]
+            length = None
+            if offset + PROPERTY_HEADER_SIZE <= len(data):
+                length = int.from_bytes(data[offset + 4:offset + 8], 'little')
+            self.entries[offset] = (tag, length)
+            self.by_tag.setdefault(tag, []).append(offset)
+
+    def offsets(self, tag):
+        """指定 tag 的所有標頭位置（依檔案順序）"""
+        return self.by_tag.get(tag, ())
+
+    def entry(self, offset):
+        """指定位置的 (tag, 長度)，沒有標頭時回傳 None"""
+        return self.entries.get(offset)
+
+    def string_run(self, offset):
+        """從 offset 開始、每8字節相鄰的字串屬性標頭，回傳 [(tag, 長度), ...]
+
+        這些屬性的值依相同順序連續存放在資料區。
+        """
+        run = []
+        entry = self.entries.get(offset)
+        while entry is not None and entry[1] is not None:
+            run.append(entry)
+            offset += PROPERTY_HEADER_SIZE
+            entry = self.entries.get(offset)
+        return run
+
+    def find_subject_location(self, validate=None):
+        """找出 Subject 與 Location 的長度，回傳 (標頭位置, Subject長度, Location長度)
+
+        依序檢查每個 Subject 標頭：8字節後必須是 Location 標頭、長度合理，且通過 validate(subject_len, location_len)。
+        找不到時回傳 (None, None, None)。
+        """
+        data_len = len(self.data)
+        for offset in self.offsets(SUBJECT_TAG):
+            if offset >= self.search_end:
+                break
+            if offset + 12 >= data_len:
+                continue
+            location = self.entries.get(offset + PROPERTY_HEADER_SIZE)
+            if location is None or location[0] != LOCATION_TAG or location[1] is None:
+                continue
+            subject_len = self.entries[offset][1]
+            location_len = location[1]
+            if not (SUBJECT_LENGTH_RANGE[0] <= subject_len <= SUBJECT_LENGTH_RANGE[1] and
+                    LOCATION_LENGTH_RANGE[0] <= location_len <= LOCATION_LENGTH_RANGE[1]):
+                continue
+            if validate is None or validate(subject_len, location_len):
+                return offset, subject_len, location_len
+        return None, None, None
+
+    def string_values(self, offset, values_start):
+        """依字串屬性標頭的順序切出各屬性的原始 UTF-16 字節，回傳 {tag: bytes}
+
+        values_start 為第一個屬性值的位置（</html> + 回車符之後，或 == 之後）；
+        超出檔案範圍的屬性不會包含在結果中。
+        """
+        values = {}
+        position = values_start
+        for tag, length in self.string_run(offset):
+            if position + length > len(self.data):
+                break
+            values.setdefault(tag, self.data[position:position + length])
+            position += length
+        return values
+
+
+def find_organizer(data, skip_start=-1, skip_end=-1):
+    """在二進制區域尋找組織者電子郵件（略過 no-reply）
+
+    skip_start/skip_end 為HTML區段的範圍：UTF-16 HTML 中不會有連續的ASCII電子郵件，
+    只搜尋區段之前與之後的部分。
+    """
+    if skip_start != -1 and skip_end != -1 and skip_start < skip_end:
+        ranges = ((0, skip_start), (skip_end, len(data)))
+    else:
+        ranges = ((0, len(data)),)
+
+    for start, end in ranges:
+        for match in EMAIL_PATTERN.finditer(data, start, end):
+            try:
+                email = match.group().decode('utf-8')
+            except UnicodeDecodeError:
+                continue
+            if '@' in email and not email.startswith('no-reply'):
+                return email
+    return None
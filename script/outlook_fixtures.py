@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+合成的 Outlook 測試資料
+產生含 CalendarEvents 表的 Outlook.sqlite 與對應的 .olk15Event 檔案，
+檔案依已知的格式排列：檔頭的 02 00 00 1f / 04 00 00 1f 長度標記、檔案內時間戳、
+UTF-16 LE HTML、</html> + 回車符之後的 Subject 與 Location。
+可在非 Mac 的環境執行解析器與效能測試。
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import struct
+from datetime import datetime, timezone, timedelta
+
+# 從 1601-01-01 UTC 開始的分鐘數
+FILETIME_EPOCH = datetime(1601, 1, 1, tzinfo=timezone.utc)
+
+SUBJECT_MARKER = b'\x02\x00\x00\x1f'
+LOCATION_MARKER = b'\x04\x00\x00\x1f'
+
+# 檔頭大小與長度標記的位置範圍（解析器在 0x100 ~ 0x300 之間搜尋標記）
+HEADER_BYTES = 0x400
+MARKER_MIN_OFFSET = 0x140
+MARKER_MAX_OFFSET = 0x2c0
+
+# 各語言的主題、地點與內文片段
+LANGUAGE_TEXT = {
+    'en': {
+        'subjects': ["Weekly Sync", "Design review - API v2", "Quarterly planning", "1:1 catch-up",
+                     "Customer onboarding call", "Incident postmortem", "Sprint retrospective"],
+        'locations': ["Room 5", "Microsoft Teams Meeting", "Amazon Chime: 1234567890", "HQ 12F Boardroom"],
+        'paragraphs': ["Hi all, please find the agenda below & bring your notes.",
+                       "Action items from last week are tracked in the shared document.",
+                       "Dial-in details are included at the bottom of this invitation."],
+    },
+    'zh': {
+        'subjects': ["【Online】銷售預測第三階段成果分享", "週會", "產品規劃討論", "Q3 review 會議",
+                     "客戶需求訪談", "系統架構審查"],
+        'locations': ["Taipei 101 會議室", "線上會議", "台北辦公室 8F 大會議室", ""],
+        'paragraphs': ["各位好，以下為本次會議議程，請提前準備相關資料。",
+                       "會議記錄將於會後寄出，如有問題請與主辦人聯繫。",
+                       "請使用公司帳號登入線上會議室。"],
+    },
+    'ja': {
+        'subjects': ["定例ミーティング", "設計レビュー", "四半期計画会議", "顧客打ち合わせ"],
+        'locations': ["会議室A", "東京オフィス 3F", "オンライン"],
+        'paragraphs': ["皆様、お疲れ様です。以下のアジェンダをご確認ください。",
+                       "資料は共有フォルダにアップロード済みです。"],
+    },
+    'ko': {
+        'subjects': ["주간 회의", "디자인 검토", "분기 계획 회의"],
+        'locations': ["회의실 3", "서울 사무소"],
+        'paragraphs': ["안녕하세요, 회의 안건을 아래에 공유드립니다.",
+                       "회의 자료는 공유 폴더에 있습니다."],
+    },
+}
+
+# 事件檔案的排列方式
+# html: 標準格式（</html> + 回車符後接 Subject、Location）
+# eq: 沒有HTML，以 == 分隔符接 Subject、Location
+# no_marker: 檔頭沒有長度標記（解析器需回退到UTF-16字串掃描）
+LAYOUTS = ('html', 'eq', 'no_marker')
+DEFAULT_LAYOUT_WEIGHTS = {'html': 0.9, 'eq': 0.05, 'no_marker': 0.05}
+
+# 填充用的隨機字節不含 0x0d（避免出現時間戳範圍內的32位元值）與 0x3d（避免出現 == 分隔符）
+_FILLER_TABLE = bytes.maketrans(b'\x0d\x3d', b'\x0e\x3e')
+
+
+def _filler(rng, size):
+    return rng.randbytes(size).translate(_FILLER_TABLE)
+
+
+def to_outlook_minutes(dt_utc):
+    """UTC datetime 轉為從 1601-01-01 開始的分鐘數"""
+    return int((dt_utc - FILETIME_EPOCH).total_seconds() // 60)
+
+
+class SyntheticOutlookData:
+    """產生合成的 Outlook 資料目錄（Outlook.sqlite + Events/*.olk15Event）"""
+
+    def __init__(self, root, events=100, seed=0, languages=('en', 'zh'), body_kb=2, image_kb=0,
+                 days=14, layout_weights=None, recurring=0):
+        unknown = [lang for lang in languages if lang not in LANGUAGE_TEXT]
+        if unknown:
+            raise ValueError(f"未知的語言: {', '.join(unknown)}（可用: {', '.join(LANGUAGE_TEXT)}）")
+        self.root = root
+        self.events = events
+        self.seed = seed
+        self.languages = tuple(languages)
+        self.body_kb = body_kb
+        self.image_kb = image_kb
+        self.days = days
+        self.layout_weights = layout_weights or DEFAULT_LAYOUT_WEIGHTS
+        # 每日重複的系列數（每個系列在 days 天內各有一個實例，額外增加 recurring * days 列）
+        self.recurring = recurring
+        self.db_path = os.path.join(root, "Outlook.sqlite")
+
+    def build_html(self, rng, lang, subject):
+        """會議邀請的HTML（約 body_kb KB 的內文，可附加內嵌圖片）"""
+        text = LANGUAGE_TEXT[lang]
+        paragraphs = []
+        size = 0
+        while size < self.body_kb * 1024 // 2:
+            paragraph = f"<p class=MsoNormal><span lang={lang}>{rng.choice(text['paragraphs'])}</span></p>\r\n"
+            paragraphs.append(paragraph)
+            size += len(paragraph)
+        image = ""
+        if self.image_kb:
+            image = '<div><img src="data:image/png;base64,' + 'A' * (self.image_kb * 1024) + '"></div>'
+        return (f"<html><head><title>{subject}</title>"
+                f"<style>p.MsoNormal {{margin:0cm; font-size:11.0pt;}}</style></head>"
+                f"<body>{''.join(paragraphs)}{image}</body></html>")
+
+    def build_event_file(self, rng, layout, subject, location, organizer, start_utc, end_utc, lang):
+        """依格式組出 .olk15Event 的字節內容"""
+        subject_bytes = subject.encode('utf-16le')
+        location_bytes = location.encode('utf-16le')
+
+        # 隨機內容中可能恰好出現標記，先清除
+        header = _filler(rng, HEADER_BYTES).replace(SUBJECT_MARKER, b'\x00' * 4).replace(LOCATION_MARKER, b'\x00' * 4)
+        header = bytearray(header)
+        marker_pos = rng.randrange(MARKER_MIN_OFFSET, MARKER_MAX_OFFSET, 4)
+        if layout != 'no_marker':
+            header[marker_pos:marker_pos + 16] = (SUBJECT_MARKER + struct.pack('<I', len(subject_bytes)) +
+                                                  LOCATION_MARKER + struct.pack('<I', len(location_bytes)))
+
+        # 檔案內時間戳：開始、結束與建立時間（4字節對齊）
+        timestamps = struct.pack('<III', to_outlook_minutes(start_utc), to_outlook_minutes(end_utc),
+                                 to_outlook_minutes(start_utc - timedelta(days=3)))
+        organizer_block = f"{organizer}\x00no-reply@calendar.example.com\x00".encode('ascii')
+        organizer_block += b'\x00' * (-len(organizer_block) % 4)
+
+        parts = [bytes(header), timestamps, organizer_block]
+        if layout == 'eq':
+            parts.append(b'==')
+        else:
+            parts.append(self.build_html(rng, lang, subject).encode('utf-16le'))
+            parts.append(b'\r\x00')
+        parts.append(subject_bytes)
+        parts.append(location_bytes)
+        parts.append(b'\x03\x00\x00\x00')
+        parts.append(_filler(rng, rng.randint(64, 256)))
+        return b''.join(parts)
+
+    def generate(self):
+        """寫入資料庫與事件檔案，回傳每個資料庫列的預期內容（manifest）"""
+        rng = random.Random(self.seed)
+        os.makedirs(self.root, exist_ok=True)
+        if os.path.exists(self.db_path):
+            os.remove(self.db_path)
+
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE CalendarEvents (
+                Record_RecordID INTEGER PRIMARY KEY,
+                Calendar_StartDateUTC INTEGER,
+                Calendar_EndDateUTC INTEGER,
+                PathToDataFile TEXT,
+                Calendar_UID TEXT,
+                Record_ModDate INTEGER
+            )
+        """)
+
+        today_utc = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        window_minutes = max(1, self.days * 24 * 60 - 8 * 60)
+        layouts = list(self.layout_weights)
+        weights = [self.layout_weights[layout] for layout in layouts]
+        mod_date_base = int(today_utc.timestamp()) - 30 * 24 * 3600
+
+        manifest = []
+        rows = []
+        total_bytes = 0
+        for index in range(self.events + self.recurring):
+            lang = rng.choice(self.languages)
+            text = LANGUAGE_TEXT[lang]
+            subject = f"{rng.choice(text['subjects'])} #{index}"
+            location = rng.choice(text['locations'])
+            organizer = f"organizer{index % 50}@example.com"
+            layout = rng.choices(layouts, weights)[0]
+            if index < self.events:
+                start_utc = today_utc + timedelta(minutes=rng.randrange(60, window_minutes))
+                occurrences = 1
+            else:
+                # 每日重複的系列：所有實例共用同一個事件檔案
+                start_utc = today_utc + timedelta(minutes=rng.randrange(60, 16 * 60))
+                occurrences = self.days
+            end_utc = start_utc + timedelta(minutes=rng.choice([15, 30, 60, 90, 120]))
+
+            uid = f"{rng.getrandbits(128):032X}"
+            relative_path = f"Events/{index // 1000}/{uid}.olk15Event"
+            full_path = os.path.join(self.root, relative_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            data = self.build_event_file(rng, layout, subject, location, organizer, start_utc, end_utc, lang)
+            with open(full_path, 'wb') as f:
+                f.write(data)
+            total_bytes += len(data)
+
+            for occurrence in range(occurrences):
+                # 週期性事件的每個實例有各自的UID與資料庫時間
+                occurrence_uid = uid if occurrences == 1 else f"{uid}-{occurrence}"
+                offset = timedelta(days=occurrence)
+                rows.append((len(manifest) + 1, to_outlook_minutes(start_utc + offset),
+                             to_outlook_minutes(end_utc + offset), relative_path, occurrence_uid,
+                             mod_date_base + len(manifest)))
+                manifest.append({
+                    'Calendar_UID': occurrence_uid,
+                    'PathToDataFile': relative_path,
+                    'Subject': subject,
+                    'Location': location,
+                    'Organizer': organizer,
+                    'layout': layout,
+                    'language': lang,
+                    'bytes': len(data),
+                })
+
+            if len(rows) >= 1000:
+                conn.executemany("INSERT INTO CalendarEvents VALUES (?, ?, ?, ?, ?, ?)", rows)
+                rows = []
+
+        if rows:
+            conn.executemany("INSERT INTO CalendarEvents VALUES (?, ?, ?, ?, ?, ?)", rows)
+        conn.commit()
+        conn.close()
+        self.total_bytes = total_bytes
+        return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='產生合成的 Outlook 資料（Outlook.sqlite + .olk15Event 檔案）')
+    parser.add_argument('root', help='輸出目錄（作為 --data-path 使用）')
+    parser.add_argument('--events', '-n', type=int, default=100,
+                       help='事件數量 (預設: 100)')
+    parser.add_argument('--languages', default='en,zh',
+                       help=f"主題/地點/內文使用的語言，以逗號分隔（可用: {','.join(LANGUAGE_TEXT)}，預設: en,zh）")
+    parser.add_argument('--body-kb', type=int, default=2,
+                       help='每個事件的HTML內文大小 KB (預設: 2)')
+    parser.add_argument('--image-kb', type=int, default=0,
+                       help='內嵌圖片大小 KB (預設: 0，不附加)')
+    parser.add_argument('--days', '-d', type=int, default=14,
+                       help='事件分布的天數（從今天開始，預設: 14）')
+    parser.add_argument('--recurring', type=int, default=0,
+                       help='每日重複的系列數，每個系列的所有實例共用同一個事件檔案 (預設: 0)')
+    parser.add_argument('--seed', type=int, default=0,
+                       help='亂數種子 (預設: 0)')
+    args = parser.parse_args()
+
+    fixture = SyntheticOutlookData(args.root, events=args.events, seed=args.seed,
+                                   languages=[lang.strip() for lang in args.languages.split(',') if lang.strip()],
+                                   body_kb=args.body_kb, image_kb=args.image_kb, days=args.days,
+                                   recurring=args.recurring)
+    manifest = fixture.generate()
+    print(f"已產生 {len(manifest)} 個事件（{fixture.total_bytes / 1024 / 1024:.1f} MB）到 {args.root}")
+    print(f"使用方式: uv run script/dump_outlook_calendar.py --data-path {args.root}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Outlook.sqlite 唯讀快照連線
+以唯讀 URI 開啟正在被 Outlook 寫入的資料庫，可選擇先用 backup API 複製一致的快照，
+遇到鎖定時以退避重試並記錄等待時間
+"""
+
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+
+def is_lock_error(error):
+    """判斷是否為資料庫鎖定/忙碌錯誤"""
+    message = str(error).lower()
+    return 'locked' in message or 'busy' in message
+
+
+class OutlookSnapshot:
+    """Outlook.sqlite 的唯讀連線（或一致性快照）"""
+
+    def __init__(self, db_path, use_backup=False, busy_timeout=1.0, busy_retries=5, backoff_seconds=0.1,
+                 mmap_size=256 * 1024 * 1024, cache_size_kib=64 * 1024):
+        self.db_path = db_path
+        self.use_backup = use_backup
+        self.busy_timeout = busy_timeout
+        self.busy_retries = busy_retries
+        self.backoff_seconds = backoff_seconds
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.conn = None
+        self.snapshot_path = None
+        self.lock_wait_seconds = 0.0
+        self.retry_count = 0
+
+    def _retry(self, action, description):
+        """執行 action，遇到鎖定時以指數退避重試，並累計等待時間
+
+        成功的呼叫也可能在 SQLite 的 busy handler（連線的 timeout）中等待過鎖，
+        無法與實際執行時間分開，因此每次呼叫的時間都計入等待時間（上限估計）。
+        """
+        for attempt in range(self.busy_retries + 1):
+            started = time.perf_counter()
+            try:
+                return action()
+            except sqlite3.OperationalError as e:
+                if not is_lock_error(e) or attempt == self.busy_retries:
+                    raise
+                delay = self.backoff_seconds * (2 ** attempt)
+                self.retry_count += 1
+                print(f"資料庫鎖定（{description}），{delay:.2f} 秒後重試 ({attempt + 1}/{self.busy_retries})")
+                time.sleep(delay)
+            finally:
+                self.lock_wait_seconds += time.perf_counter() - started
+
+    def _connect_readonly(self):
+        uri = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=self.busy_timeout)
+        try:
+            conn.execute("PRAGMA query_only = ON")
+            self._tune(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _tune(self, conn):
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+
+    def _copy_snapshot(self, source):
+        """以 backup API 將資料庫一次複製到暫存檔，之後的查詢不再持有 Outlook.sqlite 的鎖"""
+        fd, self.snapshot_path = tempfile.mkstemp(prefix="outlook_snapshot_", suffix=".sqlite")
+        os.close(fd)
+        target = sqlite3.connect(self.snapshot_path)
+        try:
+            source.backup(target)
+        except Exception:
+            target.close()
+            os.remove(self.snapshot_path)
+            self.snapshot_path = None
+            raise
+        return target
+
+    def connect(self):
+        """開啟連線（唯讀或快照）"""
+        if self.conn is not None:
+            return self.conn
+
+        source = self._retry(self._connect_readonly, "開啟資料庫")
+        if self.use_backup:
+            try:
+                self.conn = self._retry(lambda: self._copy_snapshot(source), "複製快照")
+            finally:
+                source.close()
+            self._tune(self.conn)
+        else:
+            self.conn = source
+        return self.conn
+
+    def execute(self, query, params=()):
+        """執行查詢（鎖定時重試），回傳游標"""
+        conn = self.connect()
+        return self._retry(lambda: conn.execute(query, params), "查詢")
+
+    def fetchall(self, query, params=()):
+        """執行查詢並一次讀完所有列（查詢與讀取一起在鎖定時重試），讀完後即釋放讀取交易"""
+        conn = self.connect()
+        return self._retry(lambda: conn.execute(query, params).fetchall(), "查詢")
+
+    def report(self):
+        """鎖定等待時間摘要"""
+        mode = "快照" if self.use_backup else "唯讀"
+        return f"資料庫連線({mode}) 鎖定等待（含查詢時間）: {self.lock_wait_seconds:.3f} 秒，重試 {self.retry_count} 次"
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+        if self.snapshot_path:
+            try:
+                os.remove(self.snapshot_path)
+            except OSError:
+                pass
+            self.snapshot_path = None
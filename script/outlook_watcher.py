@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Outlook.sqlite 變更監看器
+輪詢資料庫與 -wal 檔案的 mtime/大小以及 PRAGMA data_version，合併連續寫入後觸發匯出
+"""
+
+import os
+import sqlite3
+import time
+
+
+class OutlookDatabaseWatcher:
+    """低成本偵測 Outlook.sqlite 的變更（不讀取事件檔案）"""
+
+    def __init__(self, db_path, poll_interval=2.0, debounce_seconds=5.0, max_delay_seconds=60.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.debounce_seconds = debounce_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.clock = clock
+        self.sleep = sleep
+        self.conn = None
+        self.last_signature = None
+
+    def _stat(self, path):
+        """回傳 (mtime_ns, 大小)，檔案不存在時回傳 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _data_version(self):
+        """PRAGMA data_version：其他連線提交變更時就會改變"""
+        try:
+            if self.conn is None:
+                self.conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+            return self.conn.execute("PRAGMA data_version").fetchone()[0]
+        except sqlite3.Error:
+            # 無法開啟時只依賴檔案狀態
+            self.close()
+            return None
+
+    def signature(self):
+        """目前資料庫狀態的簽章"""
+        return (
+            self._stat(self.db_path),
+            self._stat(self.db_path + "-wal"),
+            self._data_version(),
+        )
+
+    def has_changed(self):
+        """與上次檢查相比是否有變更（第一次呼叫只記錄狀態）"""
+        current = self.signature()
+        changed = self.last_signature is not None and current != self.last_signature
+        self.last_signature = current
+        return changed
+
+    def wait_for_change(self, should_stop=None):
+        """等待變更並合併連續寫入：變更後安靜 debounce_seconds（最多延遲 max_delay_seconds）才回傳
+
+        should_stop() 回傳 True 時立即回傳 False。
+        """
+        if self.last_signature is None:
+            self.has_changed()
+
+        while not self.has_changed():
+            if should_stop and should_stop():
+                return False
+            self.sleep(self.poll_interval)
+
+        first_change = self.clock()
+        last_change = first_change
+        while True:
+            now = self.clock()
+            if now - last_change >= self.debounce_seconds or now - first_change >= self.max_delay_seconds:
+                return True
+            if should_stop and should_stop():
+                return False
+            self.sleep(min(self.poll_interval, self.debounce_seconds))
+            if self.has_changed():
+                last_change = self.clock()
+
+    def run(self, on_change, run_immediately=True, max_runs=None, should_stop=None):
+        """持續監看並在每次變更後呼叫 on_change()，回傳執行次數"""
+        runs = 0
+        self.has_changed()
+        if run_immediately:
+            on_change()
+            runs += 1
+
+        while max_runs is None or runs < max_runs:
+            if not self.wait_for_change(should_stop):
+                break
+            print(f"\n偵測到 Outlook 資料庫變更，重新匯出 ({time.strftime('%Y-%m-%d %H:%M:%S')})")
+            # 簽章在匯出前記錄，匯出期間的寫入會在下一輪被偵測到
+            on_change()
+            runs += 1
+
+        return runs
+
+    def close(self):
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except sqlite3.Error:
+                pass
+            self.conn = None
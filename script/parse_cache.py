@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+.olk15Event 解析結果快取
+以 SQLite 檔案保存每個事件檔案的解析結果，檔案未變更時直接重用
+"""
+
+import os
+import sqlite3
+import time
+
+# 快取的解析欄位（parse_event_file 回傳的內容）
+CACHED_FIELDS = ('subject', 'location', 'organizer', 'body', 'duration')
+
+
+class ParseCache:
+    """以 (PathToDataFile, Record_ModDate, 檔案大小, mtime) 為鍵的解析結果快取"""
+
+    def __init__(self, cache_path="data/parse_cache.sqlite", max_entries=20000, max_age_days=30):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.conn = None
+        self.hits = 0
+        self.misses = 0
+        self._touched = []
+
+    def open(self):
+        """開啟（或建立）快取資料庫，失敗時回傳 False"""
+        try:
+            # 同步管線在解析執行緒中使用快取（同一時間只有一個執行緒存取）
+            self.conn = sqlite3.connect(self.cache_path, check_same_thread=False)
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS parse_cache (
+                    path TEXT NOT NULL,
+                    record_mod_date INTEGER,
+                    file_size INTEGER NOT NULL,
+                    file_mtime REAL NOT NULL,
+                    variant TEXT NOT NULL,
+                    subject TEXT,
+                    location TEXT,
+                    organizer TEXT,
+                    body TEXT,
+                    duration REAL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (path, record_mod_date, file_size, file_mtime, variant)
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_parse_cache_last_used ON parse_cache (last_used)")
+            self.conn.commit()
+            return True
+        except Exception as e:
+            print(f"無法開啟解析快取 {self.cache_path}: {e}")
+            self.conn = None
+            return False
+
+    def get(self, path, record_mod_date, file_size, file_mtime, variant=""):
+        """查詢快取，命中時回傳解析欄位 dict，否則回傳 None"""
+        if not self.conn:
+            return None
+
+        row = self.conn.execute("""
+            SELECT subject, location, organizer, body, duration
+            FROM parse_cache
+            WHERE path = ? AND record_mod_date IS ? AND file_size = ? AND file_mtime = ? AND variant = ?
+        """, (path, record_mod_date, file_size, file_mtime, variant)).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._touched.append((path, record_mod_date, file_size, file_mtime, variant))
+        return dict(zip(CACHED_FIELDS, row))
+
+    def put(self, path, record_mod_date, file_size, file_mtime, event_data, variant=""):
+        """寫入解析結果
+
+        只取代同一變體中檔案大小或 mtime 不同的舊版本（檔案已變更）；
+        其他變體（例如不同的 --max-body）與同一檔案其他 Record_ModDate 的項目保留，交給 LRU 淘汰。
+        """
+        if not self.conn:
+            return
+
+        now = time.time()
+        self.conn.execute("""
+            DELETE FROM parse_cache
+            WHERE path = ? AND variant = ? AND (file_size != ? OR file_mtime != ?)
+        """, (path, variant, file_size, file_mtime))
+        self.conn.execute("""
+            INSERT OR REPLACE INTO parse_cache
+                (path, record_mod_date, file_size, file_mtime, variant,
+                 subject, location, organizer, body, duration, created_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (path, record_mod_date, file_size, file_mtime, variant,
+              *(event_data.get(field) for field in CACHED_FIELDS), now, now))
+
+    def evict(self):
+        """依最後使用時間淘汰過期項目，並限制總筆數"""
+        if not self.conn:
+            return 0
+
+        cutoff = time.time() - self.max_age_days * 24 * 3600
+        removed = self.conn.execute("DELETE FROM parse_cache WHERE last_used < ?", (cutoff,)).rowcount
+
+        count = self.conn.execute("SELECT COUNT(*) FROM parse_cache").fetchone()[0]
+        if count > self.max_entries:
+            removed += self.conn.execute("""
+                DELETE FROM parse_cache WHERE rowid IN (
+                    SELECT rowid FROM parse_cache ORDER BY last_used LIMIT ?
+                )
+            """, (count - self.max_entries,)).rowcount
+        return removed
+
+    def flush(self):
+        """更新命中項目的使用時間並提交（保持資料庫開啟，供監看模式重複使用）"""
+        if not self.conn:
+            return
+
+        try:
+            now = time.time()
+            self.conn.executemany("""
+                UPDATE parse_cache SET last_used = ?
+                WHERE path = ? AND record_mod_date IS ? AND file_size = ? AND file_mtime = ? AND variant = ?
+            """, ((now, *key) for key in self._touched))
+            self.conn.commit()
+        except Exception as e:
+            print(f"更新解析快取失敗: {e}")
+        finally:
+            self._touched = []
+
+    def close(self):
+        """提交變更、淘汰舊項目並關閉資料庫"""
+        if not self.conn:
+            return
+
+        try:
+            self.flush()
+            removed = self.evict()
+            self.conn.commit()
+            if removed:
+                print(f"解析快取已淘汰 {removed} 筆舊項目")
+        except Exception as e:
+            print(f"淘汰解析快取失敗: {e}")
+        finally:
+            self.conn.close()
+            self.conn = None
+
+    @staticmethod
+    def stat_key(full_path):
+        """取得檔案大小與 mtime（檔案不存在時回傳 None）"""
+        try:
+            st = os.stat(full_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Google Calendar 遠端事件索引
+目標日曆的本機鏡像：第一次完整列出所有事件（依 nextPageToken 讀完所有分頁），
+之後以 events().list(syncToken=...) 只取得上次之後變更的事件（syncToken 失效的 410 時重新完整列出）。
+以 extendedProperties.private 中的 Outlook UID（舊事件則從描述中解析）建立 UID → 事件 的索引，
+供新增/更新、刪除檢測、刪除標記與過期清理共用；鏡像與 syncToken 存放在 sync_cache.json 旁邊。
+"""
+
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from calendar_batch import http_status
+
+# 每頁事件數（API上限）
+PAGE_SIZE = 2500
+
+# 鏡像檔案的格式版本（格式改變時重新完整列出）
+STATE_VERSION = 1
+
+# 同步器寫入 extendedProperties.private 的鍵
+UID_PROPERTY = 'outlookUid'
+MOD_DATE_PROPERTY = 'outlookModDate'
+CONTENT_HASH_PROPERTY = 'outlookContentHash'
+
+# 描述中的 Outlook UID 標記（沒有 extendedProperties 的舊事件，同步器寫入的兩種格式）
+UID_PATTERNS = (
+    re.compile(r'\[Outlook Calendar UID: ([^\]\n]+)\]'),
+    re.compile(r'Outlook UID: ([^\s\\\]]+)'),
+)
+
+
+def private_properties(event):
+    """事件的 extendedProperties.private"""
+    return (event.get('extendedProperties') or {}).get('private') or {}
+
+
+def extract_outlook_uid(event):
+    """取出事件對應的 Outlook UID：優先使用 extendedProperties.private，其次為描述中的標記"""
+    uid = private_properties(event).get(UID_PROPERTY)
+    if uid:
+        return uid
+    description = event.get('description', '')
+    if not description:
+        return None
+    for pattern in UID_PATTERNS:
+        match = pattern.search(description)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def event_start(event):
+    """事件開始時間（UTC datetime；全天事件為當天 00:00 UTC，無法解析時回傳 None）"""
+    start = event.get('start', {})
+    value = start.get('dateTime') or start.get('date')
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+class RemoteEventIndex:
+    """目標日曆的 UID 索引（以 syncToken 增量更新的本機鏡像）"""
+
+    def __init__(self, service, calendar_id, state_path=None, executor=None):
+        self.service = service
+        self.executor = executor
+        self.calendar_id = calendar_id
+        self.state_path = state_path
+        self.events = {}
+        # UID → 事件ID（依加入順序的 dict 當作有序集合，第一個為查詢結果）
+        self.uid_ids = {}
+        self.sync_token = None
+        self.pages = 0
+        self.changed = 0
+        self.full_sync = False
+        # 鏡像自上次讀取/儲存後是否有變更（沒有變更時不重寫鏡像檔案）
+        self.dirty = False
+
+    def _reset(self):
+        self.events = {}
+        self.uid_ids = {}
+        self.sync_token = None
+        self.dirty = True
+
+    def _list_pages(self, **params):
+        """讀完所有分頁，逐一產生事件；最後一頁的 nextSyncToken 存入 self.sync_token"""
+        page_token = None
+        while True:
+            request = self.service.events().list(
+                calendarId=self.calendar_id,
+                singleEvents=True,
+                maxResults=PAGE_SIZE,
+                pageToken=page_token,
+                **params
+            )
+            # 經由API執行層時會依配額限速，並重試暫時性的錯誤
+            result = self.executor.execute(request) if self.executor else request.execute()
+            self.pages += 1
+            yield from result.get('items', [])
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                self.sync_token = result.get('nextSyncToken')
+                return
+
+    def load(self):
+        """更新鏡像：有 syncToken 時只取得變更的事件，否則（或 token 失效時）完整列出，回傳事件數"""
+        self.pages = 0
+        self.changed = 0
+        self.full_sync = False
+        if self.sync_token is None:
+            self.load_state()
+
+        if self.sync_token is not None:
+            token = self.sync_token
+            try:
+                # 先收集所有分頁，token 中途失效時不會套用一半的變更
+                changes = list(self._list_pages(syncToken=token))
+            except Exception as e:
+                if http_status(e) != 410:
+                    raise
+                print("ℹ️ Google Calendar syncToken 已失效，重新完整列出事件")
+                self._reset()
+            else:
+                for event in changes:
+                    if event.get('status') == 'cancelled':
+                        self.remove(event['id'])
+                    else:
+                        self.put(event)
+                self.changed = len(changes)
+                return len(self.events)
+
+        self.full_sync = True
+        self._reset()
+        for event in self._list_pages():
+            self.put(event)
+        self.changed = len(self.events)
+        return len(self.events)
+
+    def load_state(self):
+        """讀取上次儲存的鏡像與 syncToken（日曆不同或格式不符時忽略）"""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except Exception as e:
+            print(f"載入遠端事件鏡像失敗: {e}")
+            return False
+        if state.get('version') != STATE_VERSION or state.get('calendar_id') != self.calendar_id:
+            return False
+        self._reset()
+        for event in state.get('events', []):
+            self.put(event)
+        self.sync_token = state.get('sync_token')
+        self.dirty = False
+        return True
+
+    def save_state(self):
+        """儲存鏡像與 syncToken（先寫入暫存檔再取代，避免中斷時留下不完整的檔案）
+
+        沒有任何變更時（syncToken 沒有取得新事件、也沒有寫入）不重寫檔案，繼續使用舊的 syncToken。
+        """
+        if not self.state_path or self.sync_token is None or not self.dirty:
+            return
+        state = {
+            'version': STATE_VERSION,
+            'calendar_id': self.calendar_id,
+            'sync_token': self.sync_token,
+            'saved_at': datetime.now(timezone.utc).isoformat(),
+            'events': list(self.events.values()),
+        }
+        temp_path = self.state_path + '.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(temp_path, self.state_path)
+            self.dirty = False
+        except Exception as e:
+            print(f"儲存遠端事件鏡像失敗: {e}")
+
+    def put(self, event):
+        """加入或更新事件（新增/更新請求的回應）"""
+        if not event or 'id' not in event:
+            return
+        event_id = event['id']
+        previous = self.events.get(event_id)
+        self.events[event_id] = event
+        self.dirty = True
+        uid = extract_outlook_uid(event)
+        if previous is not None:
+            previous_uid = extract_outlook_uid(previous)
+            if previous_uid == uid:
+                return
+            self._unlink(previous_uid, event_id)
+        if uid:
+            # 同一個UID有多個事件時以第一個加入的為準（與逐一搜尋時取第一個相符事件相同）
+            self.uid_ids.setdefault(uid, {})[event_id] = None
+
+    def remove(self, event_id):
+        """移除已刪除的事件"""
+        event = self.events.pop(event_id, None)
+        if event is not None:
+            self.dirty = True
+            self._unlink(extract_outlook_uid(event), event_id)
+
+    def _unlink(self, uid, event_id):
+        ids = self.uid_ids.get(uid)
+        if ids is None:
+            return
+        ids.pop(event_id, None)
+        if not ids:
+            del self.uid_ids[uid]
+
+    def find(self, outlook_uid):
+        """以 Outlook UID 查詢對應的事件"""
+        ids = self.uid_ids.get(str(outlook_uid))
+        return self.events[next(iter(ids))] if ids else None
+
+    def started_before(self, cutoff):
+        """開始時間早於 cutoff 的事件（依開始時間排序）"""
+        events = [(event_start(event), event) for event in self.events.values()]
+        events = [(start, event) for start, event in events if start is not None and start < cutoff]
+        return [event for start, event in sorted(events, key=lambda item: item[0])]
+
+    def report(self):
+        mode = "完整列出" if self.full_sync else "syncToken 增量更新"
+        return (f"遠端事件鏡像（{mode}）: 變更 {self.changed} 個，共 {len(self.events)} 個事件"
+                f"（{len(self.uid_ids)} 個 Outlook UID），讀取 {self.pages} 頁")
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+匯出流程的分階段計時與計數
+記錄每個階段的累計時間與次數、讀取的字節數、最慢的事件檔案，輸出為JSON報告
+"""
+
+import contextlib
+import heapq
+import json
+import time
+from datetime import datetime, timezone
+
+# 報告中的階段順序（其他階段依名稱排在後面）
+STAGE_ORDER = (
+    'mirror_refresh', 'sql_query', 'sql_fetch', 'file_read', 'html_search', 'binary_protocol', 'utf16_scan',
+    'organizer', 'body', 'timestamp_scan', 'text_clean', 'write',
+)
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class RunProfiler:
+    """分階段計時器；enabled=False 時所有操作都是空操作"""
+
+    def __init__(self, enabled=True, slowest=10, clock=time.perf_counter):
+        self.enabled = enabled
+        self.slowest = slowest
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        self.stage_seconds = {}
+        self.stage_counts = {}
+        self.counters = {}
+        self._slow_files = []
+        self.started = self.clock()
+
+    @contextlib.contextmanager
+    def _timed(self, name):
+        started = self.clock()
+        try:
+            yield
+        finally:
+            self.add_time(name, self.clock() - started)
+
+    def stage(self, name):
+        """計時區塊：with profiler.stage('file_read'): ..."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timed(name)
+
+    def add_time(self, name, seconds, count=1):
+        if not self.enabled:
+            return
+        self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+        self.stage_counts[name] = self.stage_counts.get(name, 0) + count
+
+    def count(self, name, value=1):
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def record_file(self, path, seconds, size):
+        """記錄單一事件檔案的解析時間，只保留最慢的 N 個"""
+        if not self.enabled or self.slowest <= 0:
+            return
+        entry = (seconds, path, size)
+        if len(self._slow_files) < self.slowest:
+            heapq.heappush(self._slow_files, entry)
+        elif entry > self._slow_files[0]:
+            heapq.heapreplace(self._slow_files, entry)
+
+    def snapshot(self):
+        """可傳回主行程合併的統計（子行程使用）"""
+        return {
+            'stage_seconds': dict(self.stage_seconds),
+            'stage_counts': dict(self.stage_counts),
+            'counters': dict(self.counters),
+            'slow_files': list(self._slow_files),
+        }
+
+    def merge(self, snapshot):
+        """合併子行程的統計"""
+        if not self.enabled or not snapshot:
+            return
+        for name, seconds in snapshot['stage_seconds'].items():
+            self.add_time(name, seconds, snapshot['stage_counts'].get(name, 0))
+        for name, value in snapshot['counters'].items():
+            self.count(name, value)
+        for seconds, path, size in snapshot['slow_files']:
+            self.record_file(path, seconds, size)
+
+    def report(self):
+        """JSON報告內容"""
+        order = {name: index for index, name in enumerate(STAGE_ORDER)}
+        stages = sorted(self.stage_seconds, key=lambda name: (order.get(name, len(order)), name))
+        return {
+            'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC'),
+            'wall_seconds': round(self.clock() - self.started, 6),
+            'stages': {
+                name: {
+                    'seconds': round(self.stage_seconds[name], 6),
+                    'count': self.stage_counts.get(name, 0),
+                }
+                for name in stages
+            },
+            'counters': dict(sorted(self.counters.items())),
+            'slowest_files': [
+                {'path': path, 'seconds': round(seconds, 6), 'bytes': size}
+                for seconds, path, size in sorted(self._slow_files, reverse=True)
+            ],
+        }
+
+    def save(self, report_path):
+        """寫入JSON報告並回傳內容"""
+        report = self.report()
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def summary(self, report=None):
+        """各階段時間的簡短摘要（一行一個階段）"""
+        report = report or self.report()
+        lines = [f"總時間: {report['wall_seconds']:.3f} 秒"]
+        for name, stage in report['stages'].items():
+            lines.append(f"  {name:<16} {stage['seconds']:>9.3f} 秒  ({stage['count']} 次)")
+        for name, value in report['counters'].items():
+            lines.append(f"  {name:<16} {value}")
+        return '\n'.join(lines)
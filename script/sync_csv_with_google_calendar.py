@@ -16,6 +16,21 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
+import google_auth_httplib2
+import httplib2
+
+import event_formats
+from calendar_mirror import CalendarMirror
+from calendar_batch import CalendarWriteBatcher, MAX_BATCH_SIZE, http_status
+from api_executor import ApiExecutor, DEFAULT_CONCURRENCY, DEFAULT_USER_QPS, DEFAULT_CALENDAR_QPS
+from remote_index import (RemoteEventIndex, event_start, UID_PROPERTY, MOD_DATE_PROPERTY,
+                          CONTENT_HASH_PROPERTY)
+
+# 上次同步的內容雜湊（與 sync_cache.json 分開存放，舊的快取檔案格式不變）
+CONTENT_HASH_CACHE = "data/sync_content_hashes.json"
+
+# 目標日曆的本機鏡像與 syncToken
+REMOTE_STATE_CACHE = "data/google_calendar_mirror.json"
 
 class OutlookToGoogleCalendarSync:
     def __init__(self, csv_path="data/dump_outlook_calendar.csv", 
@@ -24,19 +39,43 @@ class OutlookToGoogleCalendarSync:
                  force_update=False,
                  mark_deleted=True,
                  cleanup_days=2,
-                 enable_cleanup=True):
+                 enable_cleanup=True,
+                 mirror=None,
+                 batch_size=MAX_BATCH_SIZE,
+                 concurrency=DEFAULT_CONCURRENCY,
+                 user_qps=DEFAULT_USER_QPS,
+                 calendar_qps=DEFAULT_CALENDAR_QPS):
         self.csv_path = csv_path
         self.cache_path = "data/sync_cache.json"
+        self.content_hash_path = CONTENT_HASH_CACHE
         self.token_path = "data/token.json"
         self.client_secret_file = client_secret_file
         self.calendar_id = calendar_id
         self.scopes = ['https://www.googleapis.com/auth/calendar']
         self.service = None
+        self.credentials = None
         self.cache = {}
+        # 上次寫入 Google Calendar 的內容雜湊（UID → Content_Hash）
+        self.content_hashes = {}
+        self.skipped_unchanged_content = 0
         self.force_update = force_update
         self.mark_deleted = mark_deleted
         self.cleanup_days = cleanup_days
         self.enable_cleanup = enable_cleanup
+        # CalendarEvents 本機鏡像：刪除檢測直接查詢UID，不需要逐一查詢 Google Calendar
+        self.mirror = mirror
+        # 寫入請求以 BatchHttpRequest 批次送出（1 表示逐一執行）
+        self.batch_size = batch_size
+        self.batcher = None
+        self.failed_writes = 0
+        # API執行層：並行送出批次、配額限速與退避重試
+        self.concurrency = concurrency
+        self.user_qps = user_qps
+        self.calendar_qps = calendar_qps
+        self.executor = None
+        # 目標日曆的本機鏡像與 UID 索引（以 syncToken 增量更新，存放在 sync_cache.json 旁邊）
+        self.remote_state_path = REMOTE_STATE_CACHE
+        self.remote_index = None
         
     def authenticate(self):
         """Google Calendar API 認證"""
@@ -140,6 +179,7 @@ class OutlookToGoogleCalendarSync:
             print(f"💾 憑證已保存到: {self.token_path}")
         
         self.service = build('calendar', 'v3', credentials=creds)
+        self.credentials = creds
         print("✅ Google Calendar API 認證成功")
         
         # 顯示憑證維護提示
@@ -184,6 +224,35 @@ class OutlookToGoogleCalendarSync:
         print("   • 刷新失敗時會提示重新授權")
         print("   • 透明處理，用戶無感知")
     
+    def api_executor(self):
+        """API執行層（每個執行緒使用自己的授權 HTTP 連線）"""
+        if self.executor is None:
+            http_factory = None
+            if self.credentials is not None:
+                credentials = self.credentials
+                http_factory = lambda: google_auth_httplib2.AuthorizedHttp(credentials, http=httplib2.Http())
+            self.executor = ApiExecutor(http_factory, concurrency=self.concurrency,
+                                        user_qps=self.user_qps, calendar_qps=self.calendar_qps)
+        return self.executor
+    
+    def write_batcher(self):
+        """目前服務的寫入批次器（重新驗證後會建立新的批次器）"""
+        if self.batcher is None or self.batcher.service is not self.service:
+            self.batcher = CalendarWriteBatcher(self.service, batch_size=self.batch_size,
+                                                executor=self.api_executor())
+        return self.batcher
+    
+    def get_remote_index(self):
+        """目標日曆的 UID 索引：第一次使用時以 syncToken 取得上次之後變更的事件（沒有鏡像時完整列出）"""
+        if (self.remote_index is None or self.remote_index.service is not self.service or
+                self.remote_index.calendar_id != self.calendar_id):
+            index = RemoteEventIndex(self.service, self.calendar_id, self.remote_state_path,
+                                     executor=self.api_executor())
+            index.load()
+            self.remote_index = index
+            print(f"🔍 {index.report()}")
+        return self.remote_index
+    
     def cleanup_expired_events(self, days_threshold=2):
         """清理過期的事件
         
@@ -195,21 +264,13 @@ class OutlookToGoogleCalendarSync:
             
             # 計算過期時間點（前天 23:59:59）
             cutoff_date = datetime.now(timezone.utc) - timedelta(days=days_threshold)
-            cutoff_str = cutoff_date.strftime('%Y-%m-%dT%H:%M:%SZ')
             
             print(f"🗑️ 開始清理 {days_threshold} 天前的過期事件...")
             print(f"📅 清理截止時間: {cutoff_date.strftime('%Y-%m-%d %H:%M:%S UTC')}")
             
-            # 搜索過期事件
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMax=cutoff_str,  # 結束時間在截止時間之前的事件
-                maxResults=2500,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            expired_events = events_result.get('items', [])
+            # 從遠端索引找出開始時間在截止時間之前的事件
+            index = self.get_remote_index()
+            expired_events = index.started_before(cutoff_date)
             
             if not expired_events:
                 print("✅ 沒有找到需要清理的過期事件")
@@ -217,9 +278,22 @@ class OutlookToGoogleCalendarSync:
             
             print(f"🔍 找到 {len(expired_events)} 個過期事件")
             
-            # 刪除過期事件
+            # 刪除過期事件（批次送出）
             deleted_count = 0
             failed_count = 0
+            batcher = self.write_batcher()
+            
+            def on_deleted(event_id, event_title, event_start):
+                def callback(response, exception):
+                    nonlocal deleted_count, failed_count
+                    if exception is not None:
+                        failed_count += 1
+                        print(f"❌ 刪除失敗: {event_title} - {exception}")
+                    else:
+                        deleted_count += 1
+                        index.remove(event_id)
+                        print(f"🗑️ 已刪除: {event_title} ({event_start})")
+                return callback
             
             for event in expired_events:
                 try:
@@ -239,13 +313,10 @@ class OutlookToGoogleCalendarSync:
                     )
                     
                     if is_outlook_event:
-                        self.service.events().delete(
+                        batcher.add(self.service.events().delete(
                             calendarId=self.calendar_id,
                             eventId=event_id
-                        ).execute()
-                        
-                        deleted_count += 1
-                        print(f"🗑️ 已刪除: {event_title} ({event_start})")
+                        ), on_deleted(event_id, event_title, event_start))
                     else:
                         print(f"⏭️ 跳過非同步事件: {event_title}")
                         
@@ -253,6 +324,7 @@ class OutlookToGoogleCalendarSync:
                     failed_count += 1
                     print(f"❌ 刪除失敗: {event_title} - {e}")
             
+            batcher.flush()
             print(f"\n🎉 過期事件清理完成!")
             print(f"✅ 成功刪除: {deleted_count} 個事件")
             if failed_count > 0:
@@ -332,6 +404,14 @@ class OutlookToGoogleCalendarSync:
                 self.cache = {}
         else:
             self.cache = {}
+        
+        self.content_hashes = {}
+        if os.path.exists(self.content_hash_path):
+            try:
+                with open(self.content_hash_path, "r", encoding='utf-8') as f:
+                    self.content_hashes = json.load(f)
+            except Exception as e:
+                print(f"載入內容雜湊失敗: {e}")
     
     def save_cache(self):
         """儲存本地快取"""
@@ -341,6 +421,21 @@ class OutlookToGoogleCalendarSync:
             print(f"💾 快取已儲存: {len(self.cache)} 個事件")
         except Exception as e:
             print(f"儲存快取失敗: {e}")
+        
+        try:
+            # 只保留仍在快取中的事件
+            content_hashes = {uid: value for uid, value in self.content_hashes.items() if uid in self.cache}
+            with open(self.content_hash_path, "w", encoding='utf-8') as f:
+                json.dump(content_hashes, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            print(f"儲存內容雜湊失敗: {e}")
+    
+    def row_content_hash(self, row):
+        """匯出檔中的 Content_Hash（舊版匯出檔沒有此欄位時回傳 None）"""
+        value = row.get('Content_Hash')
+        if value is None or pd.isna(value) or not str(value).strip():
+            return None
+        return str(value)
     
     def detect_deleted_events(self, current_events_df):
         """檢測已刪除的事件（排除超出時間範圍的事件）"""
@@ -363,17 +458,26 @@ class OutlookToGoogleCalendarSync:
             print("⚠️ 當前CSV為空，無法確定時間範圍")
             return []
         
-        # 從快取中找出不再存在於當前CSV的事件
+        return self.detect_deleted_uids(current_uids, current_range_start, current_range_end)
+    
+    def detect_deleted_uids(self, current_uids, current_range_start, current_range_end):
+        """從快取中找出不在 current_uids 中、且不是單純超出時間範圍的事件"""
         deleted_events = []
         cache_uids = set(self.cache.keys())
         print(f"🔍 快取中有 {len(cache_uids)} 個事件")
         
+        missing_uids = cache_uids - current_uids
+        mirror_states = self.mirror.lookup_uids(missing_uids) if self.mirror and missing_uids else {}
+        
         for outlook_uid in cache_uids:
             if outlook_uid not in current_uids:
                 # 檢查這個事件是否可能只是超出了時間範圍
-                is_likely_out_of_range = self.check_if_event_out_of_range(
-                    outlook_uid, current_range_start, current_range_end
-                )
+                if outlook_uid in mirror_states:
+                    is_likely_out_of_range = self.check_mirror_state(outlook_uid, *mirror_states[outlook_uid])
+                else:
+                    is_likely_out_of_range = self.check_if_event_out_of_range(
+                        outlook_uid, current_range_start, current_range_end
+                    )
                 
                 if not is_likely_out_of_range:
                     # 只有當事件不是因為超出範圍才被認為是真正刪除
@@ -389,52 +493,38 @@ class OutlookToGoogleCalendarSync:
         
         return deleted_events
     
+    def check_mirror_state(self, outlook_uid, start_utc, deleted):
+        """依本機鏡像判斷事件是否只是超出時間範圍（仍在Outlook中，或是已刪除的過去事件）"""
+        if not deleted:
+            print(f"⏰ 事件 {outlook_uid[:20]}... 仍在Outlook中（{start_utc.date() if start_utc else '未知時間'}），不在匯出範圍內")
+            return True
+        
+        today = datetime.date.today()
+        if start_utc and start_utc.date() < today:
+            print(f"📅 事件 {outlook_uid[:20]}... 在 {start_utc.date()}（過去），跳過刪除檢測")
+            return True
+        
+        print(f"🔮 事件 {outlook_uid[:20]}... 已從Outlook刪除（{start_utc.date() if start_utc else '未知時間'}）")
+        return False
+    
     def check_if_event_out_of_range(self, outlook_uid, current_range_start, current_range_end):
         """檢查事件是否為過去事件（過去事件不應被標記為刪除）"""
         try:
-            # 獲取Google Calendar中的事件來確定其時間
-            from datetime import datetime, timedelta, date
-            
-            # 擴大搜索範圍到前後各30天
-            extended_start = current_range_start - timedelta(days=30)
-            extended_end = current_range_end + timedelta(days=30)
-            
-            time_min = datetime.combine(extended_start, datetime.min.time()).isoformat() + 'Z'
-            time_max = datetime.combine(extended_end, datetime.min.time()).isoformat() + 'Z'
-            
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                maxResults=2500
-            ).execute()
-            
-            google_events = events_result.get('items', [])
-            
-            # 在Google Calendar事件中搜索包含此Outlook UID的事件
-            for google_event in google_events:
-                description = google_event.get('description', '')
-                if f"Outlook UID: {outlook_uid}" in description:
-                    # 找到了對應的Google Calendar事件，檢查其時間
-                    event_start = google_event.get('start', {})
-                    if 'dateTime' in event_start:
-                        event_date = pd.to_datetime(event_start['dateTime']).date()
-                    elif 'date' in event_start:
-                        event_date = pd.to_datetime(event_start['date']).date()
-                    else:
-                        continue
-                    
-                    today = date.today()
-                    
-                    # 如果是過去的事件，認為是超出範圍（不應刪除）
-                    if event_date < today:
-                        print(f"📅 事件 {outlook_uid[:20]}... 在 {event_date}（過去），跳過刪除檢測")
-                        return True
-                    else:
-                        # 未來事件但不在CSV中，可能是真正被刪除
-                        print(f"🔮 事件 {outlook_uid[:20]}... 在 {event_date}（未來），檢查是否被刪除")
-                        return False
+            # 從遠端索引取得對應的Google Calendar事件來確定其時間
+            google_event = self.get_remote_index().find(outlook_uid)
+            start_utc = event_start(google_event) if google_event else None
+            if start_utc is not None:
+                event_date = start_utc.date()
+                today = datetime.date.today()
+                
+                # 如果是過去的事件，認為是超出範圍（不應刪除）
+                if event_date < today:
+                    print(f"📅 事件 {outlook_uid[:20]}... 在 {event_date}（過去），跳過刪除檢測")
+                    return True
+                else:
+                    # 未來事件但不在CSV中，可能是真正被刪除
+                    print(f"🔮 事件 {outlook_uid[:20]}... 在 {event_date}（未來），檢查是否被刪除")
+                    return False
             
             # 如果在Google Calendar中找不到事件，保守處理
             print(f"❓ 事件 {outlook_uid[:20]}... 在Google Calendar中找不到，跳過刪除檢測")
@@ -445,6 +535,11 @@ class OutlookToGoogleCalendarSync:
             # 發生錯誤時，保守處理：不標記為刪除
             return True
     
+    def forget_event(self, outlook_uid):
+        """從快取中移除事件"""
+        self.cache.pop(outlook_uid, None)
+        self.content_hashes.pop(outlook_uid, None)
+    
     def mark_deleted_events(self, deleted_events):
         """標記已刪除的事件（通過搜索Google Calendar找到對應事件）"""
         marked_count = 0
@@ -454,33 +549,29 @@ class OutlookToGoogleCalendarSync:
             return 0
         
         try:
-            # 獲取Google Calendar中的所有事件（接下來7天）
-            from datetime import datetime, timedelta
-            now = datetime.utcnow()
-            time_min = (now - timedelta(days=1)).isoformat() + 'Z'  # 包含昨天的事件
-            time_max = (now + timedelta(days=7)).isoformat() + 'Z'
-            
-            events_result = self.service.events().list(
-                calendarId=self.calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                maxResults=2500  # 增加搜索範圍
-            ).execute()
+            from datetime import datetime
+            # 從遠端索引以UID找到對應的Google Calendar事件
+            index = self.get_remote_index()
+            batcher = self.write_batcher()
             
-            google_events = events_result.get('items', [])
-            print(f"🔍 在Google Calendar中找到 {len(google_events)} 個事件")
+            def on_marked(outlook_uid, current_title):
+                def callback(response, exception):
+                    nonlocal marked_count
+                    if exception is not None:
+                        print(f"❌ 標記刪除事件失敗: {current_title} - {exception}")
+                        return
+                    print(f"🗑️ 標記已刪除事件: {current_title}")
+                    marked_count += 1
+                    index.put(response)
+                    self.forget_event(outlook_uid)
+                return callback
             
             # 為每個已刪除的Outlook事件尋找對應的Google Calendar事件
             for deleted_event in deleted_events:
                 outlook_uid = deleted_event['outlook_uid']
-                found_event = None
-                
-                # 在Google Calendar事件中搜索包含此Outlook UID的事件
-                for google_event in google_events:
-                    if 'description' in google_event and outlook_uid in google_event['description']:
-                        found_event = google_event
-                        break
+                # 複製索引中的事件，更新成功後才以回應取代
+                found_event = index.find(outlook_uid)
+                found_event = dict(found_event) if found_event else None
                 
                 if found_event:
                     current_title = found_event.get('summary', 'Untitled Event')
@@ -496,15 +587,13 @@ class OutlookToGoogleCalendarSync:
                         deletion_note = f"\\n\\n⚠️ 此事件已從Outlook中刪除 (刪除時間: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')})"
                         found_event['description'] = current_description + deletion_note
                         
-                        # 更新Google Calendar事件
-                        updated_event = self.service.events().update(
+                        # 更新Google Calendar事件（成功後才從快取中移除）
+                        batcher.add(self.service.events().update(
                             calendarId=self.calendar_id,
                             eventId=found_event['id'],
                             body=found_event
-                        ).execute()
-                        
-                        print(f"🗑️ 標記已刪除事件: {current_title}")
-                        marked_count += 1
+                        ), on_marked(outlook_uid, current_title))
+                        continue
                     else:
                         print(f"ℹ️ 事件已標記為刪除: {current_title}")
                 else:
@@ -512,9 +601,9 @@ class OutlookToGoogleCalendarSync:
                     cleaned_count += 1
                 
                 # 從快取中移除已刪除的事件
-                if outlook_uid in self.cache:
-                    del self.cache[outlook_uid]
+                self.forget_event(outlook_uid)
             
+            batcher.flush()
             if cleaned_count > 0:
                 print(f"🧹 已清理 {cleaned_count} 個無法找到的事件")
             
@@ -586,10 +675,17 @@ class OutlookToGoogleCalendarSync:
     
     def parse_datetime(self, datetime_str):
         """解析時間字串為 RFC3339 格式"""
-        if not datetime_str or pd.isna(datetime_str):
+        if datetime_str is None or pd.isna(datetime_str):
             return None
-        """解析時間字串為 RFC3339 格式"""
-        if not datetime_str or pd.isna(datetime_str):
+        
+        # JSONL/Parquet/Arrow 匯出的時間已是UTC時間戳，不需要字串解析
+        if isinstance(datetime_str, datetime.datetime):
+            dt = datetime_str
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=datetime.timezone.utc)
+            return dt.isoformat()
+        
+        if not datetime_str:
             return None
         
         try:
@@ -635,44 +731,50 @@ class OutlookToGoogleCalendarSync:
     def generate_event_id(self, calendar_uid):
         """生成 Google Calendar 事件 ID"""
         # Google Calendar 事件 ID 要求：
-        # - 只能包含小寫字母、數字和連字符
+        # - 只能包含 base32hex 字符（小寫字母 a-v 與數字 0-9），不能有連字符
         # - 長度 5-1024 字符
-        # - 不能以數字開頭
-        # - 不能以連字符結尾
         
         import hashlib
         
         # 對於所有 UID，統一使用 hash 來生成穩定且符合格式的 ID
         original_uid = str(calendar_uid)
         
-        # 使用 MD5 hash 生成固定長度的 ID
+        # 使用 MD5 hash 生成固定長度的 ID（十六進位字符都在 base32hex 範圍內）
         hash_obj = hashlib.md5(original_uid.encode('utf-8'))
         hash_hex = hash_obj.hexdigest()
         
-        # 根據原始 UID 類型添加前綴，確保不以數字開頭
+        # 根據原始 UID 類型添加前綴（前綴同樣只使用 a-v 的字母），確保不以數字開頭
         if '@google.com' in original_uid:
-            clean_uid = f"google-{hash_hex}"
+            prefix = "google"
         elif original_uid.startswith('Meetings-'):
-            clean_uid = f"amazon-{hash_hex}"
+            prefix = "meetings"
         elif len(original_uid) > 50 and original_uid.startswith('040000008200E00074C5B7101A82E008'):
-            clean_uid = f"exchange-{hash_hex}"
+            prefix = "mapi"
         elif '-' in original_uid and len(original_uid) == 36:  # GUID format
-            clean_uid = f"guid-{hash_hex}"
+            prefix = "guid"
         else:
-            clean_uid = f"outlook-{hash_hex}"
+            prefix = "outlook"
         
-        # 確保不以數字開頭（雖然我們已經加了前綴，但雙重保險）
-        if clean_uid[0].isdigit():
-            clean_uid = f"event-{clean_uid}"
-        
-        # 確保長度不超過 64 字符（安全範圍）
-        if len(clean_uid) > 64:
-            clean_uid = clean_uid[:64]
-        
-        # 確保不以連字符結尾
-        clean_uid = clean_uid.rstrip('-')
-        
-        return clean_uid
+        return f"{prefix}{hash_hex}"
+    
+    def sync_properties(self, calendar_uid, record_moddate, content_hash=None):
+        """寫入 extendedProperties.private 的同步資訊"""
+        properties = {UID_PROPERTY: calendar_uid, MOD_DATE_PROPERTY: record_moddate}
+        if content_hash:
+            properties[CONTENT_HASH_PROPERTY] = content_hash
+        return properties
+    
+    def _insert_conflict_fallback(self, event_id, event_body):
+        """insert 的替代請求：ID 已存在（409）時改為以相同 ID 更新（並恢復已刪除的事件），其他錯誤不替代"""
+        def fallback(exception):
+            if http_status(exception) != 409:
+                return None
+            return self.service.events().update(
+                calendarId=self.calendar_id,
+                eventId=event_id,
+                body=dict(event_body, status='confirmed')
+            )
+        return fallback
     
     def create_or_update_event(self, row):
         """創建或更新 Google Calendar 事件"""
@@ -696,10 +798,23 @@ class OutlookToGoogleCalendarSync:
             
             # 檢查是否需要更新
             cache_key = calendar_uid
+            batcher = self.write_batcher()
+            if batcher.has_pending(cache_key):
+                # 同一個UID還有尚未送出的寫入（例如週期性事件的多個實例），先送出以取得最新的快取與事件
+                batcher.flush()
             if not self.force_update and cache_key in self.cache and self.cache[cache_key] == record_moddate:
                 print(f"⏭️  跳過 '{subject}': 未變更")
                 return True
             
+            # Record_ModDate 改變但同步欄位的內容雜湊相同（例如已讀狀態、分類、提醒變更），不需要呼叫API
+            content_hash = self.row_content_hash(row)
+            if (not self.force_update and content_hash and cache_key in self.cache and
+                    self.content_hashes.get(cache_key) == content_hash):
+                print(f"⏭️  跳過 '{subject}': 內容未變更（Record_ModDate 已更新）")
+                self.cache[cache_key] = record_moddate
+                self.skipped_unchanged_content += 1
+                return True
+            
             if self.force_update:
                 print(f"🔄 強制更新 '{subject}'")
             elif cache_key in self.cache:
@@ -714,7 +829,9 @@ class OutlookToGoogleCalendarSync:
                 'end': {'dateTime': ends_utc, 'timeZone': 'UTC'},
                 'reminders': {'useDefault': True},
                 # 在描述中加入 Calendar_UID 以便識別
-                'description': f"[Outlook Calendar UID: {calendar_uid}]\n\n{body}" if body else f"[Outlook Calendar UID: {calendar_uid}]"
+                'description': f"[Outlook Calendar UID: {calendar_uid}]\n\n{body}" if body else f"[Outlook Calendar UID: {calendar_uid}]",
+                # 以私有擴充屬性記錄 UID 與修改日期（查詢時以 privateExtendedProperty 篩選）
+                'extendedProperties': {'private': self.sync_properties(calendar_uid, record_moddate, content_hash)}
             }
             
             # 可選欄位
@@ -724,128 +841,252 @@ class OutlookToGoogleCalendarSync:
             if organizer and '@' in organizer:
                 event_body['organizer'] = {'email': organizer}
             
-            # 搜尋是否已存在相同的事件（通過描述中的 UID）
+            # 從遠端索引查詢是否已存在相同的事件（舊版同步建立、ID由Google指定的事件）
             try:
-                # 搜尋包含此 Calendar_UID 的事件
-                events_result = self.service.events().list(
-                    calendarId=self.calendar_id,
-                    q=f"Outlook Calendar UID: {calendar_uid}",
-                    maxResults=10
-                ).execute()
-                
-                events = events_result.get('items', [])
-                existing_event = None
-                
-                # 找到匹配的事件
-                for event in events:
-                    if 'description' in event and calendar_uid in event['description']:
-                        existing_event = event
-                        break
+                index = self.get_remote_index()
+                existing_event = index.find(calendar_uid)
                 
                 if existing_event:
                     # 更新現有事件
-                    updated_event = self.service.events().update(
+                    request = self.service.events().update(
                         calendarId=self.calendar_id,
                         eventId=existing_event['id'],
                         body=event_body
-                    ).execute()
-                    
-                    print(f"🔄 更新事件: {subject}")
+                    )
+                    action = "🔄 更新事件"
+                    fallback = None
                 else:
-                    # 創建新事件（不指定 ID，讓 Google 自動生成）
-                    created_event = self.service.events().insert(
+                    # 以 UID 產生的固定 ID 創建事件；ID 已存在（409，例如時間窗外或已刪除的事件）時改為更新
+                    event_id = self.generate_event_id(calendar_uid)
+                    request = self.service.events().insert(
                         calendarId=self.calendar_id,
-                        body=event_body
-                    ).execute()
-                    
-                    print(f"➕ 創建事件: {subject}")
+                        body=dict(event_body, id=event_id)
+                    )
+                    action = "➕ 創建事件"
+                    fallback = self._insert_conflict_fallback(event_id, event_body)
                 
             except HttpError as e:
                 print(f"❌ API 錯誤: {e}")
                 return False
             
-            # 更新快取
-            self.cache[cache_key] = record_moddate
+            def on_written(response, exception):
+                if exception is not None:
+                    print(f"❌ API 錯誤 '{subject}': {exception}")
+                    self.failed_writes += 1
+                    return
+                print(f"{action}: {subject}")
+                index.put(response)
+                # 更新快取
+                self.cache[cache_key] = record_moddate
+                if content_hash:
+                    self.content_hashes[cache_key] = content_hash
+                else:
+                    self.content_hashes.pop(cache_key, None)
+            
+            # 寫入請求排入批次，完成後由回呼更新快取（失敗時計入 failed_writes）
+            batcher.add(request, on_written, key=cache_key, fallback=fallback)
             return True
             
         except Exception as e:
             print(f"❌ 處理事件失敗: {e}")
             return False
     
+    def load_events(self):
+        """依副檔名讀取匯出檔（CSV、JSONL、Parquet、Arrow）為 DataFrame
+        
+        型別化格式的 Starts_UTC/Ends_UTC 統一轉為UTC時間戳欄位；
+        Parquet/Arrow 直接以欄位格式載入，不經過文字解析。
+        """
+        fmt = event_formats.detect_format(self.csv_path)
+        if fmt == 'csv':
+            return pd.read_csv(self.csv_path)
+        
+        if fmt == 'jsonl':
+            df = pd.read_json(self.csv_path, lines=True, dtype={'Calendar_UID': str, 'PathToDataFile': str})
+        else:
+            table = event_formats.read_arrow_table(self.csv_path)
+            df = table.to_pandas(self_destruct=True, split_blocks=True)
+        
+        # JSONL 的UTC時間為整數秒
+        for column in event_formats.TIMESTAMP_FIELDS:
+            if column in df.columns and not pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = pd.to_datetime(df[column], unit='s', utc=True)
+        
+        if 'Record_ModDate' in df.columns:
+            df['Record_ModDate'] = df['Record_ModDate'].astype('Int64')
+        
+        return df
+    
     def sync_events(self):
         """同步所有事件"""
         # 設定 OutlookMacSync 日曆
         self.setup_outlook_calendar()
         
-        # 檢查 CSV 檔案
+        # 檢查匯出檔案
         if not os.path.exists(self.csv_path):
-            print(f"❌ 找不到 CSV 檔案: {self.csv_path}")
+            print(f"❌ 找不到匯出檔案: {self.csv_path}")
             print("請先執行 Outlook 行事曆讀取器生成 CSV 檔案")
             return False
         
         try:
-            # 讀取 CSV
-            df = pd.read_csv(self.csv_path)
-            print(f"📊 讀取 CSV: {len(df)} 個事件")
+            # 讀取匯出檔（CSV/JSONL/Parquet/Arrow）
+            df = self.load_events()
+            print(f"📊 讀取 {event_formats.detect_format(self.csv_path).upper()}: {len(df)} 個事件")
             
             # 檢查必要欄位
             required_columns = ['Calendar_UID', 'Record_ModDate', 'Subject', 'Starts_UTC', 'Ends_UTC']
             missing_columns = [col for col in required_columns if col not in df.columns]
             
             if missing_columns:
-                print(f"❌ CSV 檔案缺少必要欄位: {missing_columns}")
+                print(f"❌ 匯出檔案缺少必要欄位: {missing_columns}")
                 return False
             
             # 檢測已刪除的事件（如果啟用）
             if self.mark_deleted:
-                deleted_events = self.detect_deleted_events(df)
-                if deleted_events:
-                    print(f"\n🗑️ 檢測到 {len(deleted_events)} 個已刪除的事件")
-                    for event in deleted_events:
-                        print(f"   - {event['outlook_uid'][:30]}...")
-                    marked_count = self.mark_deleted_events(deleted_events)
-                    if marked_count > 0:
-                        print(f"✅ 已標記 {marked_count} 個刪除事件")
-                    else:
-                        print("ℹ️ 所有已刪除的事件都已處理（可能已不存在於Google Calendar中）")
-                else:
-                    print("\n✅ 沒有檢測到已刪除的事件")
+                self.handle_deleted_events(self.detect_deleted_events(df))
             
             # 同步事件
-            success_count = 0
-            error_count = 0
+            success_count, error_count = self.sync_rows((row for _, row in df.iterrows()), total=len(df))
+            self.finish_sync(success_count, error_count)
+            return True
             
-            for index, row in df.iterrows():
-                print(f"\n處理事件 {index + 1}/{len(df)}")
-                
-                if self.create_or_update_event(row):
-                    success_count += 1
-                else:
-                    error_count += 1
-                
-                # 每 10 個事件儲存一次快取
-                if (index + 1) % 10 == 0:
-                    self.save_cache()
+        except Exception as e:
+            print(f"❌ 同步失敗: {e}")
+            return False
+    
+    def load_delta(self, delta_path):
+        """讀取 dump_outlook_calendar.py --incremental 的差異檔，回傳 (更新事件的 DataFrame, 移除的UID)"""
+        with open(delta_path, 'r', encoding='utf-8') as f:
+            delta = json.load(f)
+        df = pd.DataFrame(delta.get('upserts', []))
+        if 'Record_ModDate' in df.columns:
+            df['Record_ModDate'] = pd.to_numeric(df['Record_ModDate'], errors='coerce').astype('Int64')
+        return df, [str(uid) for uid in delta.get('removed_uids', [])]
+    
+    def sync_delta(self, delta_path):
+        """只同步差異檔中的事件；移除的UID經過時間範圍檢查後才標記刪除，全部成功後刪除差異檔"""
+        self.setup_outlook_calendar()
+        
+        try:
+            df, removed_uids = self.load_delta(delta_path)
+            print(f"📊 讀取差異檔: 更新 {len(df)} 個事件，移除 {len(removed_uids)} 個UID")
             
-            # 最終儲存快取
-            self.save_cache()
+            required_columns = ['Calendar_UID', 'Record_ModDate', 'Subject', 'Starts_UTC', 'Ends_UTC']
+            missing_columns = [col for col in required_columns if col not in df.columns]
+            if len(df) and missing_columns:
+                print(f"❌ 差異檔缺少必要欄位: {missing_columns}")
+                return False
             
-            print(f"\n🎉 同步完成!")
-            print(f"✅ 成功: {success_count} 個事件")
-            print(f"❌ 失敗: {error_count} 個事件")
+            # 差異檔只列出離開時間範圍（或已刪除）的UID，其餘快取中的事件視為仍存在
+            if self.mark_deleted and removed_uids:
+                current_uids = set(self.cache) - set(removed_uids)
+                self.handle_deleted_events(self.detect_deleted_uids(current_uids, None, None))
             
-            # 清理過期事件
-            if self.enable_cleanup and self.cleanup_days > 0:
-                print(f"\n" + "="*50)
-                self.cleanup_expired_events(days_threshold=self.cleanup_days)
-            else:
-                print(f"\nℹ️ 過期事件清理已停用")
+            success_count, error_count = self.sync_rows((row for _, row in df.iterrows()), total=len(df))
+            self.finish_sync(success_count, error_count)
             
+            # 有失敗的事件時保留差異檔，下一次增量匯出會與它合併，失敗的事件再同步一次
+            if error_count == 0:
+                os.remove(delta_path)
+            else:
+                print(f"⚠️ 有 {error_count} 個事件同步失敗，保留差異檔 {delta_path}")
             return True
             
         except Exception as e:
             print(f"❌ 同步失敗: {e}")
             return False
+    
+    def handle_deleted_events(self, deleted_events):
+        """標記檢測到的已刪除事件"""
+        if deleted_events:
+            print(f"\n🗑️ 檢測到 {len(deleted_events)} 個已刪除的事件")
+            for event in deleted_events:
+                print(f"   - {event['outlook_uid'][:30]}...")
+            marked_count = self.mark_deleted_events(deleted_events)
+            if marked_count > 0:
+                print(f"✅ 已標記 {marked_count} 個刪除事件")
+            else:
+                print("ℹ️ 所有已刪除的事件都已處理（可能已不存在於Google Calendar中）")
+        else:
+            print("\n✅ 沒有檢測到已刪除的事件")
+    
+    def sync_rows(self, rows, total=None):
+        """逐一同步事件列，回傳 (成功數, 失敗數)
+        
+        rows 可以是產生器（例如解析中的事件串流），total 未知時不顯示總數。
+        """
+        success_count = 0
+        error_count = 0
+        failed_before = self.failed_writes
+        
+        for index, row in enumerate(rows):
+            print(f"\n處理事件 {index + 1}/{total}" if total is not None else f"\n處理事件 {index + 1}")
+            
+            if self.create_or_update_event(row):
+                success_count += 1
+            else:
+                error_count += 1
+            
+            # 每 10 個事件儲存一次快取
+            if (index + 1) % 10 == 0:
+                self.save_cache()
+        
+        # 送出剩餘的批次寫入；排入批次後才失敗的事件從成功數移到失敗數
+        batcher = self.write_batcher()
+        batcher.flush()
+        failed_writes = self.failed_writes - failed_before
+        success_count -= failed_writes
+        error_count += failed_writes
+        if batcher.stats['requests']:
+            print(f"\n📦 {batcher.report()}")
+            print(f"📦 {self.api_executor().report()}")
+        
+        # 最終儲存快取
+        self.save_cache()
+        return success_count, error_count
+    
+    def finish_sync(self, success_count, error_count):
+        """顯示同步結果並清理過期事件"""
+        print(f"\n🎉 同步完成!")
+        print(f"✅ 成功: {success_count} 個事件")
+        print(f"❌ 失敗: {error_count} 個事件")
+        if self.skipped_unchanged_content:
+            print(f"⏭️ 內容未變更而略過的更新: {self.skipped_unchanged_content} 個事件")
+        
+        # 清理過期事件
+        if self.enable_cleanup and self.cleanup_days > 0:
+            print(f"\n" + "="*50)
+            self.cleanup_expired_events(days_threshold=self.cleanup_days)
+        else:
+            print(f"\nℹ️ 過期事件清理已停用")
+        
+        # 儲存遠端事件鏡像（包含本次寫入的結果）
+        if self.remote_index is not None:
+            self.remote_index.save_state()
+
+    def close(self):
+        """關閉API執行層的執行緒池"""
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.batcher = None
+
+# Google API 憑證檔案的候選位置
+CLIENT_SECRET_FILES = [
+    "data/client_secret.json",
+    "client_secret.json",
+    "data/client_secret_454302710199-eltj3sk10l5af60aloctrvaefi891vbk.apps.googleusercontent.com.json",
+    "client_secret_454302710199-eltj3sk10l5af60aloctrvaefi891vbk.apps.googleusercontent.com.json",
+    "data/credentials.json",
+    "credentials.json"
+]
+
+def find_client_secret_file():
+    """回傳第一個存在的 Google API 憑證檔案（找不到時回傳 None）"""
+    for file in CLIENT_SECRET_FILES:
+        if os.path.exists(file):
+            return file
+    return None
 
 def main():
     # 解析命令行參數
@@ -858,12 +1099,24 @@ def main():
                        help='標記已刪除的事件（預設啟用）')
     parser.add_argument('--no-mark-deleted', action='store_true',
                        help='不標記已刪除的事件')
-    parser.add_argument('--days', '-d', type=int, default=14,
-                       help='同步天數，應與Outlook匯出天數一致 (預設: 14天)')
     parser.add_argument('--cleanup-days', type=int, default=2,
                        help='自動清理多少天前的過期事件 (預設: 2天，設為0則停用)')
     parser.add_argument('--no-cleanup', action='store_true',
                        help='停用自動清理過期事件')
+    parser.add_argument('--input', '-i', default=None,
+                       help='Outlook 匯出檔（.csv/.jsonl/.parquet/.arrow，預設自動尋找）')
+    parser.add_argument('--delta', nargs='?', const='data/dump_outlook_calendar_delta.json', default=None,
+                       help='只同步 dump_outlook_calendar.py --incremental 的差異檔（預設: data/dump_outlook_calendar_delta.json）')
+    parser.add_argument('--mirror', nargs='?', const='data/calendar_mirror.sqlite', default=None,
+                       help='以 dump_outlook_calendar.py --mirror 建立的本機鏡像進行刪除檢測（預設: data/calendar_mirror.sqlite）')
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE,
+                       help=f'每個批次請求的寫入數，1 表示逐一送出 (預設與上限: {MAX_BATCH_SIZE})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'同時送出的API請求數上限，遇到速率限制時自動降低 (預設: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--user-qps', type=float, default=DEFAULT_USER_QPS,
+                       help=f'每個使用者每秒的API請求配額，0 表示不限制 (預設: {DEFAULT_USER_QPS:g})')
+    parser.add_argument('--calendar-qps', type=float, default=DEFAULT_CALENDAR_QPS,
+                       help=f'每個日曆每秒的寫入配額，0 表示不限制 (預設: {DEFAULT_CALENDAR_QPS:g})')
     args = parser.parse_args()
     
     print("Outlook Calendar to Google Calendar 同步器")
@@ -872,8 +1125,6 @@ def main():
     if args.force:
         print("🔄 強制更新模式：將更新所有事件")
     
-    print(f"📅 同步範圍：{args.days} 天")
-    
     # 處理刪除標記選項
     mark_deleted = args.mark_deleted and not args.no_mark_deleted
     if mark_deleted:
@@ -895,22 +1146,40 @@ def main():
             print(f"🗑️  已清除快取檔案: {cache_file}")
         else:
             print("ℹ️  快取檔案不存在")
+        for state_file in (CONTENT_HASH_CACHE, REMOTE_STATE_CACHE):
+            if os.path.exists(state_file):
+                os.remove(state_file)
+                print(f"🗑️  已清除快取檔案: {state_file}")
     
-    # 檢查是否有 CSV 檔案
+    # 檢查是否有匯出檔案（CSV 優先，其次為 --format 匯出的型別化格式）
     csv_files = [
         "data/dump_outlook_calendar.csv",
         "dump_outlook_calendar.csv",
         "data/outlook_calendar_complete.csv",
         "outlook_calendar_complete.csv", 
         "data/outlook_calendar.csv",
-        "outlook_calendar.csv"
+        "outlook_calendar.csv",
+        "data/dump_outlook_calendar.parquet",
+        "data/dump_outlook_calendar.arrow",
+        "data/dump_outlook_calendar.jsonl"
     ]
     
     csv_path = None
-    for file in csv_files:
-        if os.path.exists(file):
-            csv_path = file
-            break
+    if args.delta:
+        if not os.path.exists(args.delta):
+            print(f"✅ 沒有待同步的差異檔: {args.delta}")
+            return
+        csv_path = args.delta
+    elif args.input:
+        if not os.path.exists(args.input):
+            print(f"❌ 找不到匯出檔案: {args.input}")
+            sys.exit(1)
+        csv_path = args.input
+    else:
+        for file in csv_files:
+            if os.path.exists(file):
+                csv_path = file
+                break
     
     if not csv_path:
         print("❌ 找不到 CSV 檔案")
@@ -918,23 +1187,10 @@ def main():
         print("python3 dump_outlook_calendar.py")
         sys.exit(1)
     
-    print(f"📁 使用 CSV 檔案: {csv_path}")
+    print(f"📁 使用匯出檔案: {csv_path}")
     
     # 檢查 Google API 憑證檔案
-    client_secret_files = [
-        "data/client_secret.json",
-        "client_secret.json",
-        "data/client_secret_454302710199-eltj3sk10l5af60aloctrvaefi891vbk.apps.googleusercontent.com.json",
-        "client_secret_454302710199-eltj3sk10l5af60aloctrvaefi891vbk.apps.googleusercontent.com.json",
-        "data/credentials.json",
-        "credentials.json"
-    ]
-    
-    client_secret_file = None
-    for file in client_secret_files:
-        if os.path.exists(file):
-            client_secret_file = file
-            break
+    client_secret_file = find_client_secret_file()
     
     if not client_secret_file:
         print("❌ 找不到 Google API 憑證檔案")
@@ -943,6 +1199,15 @@ def main():
     
     print(f"🔑 使用憑證檔案: {client_secret_file}")
     
+    mirror = None
+    if args.mirror:
+        if os.path.exists(args.mirror):
+            mirror = CalendarMirror(args.mirror)
+            if not mirror.open():
+                mirror = None
+        else:
+            print(f"⚠️ 找不到本機鏡像 {args.mirror}，刪除檢測改為查詢 Google Calendar")
+    
     # 創建同步器並執行
     syncer = OutlookToGoogleCalendarSync(
         csv_path=csv_path,
@@ -950,13 +1215,21 @@ def main():
         force_update=args.force,
         mark_deleted=mark_deleted,
         cleanup_days=args.cleanup_days,
-        enable_cleanup=enable_cleanup
+        enable_cleanup=enable_cleanup,
+        mirror=mirror,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        user_qps=args.user_qps,
+        calendar_qps=args.calendar_qps
     )
     
     try:
         syncer.authenticate()
         syncer.load_cache()
-        syncer.sync_events()
+        if args.delta:
+            syncer.sync_delta(args.delta)
+        else:
+            syncer.sync_events()
         
     except KeyboardInterrupt:
         print("\n⏹️  同步已中斷")
@@ -964,6 +1237,10 @@ def main():
     except Exception as e:
         print(f"❌ 執行錯誤: {e}")
         syncer.save_cache()
+    finally:
+        syncer.close()
+        if mirror:
+            mirror.close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Outlook → Google Calendar 單一行程同步管線
+解析器產生的事件直接經由有界佇列交給同步器，不經過中間CSV：
+前面的事件開始呼叫 Google API 時，後面的事件檔案仍在解析中
+"""
+
+import argparse
+import csv
+import os
+import queue
+import sys
+import threading
+
+from dump_outlook_calendar import CompleteFixedTimeZoneOutlookParser, CSV_FIELDNAMES
+from parse_cache import ParseCache
+from calendar_mirror import CalendarMirror
+from calendar_batch import MAX_BATCH_SIZE
+from api_executor import DEFAULT_CONCURRENCY, DEFAULT_USER_QPS, DEFAULT_CALENDAR_QPS
+from sync_csv_with_google_calendar import OutlookToGoogleCalendarSync, find_client_secret_file
+
+# 佇列結束標記
+_END = object()
+
+
+class OutlookSyncPipeline:
+    """解析執行緒 → 有界佇列 → 同步器"""
+
+    def __init__(self, reader, syncer, days=14, queue_size=64, csv_tap=None):
+        self.reader = reader
+        self.syncer = syncer
+        self.days = days
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.csv_tap = csv_tap
+        self.stop_event = threading.Event()
+        self.error = None
+        self.current_uids = set()
+        self.start_times = []
+
+    def _put(self, item):
+        """放入佇列；佇列滿時等待同步器（背壓），停止時放棄"""
+        while not self.stop_event.is_set():
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce(self):
+        """解析執行緒：逐一解析事件並放入佇列，可選擇同時寫入CSV（除錯用）"""
+        tap_file = None
+        try:
+            writer = None
+            if self.csv_tap:
+                tap_file = open(self.csv_tap, 'w', newline='', encoding='utf-8')
+                writer = csv.DictWriter(tap_file, fieldnames=CSV_FIELDNAMES)
+                writer.writeheader()
+
+            for event in self.reader.iter_events(self.days):
+                if writer:
+                    writer.writerow(self.reader.format_event_row(event))
+                if not self._put(self.reader.format_event_record(event)):
+                    break
+        except Exception as e:
+            self.error = e
+        finally:
+            if tap_file:
+                tap_file.close()
+            self._put(_END)
+
+    def _iter_records(self):
+        """同步器端：從佇列取出事件，同時記錄刪除檢測需要的UID與時間範圍"""
+        while True:
+            record = self.queue.get()
+            if record is _END:
+                return
+            self.current_uids.add(str(record['Calendar_UID']))
+            if record['Starts_UTC'] is not None:
+                self.start_times.append(record['Starts_UTC'])
+            yield record
+
+    def run(self):
+        """執行管線，回傳 (成功數, 失敗數)"""
+        self.syncer.setup_outlook_calendar()
+
+        producer = threading.Thread(target=self._produce, name="outlook-parser", daemon=True)
+        producer.start()
+        try:
+            success_count, error_count = self.syncer.sync_rows(self._iter_records())
+        finally:
+            self.stop_event.set()
+            producer.join()
+
+        if self.error:
+            print(f"❌ 解析事件時發生錯誤: {self.error}")
+            return success_count, error_count
+
+        if self.csv_tap:
+            print(f"📁 已寫入除錯CSV: {self.csv_tap}")
+
+        # 刪除檢測需要完整的UID集合，在所有事件同步後進行
+        if self.syncer.mark_deleted:
+            if not self.syncer.cache:
+                print("ℹ️ 快取為空，無法檢測刪除事件")
+            elif not self.start_times:
+                print("⚠️ 沒有解析到事件，無法確定時間範圍")
+            else:
+                range_start = min(self.start_times).date()
+                range_end = max(self.start_times).date()
+                print(f"🔍 當前匯出範圍: {range_start} 到 {range_end}")
+                self.syncer.handle_deleted_events(
+                    self.syncer.detect_deleted_uids(self.current_uids, range_start, range_end))
+
+        self.syncer.finish_sync(success_count, error_count)
+        return success_count, error_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Outlook Calendar → Google Calendar 單一行程同步管線（不產生中間CSV）')
+    parser.add_argument('--timezone', '-tz', default='UTC+8',
+                       help='使用者時區 (例如: UTC+8, UTC-5, UTC+0)')
+    parser.add_argument('--days', '-d', type=int, default=14,
+                       help='同步天數 (預設: 14天)')
+    parser.add_argument('--data-path', default=None,
+                       help='Outlook資料目錄（包含Outlook.sqlite）')
+    parser.add_argument('--workers', '-w', type=int, default=1,
+                       help='平行解析事件檔案的行程數 (預設: 1)')
+    parser.add_argument('--parse-cache', default='data/parse_cache.sqlite',
+                       help='解析結果快取檔案 (預設: data/parse_cache.sqlite)')
+    parser.add_argument('--no-parse-cache', action='store_true',
+                       help='停用解析結果快取')
+    parser.add_argument('--mirror', nargs='?', const='data/calendar_mirror.sqlite', default=None,
+                       help='使用 CalendarEvents 的本機索引鏡像查詢時間範圍與進行刪除檢測 (預設: data/calendar_mirror.sqlite)')
+    parser.add_argument('--skip-file-timestamps', action='store_true',
+                       help='略過事件檔案內的時間戳掃描')
+    parser.add_argument('--snapshot-copy', action='store_true',
+                       help='先複製一致的資料庫快照再查詢')
+    parser.add_argument('--busy-retries', type=int, default=5,
+                       help='資料庫鎖定時的最大重試次數 (預設: 5)')
+    parser.add_argument('--no-body', action='store_true',
+                       help='不同步Body（不解碼HTML內容）')
+    parser.add_argument('--max-body', type=int, default=8000,
+                       help='Body最多保留的字數，與同步器的描述長度上限相同 (預設: 8000)')
+    parser.add_argument('--queue-size', type=int, default=64,
+                       help='解析與同步之間的佇列大小，佇列滿時解析會暫停 (預設: 64)')
+    parser.add_argument('--csv-tap', default=None,
+                       help='同時將解析結果寫入CSV（除錯用）')
+    parser.add_argument('--force', '-f', action='store_true',
+                       help='強制更新所有事件，忽略快取檢查')
+    parser.add_argument('--no-mark-deleted', action='store_true',
+                       help='不標記已刪除的事件')
+    parser.add_argument('--cleanup-days', type=int, default=2,
+                       help='自動清理多少天前的過期事件 (預設: 2天，設為0則停用)')
+    parser.add_argument('--no-cleanup', action='store_true',
+                       help='停用自動清理過期事件')
+    parser.add_argument('--batch-size', type=int, default=MAX_BATCH_SIZE,
+                       help=f'每個批次請求的寫入數，1 表示逐一送出 (預設與上限: {MAX_BATCH_SIZE})')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                       help=f'同時送出的API請求數上限，遇到速率限制時自動降低 (預設: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--user-qps', type=float, default=DEFAULT_USER_QPS,
+                       help=f'每個使用者每秒的API請求配額，0 表示不限制 (預設: {DEFAULT_USER_QPS:g})')
+    parser.add_argument('--calendar-qps', type=float, default=DEFAULT_CALENDAR_QPS,
+                       help=f'每個日曆每秒的寫入配額，0 表示不限制 (預設: {DEFAULT_CALENDAR_QPS:g})')
+    args = parser.parse_args()
+
+    print("Outlook Calendar → Google Calendar 同步管線")
+    print("=" * 50)
+
+    client_secret_file = find_client_secret_file()
+    if not client_secret_file:
+        print("❌ 找不到 Google API 憑證檔案")
+        print("請從 Google Cloud Console 下載 OAuth 2.0 憑證檔案並命名為 'client_secret.json'")
+        sys.exit(1)
+
+    mirror = None
+    if args.mirror:
+        mirror = CalendarMirror(args.mirror)
+        if not mirror.open():
+            mirror = None
+    
+    parse_cache = None
+    if not args.no_parse_cache:
+        if mirror:
+            # 解析結果直接存放在鏡像的事件列中
+            parse_cache = mirror
+        else:
+            parse_cache = ParseCache(args.parse_cache)
+            if not parse_cache.open():
+                parse_cache = None
+
+    reader = CompleteFixedTimeZoneOutlookParser(user_timezone=args.timezone,
+                                                scan_file_timestamps=not args.skip_file_timestamps,
+                                                workers=args.workers,
+                                                parse_cache=parse_cache,
+                                                outlook_data_path=args.data_path,
+                                                snapshot_copy=args.snapshot_copy,
+                                                busy_retries=args.busy_retries,
+                                                include_body=not args.no_body,
+                                                max_body_chars=args.max_body,
+                                                mirror=mirror)
+    if not os.path.exists(reader.db_path):
+        print(f"錯誤: 找不到Outlook資料庫: {reader.db_path}")
+        sys.exit(1)
+
+    syncer = OutlookToGoogleCalendarSync(
+        client_secret_file=client_secret_file,
+        force_update=args.force,
+        mark_deleted=not args.no_mark_deleted,
+        cleanup_days=args.cleanup_days,
+        enable_cleanup=not args.no_cleanup and args.cleanup_days > 0,
+        mirror=mirror,
+        batch_size=args.batch_size,
+        concurrency=args.concurrency,
+        user_qps=args.user_qps,
+        calendar_qps=args.calendar_qps
+    )
+
+    try:
+        syncer.authenticate()
+        syncer.load_cache()
+        OutlookSyncPipeline(reader, syncer, days=args.days,
+                            queue_size=args.queue_size, csv_tap=args.csv_tap).run()
+    except KeyboardInterrupt:
+        print("\n⏹️  同步已中斷")
+        syncer.save_cache()
+    except Exception as e:
+        print(f"❌ 執行錯誤: {e}")
+        syncer.save_cache()
+    finally:
+        syncer.close()
+        if parse_cache:
+            parse_cache.close()
+        if mirror and mirror is not parse_cache:
+            mirror.close()
+
+
+if __name__ == "__main__":
+    main()
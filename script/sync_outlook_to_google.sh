@@ -83,7 +83,8 @@ fi
 
 # 步驟 1: 生成 Outlook CSV 檔案
 echo "📊 步驟 1: 讀取 Outlook 行事曆資料..."
-if uv run ./script/dump_outlook_calendar.py --days ${DAYS}; then
+# Body 只保留同步需要的長度（與 sync_outlook_pipeline.py 的預設相同）
+if uv run ./script/dump_outlook_calendar.py --days ${DAYS} --max-body 8000; then
     echo "✅ Outlook 資料讀取成功"
 else
     echo "❌ Outlook 資料讀取失敗"
@@ -93,7 +94,8 @@ fi
 # 步驟 2: 同步到 Google Calendar
 echo ""
 echo "🔄 步驟 2: 同步到 Google Calendar..."
-if uv run ./script/sync_csv_with_google_calendar.py --days ${DAYS}; then
+# 同步器依匯出檔的內容同步，時間範圍由上面的匯出天數決定
+if uv run ./script/sync_csv_with_google_calendar.py; then
     echo "✅ Google Calendar 同步成功"
 else
     echo "❌ Google Calendar 同步失敗"
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+文字清理工具
+預先編譯的正規表示式與 str.translate 對照表，供事件解析與CSV輸出共用
+"""
+
+import re
+
+# clean_text 保留的字符：可見ASCII、Tab、中文（含擴展A）與全形標點，其餘全部刪除
+_CLEAN_TEXT_DELETE = re.compile(r'[^\x20-\x7e\t\u3400-\u4dbf\u4e00-\u9fff，。！？；：「」『』（）【】《》〈〉]+')
+
+# 空白字符連續出現時合併為一個空白
+_WHITESPACE_RUN = re.compile(r'\s+')
+
+# CSV中需要刪除的控制字符（空白類控制字符會先被合併成空白）
+_CONTROL_CHARS = ''.join(chr(c) for c in list(range(0x00, 0x20)) + list(range(0x7f, 0xa0)))
+_CONTROL_DELETE_TABLE = str.maketrans('', '', _CONTROL_CHARS)
+_NON_SPACE_CONTROL = re.compile('[%s]' % re.escape(''.join(c for c in _CONTROL_CHARS if not c.isspace())))
+
+# 解碼UTF-16時，\r \n \t 視為空白
+_DECODE_WHITESPACE_TABLE = str.maketrans('\r\n\t', '   ')
+
+# clean_trailing_garbage 的三種末尾垃圾模式
+_TRAILING_COMBINING = re.compile(r'[\u0100-\u017f\u0300-\u036f]{3,}$')
+_TRAILING_SYMBOLS = re.compile(r'[^\w\s\u4e00-\u9fff\[\]()（）【】".,!?;:：；，。！？-]{3,}$')
+_TRAILING_LIN_LEN = re.compile(r'Lin,\s*Len\s*$')
+
+
+def clean_text(text):
+    """清理文字，移除控制字符，特別處理中文字符"""
+    if not text:
+        return None
+
+    # 替換字符（\ufffd）與控制字符都不在保留範圍內，一次刪除
+    text = _CLEAN_TEXT_DELETE.sub('', text)
+
+    # 只剩空白與Tab兩種空白字符，split/join 即可合併並去除首尾空白
+    return ' '.join(text.split())
+
+
+def clean_csv_text(text):
+    """清理CSV文字，移除換行符和特殊字符"""
+    if not text:
+        return ""
+
+    # 常見情況：沒有非空白控制字符，合併空白與去除首尾空白在同一次 split/join 中完成
+    if not _NON_SPACE_CONTROL.search(text):
+        return ' '.join(text.split())
+
+    # 先合併空白（含換行與回車）再刪除控制字符，與逐步處理的結果一致
+    text = _WHITESPACE_RUN.sub(' ', text)
+    return text.translate(_CONTROL_DELETE_TABLE).strip()
+
+
+def _is_kept_decoded_char(char):
+    return char.isprintable() or '\u4e00' <= char <= '\u9fff' or '\u3400' <= char <= '\u4dbf'
+
+
+def decode_utf16_bytes(byte_array):
+    """解碼UTF-16字節數組（改進的邊界處理）"""
+    if len(byte_array) < 2:
+        return None
+
+    try:
+        # \r \n \t 保留為空白
+        decoded = byte_array.decode('utf-16le', errors='ignore').translate(_DECODE_WHITESPACE_TABLE)
+
+        # 遇到控制字符或無效字符，可能是字段邊界
+        if not decoded.isprintable():
+            for index, char in enumerate(decoded):
+                if not _is_kept_decoded_char(char):
+                    decoded = decoded[:index]
+                    break
+
+        # 進一步清理：移除末尾的重複字符模式
+        result = clean_trailing_garbage(decoded.strip())
+
+        return result if len(result) >= 1 else None
+
+    except Exception:
+        return None
+
+
+def clean_trailing_garbage(text):
+    """清理末尾的垃圾字符"""
+    if not text:
+        return text
+
+    # 模式1: 移除末尾的重複Unicode控制字符（如 ȀȀȀ̀̀̀̀̀̀̀̀̀̀）
+    text = _TRAILING_COMBINING.sub('', text)
+
+    # 模式2: 移除末尾的重複特殊字符
+    text = _TRAILING_SYMBOLS.sub('', text)
+
+    # 模式3: 移除末尾的Lin, Len模式
+    text = _TRAILING_LIN_LEN.sub('', text)
+
+    return text.strip()
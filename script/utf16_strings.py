@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+.olk15Event UTF-16 LE 字串掃描器
+以預先編譯的 bytes 正規表示式取代逐字節的 while 迴圈，延遲產生候選字串
+"""
+
+import re
+
+# 連續的 UTF-16 LE 字元（低位元組非零、高位元組為零）
+# 方法1 只收集至少3個字元的片段；方法2 必須從2個字元開始比對，以保持原本的跳躍位置
+UTF16_RUN_PATTERN = re.compile(rb'(?:[^\x00]\x00){3,}')
+UTF16_PAIR_RUN_PATTERN = re.compile(rb'(?:[^\x00]\x00){2,}')
+
+# </html> 之後需要跳過的空字節與換行
+LEADING_SKIP_PATTERN = re.compile(rb'[\x00\r\n]*')
+
+# 片段中的字元都小於 U+0100，clean_text 只會保留 Tab 與可見 ASCII，其餘字節一次刪除
+_KEEP_BYTES = bytes([0x09]) + bytes(range(0x20, 0x7f))
+_DELETE_BYTES = bytes(b for b in range(256) if b not in _KEEP_BYTES)
+
+
+def clean_run(run_bytes):
+    """清理一段 UTF-16 LE 片段，結果與 clean_text(run_bytes.decode('utf-16le')) 相同"""
+    text = run_bytes[::2].translate(None, _DELETE_BYTES).decode('ascii')
+    return ' '.join(text.split())
+
+
+def iter_strings_after_html(data, search_start):
+    """方法1: 產生 </html> 之後的 UTF-16 字串（至少3個字元，不去重複）"""
+    pos = LEADING_SKIP_PATTERN.match(data, search_start).end()
+    last_start = len(data) - 4
+
+    for match in UTF16_RUN_PATTERN.finditer(data, pos):
+        if match.start() >= last_start:
+            return
+        cleaned_text = clean_run(match.group())
+        if len(cleaned_text) >= 3:
+            yield cleaned_text
+
+
+def iter_terminated_strings(data):
+    """方法2: 產生整個檔案中以 00 00 結尾的 UTF-16 字串（不去重複）"""
+    data_len = len(data)
+    last_start = data_len - 10
+    pos = 0
+
+    while pos < last_start:
+        match = UTF16_PAIR_RUN_PATTERN.search(data, pos)
+        if not match or match.start() >= last_start:
+            return
+
+        end = match.end()
+        # 片段必須以 00 00 結尾，或一直延伸到檔案結尾
+        if end >= data_len - 1 or (data[end] == 0 and data[end + 1] == 0):
+            cleaned_text = clean_run(match.group())
+            if len(cleaned_text) >= 3 and not cleaned_text.startswith('http'):
+                yield cleaned_text
+
+        pos = end + 2
+
+
+def extract_raw_strings(data, html_end=-1, html_end_length=0):
+    """收集候選字串：先取 </html> 之後的前15個，再掃描整個檔案補到20個（去除重複）"""
+    raw_strings = []
+
+    if html_end != -1:
+        for text in iter_strings_after_html(data, html_end + html_end_length):
+            raw_strings.append(text)
+            if len(raw_strings) >= 15:
+                break
+
+    if len(raw_strings) < 20:
+        seen = set(raw_strings)
+        for text in iter_terminated_strings(data):
+            if text not in seen:
+                seen.add(text)
+                raw_strings.append(text)
+                if len(raw_strings) >= 20:
+                    break
+
+    return raw_strings